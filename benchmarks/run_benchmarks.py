@@ -0,0 +1,223 @@
+# benchmarks/run_benchmarks.py
+"""Banc d'essai de VaRCalculator et MonteCarloSimulator : temps, mémoire et débit selon la taille du problème.
+
+Exemples :
+    python benchmarks/run_benchmarks.py                     # grille rapide, comparaison à la référence
+    python benchmarks/run_benchmarks.py --full              # grille complète (long)
+    python benchmarks/run_benchmarks.py --update-baseline   # enregistre la référence
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import itertools
+import multiprocessing
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Module propre à Unix : pic de mémoire résidente non mesuré sous Windows
+    resource = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'src'))
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results', 'latest.json')
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Grilles de paramètres : actifs, observations, simulations, horizon
+QUICK_GRID = {
+    'historical_var': {'n_assets': [2, 100], 'n_obs': [250, 2500]},
+    'parametric_var': {'n_assets': [2, 100], 'n_obs': [250, 2500]},
+    'batch_var': {'n_assets': [10, 100], 'n_obs': [1000], 'n_portfolios': [1000]},
+    'simulate_gbm_streaming': {'n_assets': [6], 'n_simulations': [10000], 'horizon': [21, 252]},
+    'correlated_mc_simulation': {'n_assets': [6], 'n_simulations': [1000], 'horizon': [21, 252]},
+    'correlated_mc_streaming': {'n_assets': [6, 100], 'n_simulations': [10000], 'horizon': [21]},
+    'parallel_mc_simulation': {'n_assets': [6, 100], 'n_simulations': [10000], 'horizon': [21]},
+}
+FULL_GRID = {
+    'historical_var': {'n_assets': [2, 10, 100, 1000], 'n_obs': [250, 1000, 2500, 10000]},
+    'parametric_var': {'n_assets': [2, 10, 100, 1000], 'n_obs': [250, 1000, 2500, 10000]},
+    'batch_var': {'n_assets': [10, 100, 1000], 'n_obs': [250, 2500], 'n_portfolios': [1000, 50000]},
+    'simulate_gbm_streaming': {'n_assets': [6], 'n_simulations': [1000, 100000, 1000000],
+                               'horizon': [1, 21, 252]},
+    'correlated_mc_simulation': {'n_assets': [2, 10], 'n_simulations': [1000, 10000],
+                                 'horizon': [1, 21, 252]},
+    'correlated_mc_streaming': {'n_assets': [2, 10, 100, 1000], 'n_simulations': [1000, 100000],
+                                'horizon': [1, 21, 252]},
+    'parallel_mc_simulation': {'n_assets': [2, 10, 100, 1000], 'n_simulations': [10000, 1000000],
+                               'horizon': [1, 21, 252]},
+}
+
+def synthetic_returns(n_obs, n_assets, seed=0, n_factors=3):
+    """Rendements corrélés synthétiques (modèle à facteurs)"""
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0.5, 0.3, (n_factors, n_assets))
+    factors = rng.normal(0.0003, 0.01, (n_obs, n_factors))
+    idiosyncratic = rng.normal(0.0, 0.01, (n_obs, n_assets))
+    columns = [f'A{i}' for i in range(n_assets)]
+    return pd.DataFrame(factors @ loadings + idiosyncratic, columns=columns,
+                        index=pd.bdate_range('2000-01-03', periods=n_obs))
+
+def _run_case(name, params):
+    """Exécute un cas et renvoie (durée en secondes, nombre d'unités traitées, unité)"""
+    from var_calculator import VaRCalculator
+    from monte_carlo import MonteCarloSimulator
+    from risk_context import RiskContext
+
+    RiskContext.clear_cache()
+    n_assets = params['n_assets']
+    returns = synthetic_returns(params.get('n_obs', 1000), n_assets)
+    weights = np.full(n_assets, 1.0 / n_assets)
+    weights_dict = dict(zip(returns.columns, weights))
+    calculator = VaRCalculator(0.95)
+
+    if name in ('historical_var', 'parametric_var'):
+        start = time.perf_counter()
+        getattr(calculator, name)(returns, weights)
+        return time.perf_counter() - start, 1, 'portfolios/s'
+
+    if name == 'batch_var':
+        weights_matrix = np.random.default_rng(1).dirichlet(np.ones(n_assets), params['n_portfolios'])
+        start = time.perf_counter()
+        calculator.batch_var(returns, weights_matrix)
+        return time.perf_counter() - start, params['n_portfolios'], 'portfolios/s'
+
+    simulator = MonteCarloSimulator(n_simulations=params['n_simulations'],
+                                    time_horizon=params['horizon'] + 1, random_seed=42)
+    start = time.perf_counter()
+    if name == 'simulate_gbm_streaming':
+        simulator.simulate_gbm_streaming(returns, weights, 1000000)
+    else:
+        getattr(simulator, name)(returns, weights_dict, 1000000)
+    return time.perf_counter() - start, params['n_simulations'], 'paths/s'
+
+def _isolated_case(args):
+    """Exécute un cas dans un processus neuf pour mesurer son pic de mémoire résidente"""
+    name, params, repeat = args
+    timings = []
+    for _ in range(repeat):
+        elapsed, units, unit = _run_case(name, params)
+        timings.append(elapsed)
+    peak_rss = None
+    if resource is not None:
+        # ru_maxrss est en kilo-octets sous Linux et en octets sous macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return min(timings), units, unit, peak_rss
+
+def case_key(name, params):
+    """Identifiant stable d'un cas de benchmark"""
+    return name + '[' + ','.join(f'{k}={params[k]}' for k in sorted(params)) + ']'
+
+def expand_grid(grid, only=None):
+    """Produit cartésien des paramètres de chaque benchmark"""
+    for name, axes in grid.items():
+        if only and name not in only:
+            continue
+        keys = sorted(axes)
+        for values in itertools.product(*(axes[k] for k in keys)):
+            yield name, dict(zip(keys, values))
+
+def run_benchmarks(grid, repeat=3, only=None, verbose=True):
+    """Exécute toute la grille, chaque cas dans un processus dédié"""
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for name, params in expand_grid(grid, only):
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            wall_time, units, unit, peak_rss = pool.apply(_isolated_case, ((name, params, repeat),))
+        result = {
+            'key': case_key(name, params),
+            'benchmark': name,
+            'params': params,
+            'wall_time': wall_time,
+            'peak_rss_mb': peak_rss / 2 ** 20 if peak_rss is not None else None,
+            'throughput': units / wall_time if wall_time > 0 else float('inf'),
+            'unit': unit
+        }
+        results.append(result)
+        if verbose:
+            memory = f"{result['peak_rss_mb']:8.1f} Mo" if peak_rss is not None else f"{'n/d':>8} Mo"
+            print(f"{result['key']:<75} {wall_time:9.4f} s  {memory}  "
+                  f"{result['throughput']:12.1f} {unit}")
+    return results
+
+def compare_to_baseline(results, baseline, threshold=0.25, min_time=0.005):
+    """Compare les temps à la référence ; renvoie les régressions au-delà du seuil relatif"""
+    reference = {entry['key']: entry for entry in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        previous = reference.get(result['key'])
+        # Les cas trop courts sont dominés par le bruit de mesure
+        if previous is None or previous['wall_time'] < min_time:
+            continue
+        ratio = result['wall_time'] / previous['wall_time']
+        if ratio > 1 + threshold:
+            regressions.append({'key': result['key'], 'baseline': previous['wall_time'],
+                                'current': result['wall_time'], 'ratio': ratio})
+    return regressions
+
+def write_report(results, path, grid_name):
+    """Enregistre les résultats au format JSON"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    report = {
+        'metadata': {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'grid': grid_name,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des calculs de VaR et de Monte-Carlo")
+    parser.add_argument('--full', action='store_true', help="grille complète (plusieurs minutes)")
+    parser.add_argument('--only', nargs='*', help="benchmarks à exécuter")
+    parser.add_argument('--repeat', type=int, default=3, help="répétitions par cas (meilleur temps retenu)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="fichier JSON des résultats")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="fichier JSON de référence")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="dégradation relative tolérée avant échec (0.25 = +25 %%)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="enregistre les résultats comme nouvelle référence")
+    args = parser.parse_args(argv)
+
+    grid_name = 'full' if args.full else 'quick'
+    results = run_benchmarks(FULL_GRID if args.full else QUICK_GRID, args.repeat, args.only)
+    write_report(results, args.output, grid_name)
+    print(f"\nRésultats enregistrés dans : {args.output}")
+
+    if args.update_baseline:
+        write_report(results, args.baseline, grid_name)
+        print(f"Référence mise à jour : {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Aucune référence : comparaison ignorée")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"✗ Régression {regression['key']} : {regression['baseline']:.4f} s -> "
+              f"{regression['current']:.4f} s (x{regression['ratio']:.2f})")
+    if regressions:
+        return 1
+    print(f"✓ Aucune régression au-delà de {args.threshold:.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
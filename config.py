@@ -8,11 +8,35 @@ class Config:
     START_DATE = (datetime.now() - timedelta(days=5*365)).strftime('%Y-%m-%d')
     END_DATE = datetime.now().strftime('%Y-%m-%d')
     
+    # Cache local des prix de clôture
+    PRICE_CACHE_DIR = 'data/cache'
+    OFFLINE_MODE = False  # lecture du cache uniquement (hôtes sans accès réseau)
+    
+    # Téléchargement concurrent
+    DOWNLOAD_WORKERS = 8
+    DOWNLOAD_MAX_RETRIES = 3
+    DOWNLOAD_RATE_LIMIT = 5  # requêtes par seconde
+    
     # Paramètres de la VaR
     CONFIDENCE_LEVEL = 0.95
     TIME_HORIZON = 1  # 天
+    VAR_HORIZONS = [1, 5, 10, 21]  # horizons (jours) de la VaR multi-horizons, TIME_HORIZON inclus
+    STRESS_MARKET_PROXY = 'SPY'  # facteur de marché des scénarios de stress
+    VOLATILITY_MODEL = 'garch'  # 'garch' ou 'ewma' (RiskMetrics) pour la simulation historique filtrée
     MONTE_CARLO_SIMULATIONS = 10000
     MONTE_CARLO_DAYS = 252
+    MONTE_CARLO_CHUNK_SIZE = 1000  # trajectoires par bloc vectorisé
+    MONTE_CARLO_PATHS_TO_KEEP = 100  # trajectoires conservées pour les graphiques
+    MONTE_CARLO_DTYPE = 'float64'  # 'float32' divise par deux la mémoire des trajectoires
+    MONTE_CARLO_STORAGE_DIR = None  # répertoire np.memmap pour les grands tenseurs de trajectoires
+    # Générateur à queues épaisses : 'student_t', 'gaussian_copula', 't_copula',
+    # 'bootstrap', 'block_bootstrap', 'factor' (ou 'gaussian')
+    MONTE_CARLO_GENERATOR = 'student_t'
+    
+    # Estimation de la covariance (VaR paramétrique et simulations Monte-Carlo) :
+    # 'sample', 'ledoit_wolf', 'ewma' ou 'factor' (ACP)
+    COVARIANCE_METHOD = 'sample'
+    COVARIANCE_FACTORS = 5  # nombre de facteurs statistiques du modèle factoriel
     
     # Répartition des actifs
     DEFAULT_PORTFOLIO = {
@@ -24,6 +48,25 @@ class Config:
         'SPY': 0.15     # S&P 500 ETF
     }
     
+    # Graphiques
+    HEADLESS = False  # moteur Agg, aucun affichage (serveurs sans écran)
+    PLOT_DPI = 150
+    PLOT_WORKERS = 4  # rendu parallèle, en mode sans affichage uniquement
+    
+    # Budget de temps d'import des modules (secondes), vérifié par les tests
+    IMPORT_TIME_BUDGET = 1.5
+    
+    # Mode par lots (nombreux portefeuilles sur un univers commun)
+    BATCH_WORKERS = None  # None : un processus par cœur
+    BATCH_OUTPUT = 'output/batch_results.csv'
+    
+    # Service de risque résident (API HTTP locale)
+    RISK_SERVICE_HOST = '127.0.0.1'
+    RISK_SERVICE_PORT = 8765
+    RISK_SERVICE_CACHE_BYTES = 10000000  # budget du cache LRU des résultats
+    RISK_SERVICE_HORIZONS = [1, 10]  # horizons dont les scénarios sont précalculés au démarrage
+    RISK_SERVICE_MAX_HORIZON = 252  # horizon Monte-Carlo maximal accepté par le service (jours)
+    
     # Graine aléatoire
 
     RANDOM_SEED = 42
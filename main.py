@@ -3,159 +3,549 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from data_loader import DataLoader
-from var_calculator import VaRCalculator
-from monte_carlo import MonteCarloSimulator
-from visualizer import RiskVisualizer
-from report_generator import ReportGenerator
 import config
-import pandas as pd
-import numpy as np
+import argparse
+import warnings
 
-def main():
+# Étapes du pipeline ; les dépendances lourdes (matplotlib, plotly, yfinance,
+# scipy) ne sont importées que par les étapes qui les utilisent
+STAGES = ('var', 'analytics', 'stress', 'mc', 'plots', 'report')
+# Les graphiques et le rapport s'appuient sur les résultats VaR et Monte-Carlo ;
+# les tests de résistance sont exprimés en multiples de la VaR historique
+STAGE_DEPENDENCIES = {'stress': ('var',), 'plots': ('var', 'mc'), 'report': ('var', 'stress', 'mc')}
+
+def resolve_stages(stages):
+    """Complète la liste des étapes demandées avec leurs dépendances"""
+    resolved = set(stages)
+    for stage in stages:
+        resolved.update(STAGE_DEPENDENCIES.get(stage, ()))
+    return [stage for stage in STAGES if stage in resolved]
+
+def build_data_loader():
+    """Crée le chargeur de données configuré (cache local et téléchargement concurrent)"""
+    from data_loader import DataLoader
+    from bulk_downloader import BulkDownloader
+    from price_cache import YahooPriceSource, pooled_session
+    # Une seule session (connexions réutilisées) pour tous les symboles ; inutile hors ligne
+    session = None if config.Config.OFFLINE_MODE else pooled_session(config.Config.DOWNLOAD_WORKERS)
+    return DataLoader(
+        config.Config.START_DATE,
+        config.Config.END_DATE,
+        source=YahooPriceSource(session=session),
+        cache_dir=config.Config.PRICE_CACHE_DIR,
+        offline=config.Config.OFFLINE_MODE,
+        downloader=BulkDownloader(
+            max_workers=config.Config.DOWNLOAD_WORKERS,
+            max_retries=config.Config.DOWNLOAD_MAX_RETRIES,
+            rate_limit=config.Config.DOWNLOAD_RATE_LIMIT
+        )
+    )
+
+def var_horizons():
+    """Horizons de VaR configurés, horizon principal (TIME_HORIZON) compris"""
+    return sorted(set(config.Config.VAR_HORIZONS) | {config.Config.TIME_HORIZON})
+
+def build_mc_simulator():
+    """Crée le simulateur Monte-Carlo configuré"""
+    from monte_carlo import MonteCarloSimulator
+    return MonteCarloSimulator(
+        n_simulations=config.Config.MONTE_CARLO_SIMULATIONS,
+        time_horizon=config.Config.MONTE_CARLO_DAYS,
+        random_seed=config.Config.RANDOM_SEED,
+        chunk_size=config.Config.MONTE_CARLO_CHUNK_SIZE,
+        dtype=config.Config.MONTE_CARLO_DTYPE,
+        storage_dir=config.Config.MONTE_CARLO_STORAGE_DIR,
+        covariance=config.Config.COVARIANCE_METHOD,
+        n_factors=config.Config.COVARIANCE_FACTORS
+    )
+
+def main(stages=STAGES, instrumentation=None):
+    import numpy as np
+    from var_calculator import VaRCalculator
+    from risk_context import RiskContext
+    from instrumentation import Instrumentation
+    
+    stages = resolve_stages(stages)
+    # Mesures désactivées par défaut : les étapes s'exécutent sans surcoût
+    instrumentation = instrumentation or Instrumentation(enabled=False)
+    
     print("=" * 60)
     print("      Système d'analyse des risques VaR pour portefeuille multi-actifs")
     print("=" * 60)
     
     # Initialisation des composants
-    data_loader = DataLoader(config.Config.START_DATE, config.Config.END_DATE)
-    var_calculator = VaRCalculator(config.Config.CONFIDENCE_LEVEL)
-    mc_simulator = MonteCarloSimulator(
-        n_simulations=config.Config.MONTE_CARLO_SIMULATIONS,
-        time_horizon=config.Config.MONTE_CARLO_DAYS,
-        random_seed=config.Config.RANDOM_SEED
-    )
-    visualizer = RiskVisualizer()
-    report_generator = ReportGenerator()
+    data_loader = instrumentation.instrument(build_data_loader())
+    var_calculator = instrumentation.instrument(VaRCalculator(config.Config.CONFIDENCE_LEVEL))
     
     # Création des répertoires de sortie
-    os.makedirs('output/plots', exist_ok=True)
-    os.makedirs('output/reports', exist_ok=True)
+    if 'plots' in stages:
+        os.makedirs('output/plots', exist_ok=True)
+    if 'report' in stages:
+        os.makedirs('output/reports', exist_ok=True)
     
     try:
         # Étape 1 : Chargement des données
         print("\n1. Chargement des données du portefeuille...")
-        portfolio_data = data_loader.generate_sample_data(
-            symbols=list(config.Config.DEFAULT_PORTFOLIO.keys()),
-            portfolio_weights=config.Config.DEFAULT_PORTFOLIO
-        )
+        with instrumentation.stage('data'):
+            portfolio_data = data_loader.generate_sample_data(
+                symbols=list(config.Config.DEFAULT_PORTFOLIO.keys()),
+                portfolio_weights=config.Config.DEFAULT_PORTFOLIO
+            )
         
         # Étape 2 : Calcul des statistiques du portefeuille
         print("\n2. Calcul des statistiques du portefeuille...")
-        portfolio_stats = var_calculator.calculate_portfolio_stats(
-            portfolio_data['returns'],
-            np.array(list(portfolio_data['weights'].values()))
-        )
-        
-        # Étape 3 : Calcul de la Value-at-Risk (VaR)
-        print("\n3. Calcul de la Value-at-Risk (VaR)...")
+        with instrumentation.stage('stats'):
+            # Contexte de risque partagé : rendements du portefeuille, moments et
+            # covariance calculés une seule fois pour toutes les étapes
+            weights = np.array(list(portfolio_data['weights'].values()))
+            risk_context = RiskContext.from_data(portfolio_data['returns'], weights)
+            portfolio_stats = var_calculator.calculate_portfolio_stats(
+                portfolio_data['returns'],
+                weights,
+                context=risk_context
+            )
+        instrumentation.record('data', assets=portfolio_data['returns'].shape[1],
+                               observations=portfolio_data['returns'].shape[0])
         
-        # VaR historique
-        historical_var = var_calculator.historical_var(
-            portfolio_data['returns'],
-            np.array(list(portfolio_data['weights'].values())),
-            portfolio_stats['portfolio_value']
-        )
-        
-        # VaR paramétrique
-        parametric_var = var_calculator.parametric_var(
-            portfolio_data['returns'],
-            np.array(list(portfolio_data['weights'].values())),
-            portfolio_stats['portfolio_value']
-        )
+        var_results = {'confidence_level': config.Config.CONFIDENCE_LEVEL}
         
-        # Déficit attendu (Expected Shortfall)
-        expected_shortfall = var_calculator.calculate_expected_shortfall(
-            historical_var['portfolio_returns'],
-            portfolio_stats['portfolio_value']
-        )
+        if 'var' in stages:
+            with instrumentation.stage('var'):
+                run_var_stage(var_calculator, portfolio_data, weights, portfolio_stats,
+                              risk_context, var_results)
         
-        # VaR Monte-Carlo
-        print("4. Exécution de la simulation Monte-Carlo...")
-        mc_simulations = mc_simulator.simulate_gbm(
-            portfolio_data['returns'],
-            portfolio_data['weights'],
-            portfolio_stats['portfolio_value']
-        )
+        if 'analytics' in stages:
+            with instrumentation.stage('analytics'):
+                run_analytics_stage(var_calculator, portfolio_data, weights, portfolio_stats,
+                                    risk_context, var_results)
         
-        monte_carlo_var = mc_simulator.monte_carlo_var(
-            mc_simulations,
-            config.Config.CONFIDENCE_LEVEL
-        )
-        monte_carlo_var['simulations'] = mc_simulations
+        if 'stress' in stages:
+            with instrumentation.stage('stress'):
+                run_stress_stage(portfolio_data, portfolio_stats, var_results)
         
-        # Agrégation des résultats
-        var_results = {
-            'historical': historical_var,
-            'parametric': parametric_var,
-            'monte_carlo': monte_carlo_var,
-            'expected_shortfall': expected_shortfall,
-            'confidence_level': config.Config.CONFIDENCE_LEVEL
-        }
+        if 'mc' in stages:
+            with instrumentation.stage('mc'):
+                run_monte_carlo_stage(portfolio_data, weights, portfolio_stats,
+                                      risk_context, var_results, instrumentation)
         
-        # Étape 4 : Visualisation des résultats
-        print("\n5. Génération des graphiques de visualisation...")
-        visualizer.plot_returns_distribution(
-            historical_var['portfolio_returns'], 
-            var_results,
-            'output/plots/returns_distribution.png'
-        )
+        if 'plots' in stages:
+            with instrumentation.stage('plots'):
+                run_plots_stage(var_results, instrumentation)
         
-        visualizer.plot_monte_carlo_simulations(
-            monte_carlo_var,
-            'output/plots/monte_carlo.png'
-        )
+        if 'report' in stages:
+            with instrumentation.stage('report'):
+                run_report_stage(portfolio_data, var_results, portfolio_stats, instrumentation)
         
-        visualizer.plot_var_comparison(
-            var_results,
-            'output/plots/var_comparison.png'
-        )
+        print_summary(portfolio_stats, var_results, stages)
+        if instrumentation.enabled:
+            instrumentation.print_summary()
         
-        # Visualisation interactive
-        visualizer.plot_interactive_var_analysis(
-            historical_var['portfolio_returns'],
-            var_results,
-            monte_carlo_var
-        )
-        
-        # Étape 5 : Génération du rapport
-        print("\n6. Génération du rapport d'analyse...")
-        summary_report = report_generator.generate_summary_report(
-            portfolio_data, var_results, portfolio_stats
-        )
-        
-        # Sauvegarde du rapport
-        report_generator.save_detailed_report(
-            summary_report, 
-            'output/reports/risk_analysis_report.txt'
-        )
-        
-        report_generator.generate_latex_report(
-            summary_report,
-            'output/reports/risk_analysis_report.tex'
+    except Exception as e:
+        print(f"\nErreur : {e}")
+        import traceback
+        traceback.print_exc()
+
+def run_var_stage(var_calculator, portfolio_data, weights, portfolio_stats, risk_context, var_results):
+    """Étape 3 : VaR historique, paramétrique et Expected Shortfall"""
+    # Étape 3 : Calcul de la Value-at-Risk (VaR)
+    print("\n3. Calcul de la Value-at-Risk (VaR)...")
+    
+    # VaR historique
+    historical_var = var_calculator.historical_var(
+        portfolio_data['returns'],
+        weights,
+        portfolio_stats['portfolio_value'],
+        context=risk_context
+    )
+    
+    # VaR paramétrique
+    parametric_var = var_calculator.parametric_var(
+        portfolio_data['returns'],
+        weights,
+        portfolio_stats['portfolio_value'],
+        covariance=config.Config.COVARIANCE_METHOD,
+        n_factors=config.Config.COVARIANCE_FACTORS,
+        context=risk_context
+    )
+    
+    # Déficit attendu (Expected Shortfall)
+    expected_shortfall = var_calculator.calculate_expected_shortfall(
+        historical_var['portfolio_returns'],
+        portfolio_stats['portfolio_value'],
+        context=risk_context
+    )
+    
+    var_results.update({
+        'historical': historical_var,
+        'parametric': parametric_var,
+        'expected_shortfall': expected_shortfall
+    })
+
+def run_analytics_stage(var_calculator, portfolio_data, weights, portfolio_stats, risk_context, var_results):
+    """Analyses complémentaires : Cornish-Fisher, VaR filtrée, horizons multiples et décomposition par actif"""
+    from var_decomposition import VaRDecomposer
+    
+    print("\nAnalyses complémentaires de la VaR...")
+    
+    # VaR modifiée de Cornish-Fisher (asymétrie et aplatissement du portefeuille)
+    cornish_fisher_var = var_calculator.cornish_fisher_var(
+        portfolio_data['returns'],
+        weights,
+        portfolio_stats['portfolio_value'],
+        covariance=config.Config.COVARIANCE_METHOD,
+        n_factors=config.Config.COVARIANCE_FACTORS,
+        context=risk_context
+    )
+    
+    # Décomposition de la VaR par actif (paramétrique et historique)
+    decomposer = VaRDecomposer(config.Config.CONFIDENCE_LEVEL)
+    var_decomposition = {
+        'parametric': decomposer.parametric(
+            portfolio_data['returns'], weights,
+            portfolio_stats['portfolio_value'],
+            covariance=config.Config.COVARIANCE_METHOD,
+            n_factors=config.Config.COVARIANCE_FACTORS,
+            context=risk_context
+        ),
+        'historical': decomposer.historical(
+            portfolio_data['returns'], weights,
+            portfolio_stats['portfolio_value'], context=risk_context
         )
-        
-        # Affichage du résumé des résultats
-        print("\n" + "=" * 60)
-        print("           Analyse terminée - Résumé des résultats")
-        print("=" * 60)
-        
-        print(f"\nValeur du portefeuille : ${portfolio_stats['portfolio_value']:,.2f}")
-        print(f"Volatilité annualisée : {portfolio_stats['volatility'] * np.sqrt(252):.2%}")
-        print(f"Ratio de Sharpe : {portfolio_stats['sharpe_ratio']:.2f}")
-        
-        print(f"\nIndicateurs de risque (niveau de confiance {config.Config.CONFIDENCE_LEVEL*100}%) :")
+    }
+    
+    # VaR historique filtrée : réagit aux changements de régime de volatilité
+    filtered_var = var_calculator.filtered_historical_var(
+        portfolio_data['returns'], weights,
+        portfolio_stats['portfolio_value'],
+        method=config.Config.VOLATILITY_MODEL,
+        context=risk_context
+    )
+    
+    # VaR/ES historiques (fenêtres chevauchantes) et paramétriques sur plusieurs horizons
+    horizons = var_calculator.multi_horizon_var(
+        portfolio_data['returns'], weights, var_horizons(),
+        portfolio_stats['portfolio_value'], context=risk_context
+    )
+    
+    var_results.update({
+        'cornish_fisher': {'var': cornish_fisher_var['var'][0, 0],
+                           'var_value': cornish_fisher_var['var_value'][0, 0]},
+        'filtered_historical': filtered_var,
+        'decomposition': var_decomposition,
+        'horizons': horizons
+    })
+
+def run_stress_stage(portfolio_data, portfolio_stats, var_results):
+    """Tests de résistance : P&L du portefeuille sous les scénarios de la bibliothèque"""
+    from stress_testing import StressTester
+    
+    print("\nTests de résistance sur les scénarios de stress...")
+    stress_tester = StressTester(market_proxy=config.Config.STRESS_MARKET_PROXY)
+    var_results['stress'] = stress_tester.stress_table(
+        portfolio_data['returns'],
+        portfolio_data['weights'],
+        portfolio_stats['portfolio_value'],
+        prices=portfolio_data['prices'],
+        var_value=var_results['historical']['var_value']
+    )
+
+def run_monte_carlo_stage(portfolio_data, weights, portfolio_stats, risk_context, var_results,
+                          instrumentation=None):
+    """Étape 4 : VaR Monte-Carlo en mode flux"""
+    mc_simulator = build_mc_simulator()
+    if instrumentation:
+        instrumentation.instrument(mc_simulator)
+    
+    # VaR Monte-Carlo
+    print("4. Exécution de la simulation Monte-Carlo...")
+    # Mode flux : seules les valeurs finales et un échantillon de trajectoires sont conservés
+    mc_simulations = mc_simulator.simulate_gbm_streaming(
+        portfolio_data['returns'],
+        weights,
+        portfolio_stats['portfolio_value'],
+        n_paths_to_keep=config.Config.MONTE_CARLO_PATHS_TO_KEEP,
+        context=risk_context
+    )
+    
+    var_results['monte_carlo'] = mc_simulator.monte_carlo_var(
+        mc_simulations,
+        config.Config.CONFIDENCE_LEVEL
+    )
+    
+    # VaR Monte-Carlo corrélée à tous les horizons, en une seule passe de simulation
+    var_results['monte_carlo_horizons'] = mc_simulator.multi_horizon_var(
+        portfolio_data['returns'],
+        portfolio_data['weights'],
+        portfolio_stats['portfolio_value'],
+        horizons=var_horizons(),
+        confidence_level=config.Config.CONFIDENCE_LEVEL,
+        context=risk_context
+    )
+    
+    # VaR Monte-Carlo à queues épaisses (Student, copules ou rééchantillonnage historique)
+    fat_tail_simulations = mc_simulator.scenario_mc_simulation(
+        portfolio_data['returns'],
+        portfolio_data['weights'],
+        portfolio_stats['portfolio_value'],
+        generator=config.Config.MONTE_CARLO_GENERATOR,
+        context=risk_context
+    )
+    var_results['monte_carlo_fat_tails'] = mc_simulator.monte_carlo_var(
+        fat_tail_simulations,
+        config.Config.CONFIDENCE_LEVEL
+    )
+    var_results['monte_carlo_fat_tails']['generator'] = config.Config.MONTE_CARLO_GENERATOR
+
+def run_plots_stage(var_results, instrumentation=None):
+    """Étape 5 : graphiques de visualisation"""
+    from visualizer import RiskVisualizer
+    visualizer = RiskVisualizer(
+        headless=config.Config.HEADLESS,
+        dpi=config.Config.PLOT_DPI,
+        n_workers=config.Config.PLOT_WORKERS,
+        cache_dir='output/plots'
+    )
+    if instrumentation:
+        instrumentation.instrument(visualizer)
+    portfolio_returns = var_results['historical']['portfolio_returns']
+    
+    # Étape 4 : Visualisation des résultats
+    print("\n5. Génération des graphiques de visualisation...")
+    # Rendu en parallèle (mode sans affichage) ; les graphiques dont les
+    # entrées n'ont pas changé depuis la dernière exécution sont conservés
+    visualizer.render_all([
+        ('plot_returns_distribution',
+         (portfolio_returns, var_results),
+         {'save_path': 'output/plots/returns_distribution.png'}),
+        ('plot_monte_carlo_simulations',
+         (var_results['monte_carlo'],),
+         {'save_path': 'output/plots/monte_carlo.png'}),
+        ('plot_var_comparison',
+         (var_results,),
+         {'save_path': 'output/plots/var_comparison.png'})
+    ])
+    
+    # Visualisation interactive
+    visualizer.plot_interactive_var_analysis(
+        portfolio_returns,
+        var_results,
+        var_results['monte_carlo']
+    )
+
+def run_report_stage(portfolio_data, var_results, portfolio_stats, instrumentation=None):
+    """Étape 6 : rapports texte et LaTeX"""
+    from report_generator import ReportGenerator
+    report_generator = ReportGenerator()
+    if instrumentation:
+        instrumentation.instrument(report_generator)
+    
+    # Étape 5 : Génération du rapport
+    print("\n6. Génération du rapport d'analyse...")
+    summary_report = report_generator.generate_summary_report(
+        portfolio_data, var_results, portfolio_stats
+    )
+    
+    # Sauvegarde du rapport
+    report_generator.save_detailed_report(
+        summary_report, 
+        'output/reports/risk_analysis_report.txt'
+    )
+    
+    report_generator.generate_latex_report(
+        summary_report,
+        'output/reports/risk_analysis_report.tex'
+    )
+
+def print_summary(portfolio_stats, var_results, stages):
+    """Affichage du résumé des résultats"""
+    import numpy as np
+    
+    print("\n" + "=" * 60)
+    print("           Analyse terminée - Résumé des résultats")
+    print("=" * 60)
+    
+    print(f"\nValeur du portefeuille : ${portfolio_stats['portfolio_value']:,.2f}")
+    print(f"Volatilité annualisée : {portfolio_stats['volatility'] * np.sqrt(252):.2%}")
+    print(f"Ratio de Sharpe : {portfolio_stats['sharpe_ratio']:.2f}")
+    
+    print(f"\nIndicateurs de risque (niveau de confiance {config.Config.CONFIDENCE_LEVEL*100}%) :")
+    if 'var' in stages:
+        historical_var = var_results['historical']
+        parametric_var = var_results['parametric']
+        expected_shortfall = var_results['expected_shortfall']
         print(f"  VaR historique : ${historical_var['var_value']:,.2f} ({historical_var['var']:.2%})")
         print(f"  VaR paramétrique : ${parametric_var['var_value']:,.2f} ({parametric_var['var']:.2%})")
+    if 'analytics' in stages:
+        cornish_fisher_var = var_results['cornish_fisher']
+        print(f"  VaR de Cornish-Fisher : ${cornish_fisher_var['var_value']:,.2f} "
+              f"({cornish_fisher_var['var']:.2%})")
+        filtered_var = var_results['filtered_historical']
+        print(f"  VaR historique filtrée ({filtered_var['method'].upper()}) : "
+              f"${filtered_var['var_value']:,.2f} ({filtered_var['var']:.2%})")
+    if 'mc' in stages:
+        monte_carlo_var = var_results['monte_carlo']
         print(f"  VaR Monte-Carlo : ${monte_carlo_var['var_value']:,.2f} ({monte_carlo_var['var']:.2%})")
+        fat_tail_var = var_results['monte_carlo_fat_tails']
+        print(f"  VaR Monte-Carlo ({fat_tail_var['generator']}) : "
+              f"${fat_tail_var['var_value']:,.2f} ({fat_tail_var['var']:.2%})")
+    if 'var' in stages:
         print(f"  Déficit attendu : ${expected_shortfall['es_value']:,.2f} ({expected_shortfall['es']:.2%})")
+    if 'analytics' in stages:
+        print("\nVaR par horizon (jours) :")
+        horizons = var_results['horizons']
+        mc_horizons = var_results['monte_carlo_horizons']['horizons'] if 'mc' in stages else None
+        for horizon, row in horizons.iterrows():
+            line = (f"  {horizon:>3} j : historique ${row['historical_var_value']:,.2f}, "
+                    f"paramétrique ${row['parametric_var_value']:,.2f}")
+            if mc_horizons is not None:
+                line += f", Monte-Carlo ${mc_horizons.loc[horizon, 'var_value']:,.2f}"
+            print(line)
         
+        print("\nContribution à la VaR historique par actif :")
+        for asset, row in var_results['decomposition']['historical']['decomposition'].iterrows():
+            print(f"  {asset} : ${row['component_var']:,.2f} ({row['component_var_pct']:.1%})")
+    
+    if 'stress' in stages:
+        print("\nScénarios de stress les plus défavorables :")
+        for scenario, row in var_results['stress'].head(3).iterrows():
+            print(f"  {scenario} : ${row['pnl']:,.2f} ({row['return']:.2%}, "
+                  f"{row['var_multiple']:.1f}x la VaR historique)")
+    
+    if 'plots' in stages or 'report' in stages:
         print(f"\nLes rapports et graphiques ont été enregistrés dans le répertoire 'output/'")
-        
-    except Exception as e:
-        print(f"\nErreur : {e}")
-        import traceback
-        traceback.print_exc()
+
+def run_batch(portfolios_file, output_path):
+    """Évalue un ensemble de portefeuilles sur un univers commun et écrit une table consolidée"""
+    from batch_runner import PortfolioBatchRunner, load_portfolios
+    
+    print("=" * 60)
+    print("      Analyse VaR par lots de portefeuilles")
+    print("=" * 60)
+    
+    runner = PortfolioBatchRunner(
+        build_data_loader(),
+        build_mc_simulator(),
+        confidence_level=config.Config.CONFIDENCE_LEVEL,
+        n_workers=config.Config.BATCH_WORKERS
+    )
+    return runner.run(load_portfolios(portfolios_file), output_path)
+
+def run_daily_update(state_path):
+    """Mise à jour quotidienne : n'intègre que les nouvelles dates à l'état persistant des indicateurs"""
+    from var_calculator import VaRCalculator
+    from incremental import IncrementalRiskState
+    
+    data_loader = build_data_loader()
+    symbols = list(config.Config.DEFAULT_PORTFOLIO.keys())
+    if os.path.exists(state_path):
+        state = IncrementalRiskState.load(state_path)
+        new_prices = data_loader.prices_since(symbols, state.last_date)
+        print(f"Mise à jour de l'état : {len(new_prices)} nouvelle(s) date(s) après {state.last_date:%Y-%m-%d}")
+        state.update(new_prices)
+    else:
+        # Premier passage : construction de l'état sur tout l'historique
+        prices = data_loader.download_market_data(symbols)
+        if prices.empty:
+            raise ValueError("Impossible de télécharger les données de marché")
+        state = VaRCalculator(config.Config.CONFIDENCE_LEVEL).incremental_state(
+            prices, config.Config.DEFAULT_PORTFOLIO
+        )
+    state.save(state_path)
+    
+    metrics = state.metrics()
+    print(f"\nIndicateurs au {metrics['date']:%Y-%m-%d} ({metrics['observations']} rendements) :")
+    print(f"  VaR historique : ${metrics['historical']['var_value']:,.2f} ({metrics['historical']['var']:.2%})")
+    print(f"  VaR paramétrique : ${metrics['parametric']['var_value']:,.2f} ({metrics['parametric']['var']:.2%})")
+    print(f"  Déficit attendu : ${metrics['expected_shortfall']['es_value']:,.2f} "
+          f"({metrics['expected_shortfall']['es']:.2%})")
+    return metrics
+
+def run_service(port=None):
+    """Mode service : état de risque chargé une seule fois et interrogé via l'API HTTP locale"""
+    from risk_service import RiskService, make_server
+    
+    data_loader = build_data_loader()
+    prices = data_loader.download_market_data(list(config.Config.DEFAULT_PORTFOLIO.keys()))
+    if prices.empty:
+        raise ValueError("Impossible de télécharger les données de marché")
+    service = RiskService(
+        data_loader.calculate_returns(prices),
+        confidence_level=config.Config.CONFIDENCE_LEVEL,
+        n_simulations=config.Config.MONTE_CARLO_SIMULATIONS,
+        random_seed=config.Config.RANDOM_SEED,
+        cache_bytes=config.Config.RISK_SERVICE_CACHE_BYTES,
+        max_horizon=config.Config.RISK_SERVICE_MAX_HORIZON,
+        covariance=config.Config.COVARIANCE_METHOD,
+        n_factors=config.Config.COVARIANCE_FACTORS
+    ).warm(config.Config.RISK_SERVICE_HORIZONS)
+    
+    server = make_server(service, config.Config.RISK_SERVICE_HOST,
+                         port if port is not None else config.Config.RISK_SERVICE_PORT, verbose=True)
+    host, port = server.server_address[:2]
+    print(f"Service de risque à l'écoute sur http://{host}:{port} (GET /health, /stats ; POST /var, /whatif)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+def parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Analyse des risques VaR pour portefeuille multi-actifs")
+    parser.add_argument('--batch', metavar='FICHIER',
+                        help="fichier de portefeuilles (JSON ou CSV) à évaluer par lots")
+    parser.add_argument('--output', default=config.Config.BATCH_OUTPUT,
+                        help="table consolidée des résultats du mode par lots (CSV ou Parquet)")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"étapes à exécuter, séparées par des virgules parmi {', '.join(STAGES)} "
+                             "(les données et statistiques sont toujours calculées)")
+    parser.add_argument('--var-only', action='store_true',
+                        help="VaR historique, paramétrique et déficit attendu uniquement, sans analyses "
+                             "complémentaires, simulation, graphiques ni rapport")
+    parser.add_argument('--headless', action='store_true',
+                        help="graphiques sans affichage (moteur Agg), rendus en parallèle")
+    parser.add_argument('--update-state', metavar='FICHIER',
+                        help="mise à jour quotidienne incrémentale de l'état persistant (.npz) des indicateurs")
+    parser.add_argument('--serve', nargs='?', const=config.Config.RISK_SERVICE_PORT, type=int, metavar='PORT',
+                        help="lance le service de risque résident (API HTTP locale ; port 0 : port libre)")
+    parser.add_argument('--metrics', metavar='FICHIER',
+                        help="mesures par étape (temps, mémoire, tailles) au format JSON, ou Prometheus si .prom")
+    parser.add_argument('--track-memory', action='store_true',
+                        help="mesure le pic de mémoire allouée par étape (tracemalloc, plus lent)")
+    parser.add_argument('--profile', metavar='ETAPE',
+                        help="profile une seule étape (ex. mc ou MonteCarloSimulator.simulate_gbm_streaming)")
+    parser.add_argument('--profiler', choices=('cprofile', 'sampling'), default='cprofile',
+                        help="profileur utilisé avec --profile")
+    args = parser.parse_args(argv)
+    
+    args.stages = ['var'] if args.var_only else [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"étapes inconnues : {', '.join(sorted(unknown))}")
+    return args
 
 if __name__ == "__main__":
-    main()
+    # Sortie console lisible : les avertissements des bibliothèques sont masqués
+    # pour l'exécution en ligne de commande uniquement
+    warnings.filterwarnings('ignore')
+    args = parse_args()
+    if args.headless:
+        config.Config.HEADLESS = True
+    if args.batch:
+        run_batch(args.batch, args.output)
+    elif args.update_state:
+        run_daily_update(args.update_state)
+    elif args.serve is not None:
+        run_service(args.serve)
+    else:
+        instrumentation = None
+        if args.metrics or args.profile or args.track_memory:
+            from instrumentation import Instrumentation
+            instrumentation = Instrumentation(track_memory=args.track_memory,
+                                              profile_stage=args.profile, profiler=args.profiler)
+        main(args.stages, instrumentation)
+        if instrumentation and args.metrics:
+            instrumentation.export(args.metrics)
+            print(f"Mesures enregistrées dans : {args.metrics}")
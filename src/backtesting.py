@@ -0,0 +1,185 @@
+# src/backtesting.py
+import numpy as np
+import pandas as pd
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from scipy import stats
+
+class SlidingQuantile:
+    """Fenêtre glissante triée : mise à jour par recherche dichotomique, quantiles en temps constant"""
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.sorted_values = []
+
+    def push(self, value):
+        """Ajoute une observation et retire la plus ancienne si la fenêtre est pleine"""
+        self.values.append(value)
+        insort(self.sorted_values, value)
+        if len(self.values) > self.window:
+            oldest = self.values.popleft()
+            del self.sorted_values[bisect_left(self.sorted_values, oldest)]
+
+    def __len__(self):
+        return len(self.values)
+
+    def percentile(self, q):
+        """Percentile avec interpolation linéaire (même convention que np.percentile)"""
+        position = (len(self.sorted_values) - 1) * q / 100
+        lower = int(np.floor(position))
+        upper = min(lower + 1, len(self.sorted_values) - 1)
+        fraction = position - lower
+        return self.sorted_values[lower] + (self.sorted_values[upper] - self.sorted_values[lower]) * fraction
+
+    def tail_mean(self, threshold):
+        """Moyenne des observations inférieures ou égales au seuil"""
+        count = bisect_right(self.sorted_values, threshold)
+        if count == 0:
+            return threshold
+        return sum(self.sorted_values[:count]) / count
+
+class VaRBacktester:
+    def __init__(self, confidence_level=0.95, window=250, ewma_lambda=0.94):
+        self.confidence_level = confidence_level
+        self.window = window
+        self.ewma_lambda = ewma_lambda
+
+    def rolling_var(self, portfolio_returns):
+        """Séries de VaR/ES glissantes (historique, paramétrique, EWMA) prévues pour chaque jour à partir de la veille"""
+        returns = pd.Series(portfolio_returns)
+        values = returns.to_numpy(dtype=float)
+        n = len(values)
+        if n <= self.window:
+            raise ValueError("L'historique doit être plus long que la fenêtre de backtest")
+
+        alpha = 1 - self.confidence_level
+        z_score = stats.norm.ppf(self.confidence_level)
+        # Facteur de l'ES gaussien : E[Z | Z > z] = phi(z) / alpha
+        es_factor = stats.norm.pdf(z_score) / alpha
+
+        window_tracker = SlidingQuantile(self.window)
+        for value in values[:self.window]:
+            window_tracker.push(value)
+
+        # Moments glissants pour la VaR paramétrique
+        running_sum = values[:self.window].sum()
+        running_sum_sq = (values[:self.window] ** 2).sum()
+        # Variance EWMA (RiskMetrics), initialisée sur la première fenêtre
+        ewma_variance = values[:self.window].var(ddof=1)
+
+        n_forecasts = n - self.window
+        results = np.empty((n_forecasts, 6))
+        for i, t in enumerate(range(self.window, n)):
+            # VaR historique et ES sur la fenêtre [t - window, t)
+            hist_var = -window_tracker.percentile(alpha * 100)
+            hist_es = -window_tracker.tail_mean(-hist_var)
+
+            # VaR paramétrique à partir des moments glissants
+            mean = running_sum / self.window
+            variance = max((running_sum_sq - self.window * mean ** 2) / (self.window - 1), 0.0)
+            std = np.sqrt(variance)
+            param_var = -(mean - z_score * std)
+            param_es = -(mean - es_factor * std)
+
+            # VaR EWMA (moyenne supposée nulle)
+            ewma_std = np.sqrt(ewma_variance)
+            results[i] = (hist_var, hist_es, param_var, param_es,
+                          z_score * ewma_std, es_factor * ewma_std)
+
+            # Mise à jour en O(1) des moments et de la variance EWMA
+            new_value, old_value = values[t], values[t - self.window]
+            running_sum += new_value - old_value
+            running_sum_sq += new_value ** 2 - old_value ** 2
+            ewma_variance = self.ewma_lambda * ewma_variance + (1 - self.ewma_lambda) * new_value ** 2
+            window_tracker.push(new_value)
+
+            # Resynchronisation périodique pour limiter la dérive numérique
+            if (i + 1) % self.window == 0:
+                window_values = values[t - self.window + 1:t + 1]
+                running_sum = window_values.sum()
+                running_sum_sq = (window_values ** 2).sum()
+
+        series = pd.DataFrame(
+            results,
+            index=returns.index[self.window:],
+            columns=['historical_var', 'historical_es', 'parametric_var',
+                     'parametric_es', 'ewma_var', 'ewma_es']
+        )
+        series['realized_return'] = values[self.window:]
+        return series
+
+    def kupiec_test(self, exceptions):
+        """Test de Kupiec (proportion d'exceptions, POF)"""
+        exceptions = np.asarray(exceptions, dtype=bool)
+        n = len(exceptions)
+        x = int(exceptions.sum())
+        p = 1 - self.confidence_level
+
+        log_null = (n - x) * np.log(1 - p) + x * np.log(p)
+        observed = x / n
+        log_alt = ((n - x) * np.log(1 - observed) if x < n else 0.0) + \
+                  (x * np.log(observed) if x > 0 else 0.0)
+        lr_pof = -2 * (log_null - log_alt)
+
+        return {
+            'exceptions': x,
+            'expected_exceptions': p * n,
+            'lr_statistic': lr_pof,
+            'p_value': 1 - stats.chi2.cdf(lr_pof, 1)
+        }
+
+    def christoffersen_test(self, exceptions):
+        """Test d'indépendance de Christoffersen et test de couverture conditionnelle"""
+        exceptions = np.asarray(exceptions, dtype=bool)
+        previous, current = exceptions[:-1], exceptions[1:]
+        n00 = int(np.sum(~previous & ~current))
+        n01 = int(np.sum(~previous & current))
+        n10 = int(np.sum(previous & ~current))
+        n11 = int(np.sum(previous & current))
+
+        def log_likelihood(stay, move, probability):
+            # Les termes 0 * log(0) sont nuls par convention
+            result = 0.0
+            if stay:
+                result += stay * np.log(1 - probability)
+            if move:
+                result += move * np.log(probability)
+            return result
+
+        pi01 = n01 / (n00 + n01) if (n00 + n01) else 0.0
+        pi11 = n11 / (n10 + n11) if (n10 + n11) else 0.0
+        pi = (n01 + n11) / (n00 + n01 + n10 + n11)
+
+        log_null = log_likelihood(n00 + n10, n01 + n11, pi)
+        log_alt = log_likelihood(n00, n01, pi01) + log_likelihood(n10, n11, pi11)
+        lr_ind = -2 * (log_null - log_alt)
+        lr_cc = self.kupiec_test(exceptions)['lr_statistic'] + lr_ind
+
+        return {
+            'lr_independence': lr_ind,
+            'p_value_independence': 1 - stats.chi2.cdf(lr_ind, 1),
+            'lr_conditional_coverage': lr_cc,
+            'p_value_conditional_coverage': 1 - stats.chi2.cdf(lr_cc, 2),
+            'transitions': {'n00': n00, 'n01': n01, 'n10': n10, 'n11': n11}
+        }
+
+    def backtest(self, portfolio_returns):
+        """Backtest complet : séries de VaR/ES glissantes, exceptions et statistiques de test"""
+        series = self.rolling_var(portfolio_returns)
+        realized = series['realized_return'].to_numpy()
+
+        tests = {}
+        for method in ('historical', 'parametric', 'ewma'):
+            exceptions = realized < -series[f'{method}_var'].to_numpy()
+            series[f'{method}_exception'] = exceptions
+            tests[method] = {
+                'kupiec': self.kupiec_test(exceptions),
+                'christoffersen': self.christoffersen_test(exceptions)
+            }
+
+        return {
+            'series': series,
+            'tests': tests,
+            'confidence_level': self.confidence_level,
+            'window': self.window
+        }
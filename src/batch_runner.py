@@ -0,0 +1,165 @@
+# src/batch_runner.py
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from var_calculator import VaRCalculator
+from risk_context import RiskContext
+
+# État partagé des workers, initialisé une seule fois par processus
+_worker_state = {}
+
+def _init_worker(returns_matrix, scenarios, confidence_level, portfolio_value):
+    """Charge les rendements et scénarios communs dans le processus worker"""
+    _worker_state.update({
+        # Cotations manquantes à zéro : elles ne portent que sur des actifs de poids nul
+        # dans les lignes retenues pour chaque portefeuille
+        'returns_matrix': np.nan_to_num(returns_matrix),
+        'scenarios': scenarios,
+        'calculator': VaRCalculator(confidence_level),
+        'portfolio_value': portfolio_value
+    })
+
+def _evaluate_block(task):
+    """Évalue un bloc de portefeuilles sur leurs dates d'historique complet et sur les scénarios Monte-Carlo partagés"""
+    weights_block, rows = task
+    calculator = _worker_state['calculator']
+    portfolio_value = _worker_state['portfolio_value']
+    historical = calculator.batch_var(_worker_state['returns_matrix'][rows], weights_block, portfolio_value)
+    monte_carlo = calculator.batch_var(_worker_state['scenarios'], weights_block, portfolio_value)
+    return historical, monte_carlo
+
+def load_portfolios(path):
+    """Charge les portefeuilles depuis un fichier JSON {nom: {symbole: poids}} ou CSV (portfolio, symbol, weight)"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    table = pd.read_csv(path)
+    return {
+        name: dict(zip(group['symbol'], group['weight']))
+        for name, group in table.groupby('portfolio', sort=False)
+    }
+
+class PortfolioBatchRunner:
+    """Évaluation de nombreux portefeuilles sur un univers commun : données et scénarios partagés"""
+    def __init__(self, data_loader, mc_simulator, confidence_level=0.95,
+                 portfolio_value=1000000, n_workers=None, block_size=256):
+        self.data_loader = data_loader
+        self.mc_simulator = mc_simulator
+        self.confidence_level = confidence_level
+        self.portfolio_value = portfolio_value
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.block_size = block_size
+
+    def weight_matrix(self, portfolios, columns):
+        """Matrice des poids (portefeuilles x actifs) alignée sur les colonnes des rendements"""
+        position = {symbol: j for j, symbol in enumerate(columns)}
+        weights = np.zeros((len(portfolios), len(columns)))
+        missing = {}
+        for i, (name, allocation) in enumerate(portfolios.items()):
+            for symbol, weight in allocation.items():
+                if symbol in position:
+                    weights[i, position[symbol]] = weight
+                else:
+                    missing.setdefault(name, []).append(symbol)
+        return weights, missing
+
+    def simulate_asset_scenarios(self, returns):
+        """Scénarios Monte-Carlo de rendements par actif sur l'horizon, simulés une seule fois pour tous les portefeuilles"""
+        unit_weights = {symbol: 1.0 for symbol in returns.columns}
+        mc_results = self.mc_simulator.parallel_mc_simulation(
+            returns, unit_weights, 1.0, context=RiskContext.from_data(returns, unit_weights)
+        )
+        return mc_results['final_asset_values'] - 1.0
+
+    def evaluate(self, returns, portfolios):
+        """VaR/ES historiques, paramétriques et Monte-Carlo de tous les portefeuilles"""
+        weights, missing = self.weight_matrix(portfolios, list(returns.columns))
+        returns_matrix = RiskContext.from_data(returns).returns_matrix
+        scenarios = self.simulate_asset_scenarios(returns)
+        init_args = (returns_matrix, scenarios, self.confidence_level, self.portfolio_value)
+
+        # Portefeuilles regroupés par ensemble de dates où tous leurs actifs sont cotés :
+        # chaque portefeuille utilise tout son historique, et les portefeuilles d'actifs
+        # différents mais de mêmes dates (cas courant) restent évalués par blocs
+        available = ~np.isnan(returns_matrix)
+        held = weights != 0
+        # Dates complètes de chaque portefeuille : aucune cotation manquante parmi ses actifs
+        complete = (held.astype(np.int64) @ (~available).T.astype(np.int64)) == 0
+        groups = {}
+        for i, rows in enumerate(complete):
+            groups.setdefault(rows.tobytes(), []).append(i)
+        order, tasks = [], []
+        for members in groups.values():
+            rows = complete[members[0]]
+            if rows.sum() < 2:
+                names = [list(portfolios)[i] for i in members]
+                raise ValueError(f"Aucun historique commun exploitable ({int(rows.sum())} date(s)) "
+                                 f"pour les portefeuilles : {', '.join(names)}")
+            for start in range(0, len(members), self.block_size):
+                block = members[start:start + self.block_size]
+                order.extend(block)
+                tasks.append((weights[block], rows))
+
+        if self.n_workers <= 1 or len(tasks) == 1:
+            _init_worker(*init_args)
+            outcomes = list(map(_evaluate_block, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                     initargs=init_args) as executor:
+                outcomes = list(executor.map(_evaluate_block, tasks))
+
+        # Retour à l'ordre des portefeuilles du fichier
+        position = np.argsort(order)
+
+        def stack(part, key):
+            return np.concatenate([outcome[part][key] for outcome in outcomes])[position]
+
+        # Les colonnes Monte-Carlo portent leur horizon : la VaR historique et paramétrique est journalière
+        mc = f'monte_carlo_{self.mc_simulator.time_horizon - 1}d'
+        results = pd.DataFrame({
+            'historical_var': stack(0, 'var'),
+            'historical_var_value': stack(0, 'var_value'),
+            'parametric_var': stack(0, 'parametric_var'),
+            'parametric_var_value': stack(0, 'parametric_var_value'),
+            'expected_shortfall': stack(0, 'es'),
+            'expected_shortfall_value': stack(0, 'es_value'),
+            f'{mc}_var': stack(1, 'var'),
+            f'{mc}_var_value': stack(1, 'var_value'),
+            f'{mc}_es': stack(1, 'es'),
+            f'{mc}_es_value': stack(1, 'es_value'),
+            'mean_daily_return': stack(0, 'mean'),
+            'volatility': stack(0, 'volatility'),
+            'sharpe_ratio': stack(0, 'sharpe_ratio'),
+            'skewness': stack(0, 'skewness'),
+            'kurtosis': stack(0, 'kurtosis'),
+        }, index=pd.Index(list(portfolios), name='portfolio'))
+        results['observations'] = np.concatenate([np.full(len(task[0]), task[1].sum())
+                                                  for task in tasks])[position]
+        results['missing_symbols'] = [','.join(missing.get(name, [])) for name in portfolios]
+        results['confidence_level'] = self.confidence_level
+        return results
+
+    def run(self, portfolios, output_path):
+        """Charge une seule fois l'union des symboles, évalue tous les portefeuilles et écrit une table consolidée"""
+        symbols = list(dict.fromkeys(symbol for allocation in portfolios.values()
+                                     for symbol in allocation))
+        print(f"Évaluation de {len(portfolios)} portefeuilles sur {len(symbols)} actifs...")
+        prices = self.data_loader.download_market_data(symbols)
+        if prices.empty:
+            raise ValueError("Impossible de télécharger les données de marché")
+        # Seules les dates sans aucune cotation sont retirées : un titre à historique court
+        # ne tronque que les portefeuilles qui le détiennent
+        returns = self.data_loader.calculate_returns(prices, how='all')
+
+        results = self.evaluate(returns, portfolios)
+
+        if os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if output_path.endswith('.parquet'):
+            results.to_parquet(output_path)
+        else:
+            results.to_csv(output_path)
+        print(f"Résultats consolidés enregistrés dans : {output_path}")
+        return results
@@ -0,0 +1,105 @@
+# src/bulk_downloader.py
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+class RateLimiter:
+    """Limiteur de débit à seau de jetons, partagé entre threads"""
+    def __init__(self, rate_per_second, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate_per_second)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.last = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible"""
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+class BulkDownloader:
+    """Téléchargement concurrent de séries de prix avec reprises et attente exponentielle"""
+    def __init__(self, max_workers=8, max_retries=3, backoff=0.5, max_backoff=30.0,
+                 rate_limit=None, jitter=0.1, sleep=time.sleep):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.sleep = sleep
+        self.rate_limiter = RateLimiter(rate_limit, sleep=sleep) if rate_limit else None
+
+    def throttle(self):
+        """Attend un jeton du limiteur de débit avant une requête réseau"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def _fetch_with_retry(self, fetch, symbol, rate_limited=True):
+        """Appelle `fetch(symbol)` en réessayant les échecs avec une attente exponentielle"""
+        attempts = 0
+        while True:
+            attempts += 1
+            if rate_limited:
+                self.throttle()
+            try:
+                return fetch(symbol), attempts, None
+            except Exception as e:
+                if attempts > self.max_retries:
+                    return None, attempts, e
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+                self.sleep(delay * (1 + self.jitter * random.random()))
+
+    def download(self, symbols, fetch, start_date=None, end_date=None, tolerance_days=7,
+                 rate_limited=True):
+        """Télécharge tous les symboles et renvoie les séries obtenues et un rapport structuré"""
+        # Avec rate_limited=False, `fetch` appelle lui-même throttle() avant chaque requête réseau
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            outcomes = list(executor.map(
+                lambda symbol: self._fetch_with_retry(fetch, symbol, rate_limited), symbols))
+
+        tolerance = pd.Timedelta(days=tolerance_days)
+        data = {}
+        report = {
+            'succeeded': [],
+            'missing': {},
+            'partial': {},
+            'attempts': {}
+        }
+        for symbol, (prices, attempts, error) in zip(symbols, outcomes):
+            report['attempts'][symbol] = attempts
+            if error is not None:
+                report['missing'][symbol] = f"Erreur - {error}"
+                continue
+            if prices is None or prices.empty:
+                report['missing'][symbol] = "Aucune donnée"
+                continue
+
+            data[symbol] = prices
+            report['succeeded'].append(symbol)
+
+            # Couverture incomplète de la période demandée
+            index = pd.DatetimeIndex(prices.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            first, last = index.min(), index.max()
+            if ((start_date is not None and first > pd.Timestamp(start_date) + tolerance) or
+                    (end_date is not None and last < pd.Timestamp(end_date) - tolerance)):
+                report['partial'][symbol] = {
+                    'first_date': first.strftime('%Y-%m-%d'),
+                    'last_date': last.strftime('%Y-%m-%d'),
+                    'points': len(prices)
+                }
+
+        return data, report
@@ -0,0 +1,128 @@
+# src/covariance.py
+from functools import cached_property
+import numpy as np
+
+COVARIANCE_METHODS = ('sample', 'ledoit_wolf', 'ewma', 'factor')
+
+def sample_covariance(returns):
+    """Covariance empirique (ddof=1)"""
+    return np.cov(np.asarray(returns, dtype=float), rowvar=False)
+
+def ledoit_wolf_covariance(returns):
+    """Covariance de Ledoit-Wolf : rétrécissement optimal vers l'identité mise à l'échelle ; renvoie (matrice, intensité)"""
+    X = np.asarray(returns, dtype=float)
+    X = X - X.mean(axis=0)
+    n_samples, n_assets = X.shape
+    empirical = X.T @ X / n_samples
+    mu = np.trace(empirical) / n_assets
+    # Distance à la cible et variance de l'estimateur empirique (mêmes formules que sklearn)
+    delta = ((empirical - mu * np.eye(n_assets)) ** 2).sum() / n_assets
+    X2 = X ** 2
+    beta = ((X2.T @ X2) / n_samples - empirical ** 2).sum() / (n_assets * n_samples)
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+    shrunk = (1 - shrinkage) * empirical
+    shrunk[np.diag_indices(n_assets)] += shrinkage * mu
+    return shrunk, shrinkage
+
+def ewma_covariance(returns, lam=0.94):
+    """Covariance à pondération exponentielle (RiskMetrics), poids normalisés, rendements centrés"""
+    X = np.asarray(returns, dtype=float)
+    X = X - X.mean(axis=0)
+    weights = lam ** np.arange(len(X) - 1, -1, -1)
+    weights /= weights.sum()
+    return (X * weights[:, None]).T @ X
+
+def nearest_positive_definite(matrix, min_eigenvalue=1e-12):
+    """Réparation par écrêtage des valeurs propres : matrice symétrique définie positive la plus proche"""
+    symmetric = (np.asarray(matrix, dtype=float) + np.asarray(matrix, dtype=float).T) / 2
+    eigenvalues, eigenvectors = np.linalg.eigh(symmetric)
+    floor = min_eigenvalue * max(eigenvalues.max(), 1.0)
+    repaired = (eigenvectors * np.maximum(eigenvalues, floor)) @ eigenvectors.T
+    return (repaired + repaired.T) / 2
+
+class CovarianceModel:
+    """Matrice de covariance estimée et ses décompositions (Cholesky, valeurs propres), calculées une seule fois"""
+    def __init__(self, matrix=None, loadings=None, specific_variance=None, method='sample', **params):
+        if matrix is None and loadings is None:
+            raise ValueError("Une matrice de covariance ou des chargements factoriels sont requis")
+        self.method = method
+        self.params = params
+        # Modèle factoriel Σ = B B' + diag(D) : mémoire O(actifs x facteurs)
+        self.loadings = loadings
+        self.specific_variance = specific_variance
+        if matrix is not None:
+            self.__dict__['matrix'] = np.asarray(matrix, dtype=float)
+
+    @classmethod
+    def fit(cls, returns, method='sample', lam=0.94, n_factors=5):
+        """Estime la covariance des rendements (observations x actifs) par la méthode demandée"""
+        returns = np.asarray(returns, dtype=float)
+        if method == 'sample':
+            return cls(sample_covariance(returns), method=method)
+        if method == 'ledoit_wolf':
+            matrix, shrinkage = ledoit_wolf_covariance(returns)
+            return cls(matrix, method=method, shrinkage=shrinkage)
+        if method == 'ewma':
+            return cls(ewma_covariance(returns, lam), method=method, lam=lam)
+        if method == 'factor':
+            return cls.fit_factor(returns, n_factors)
+        raise ValueError(f"Estimateur de covariance inconnu : {method}")
+
+    @classmethod
+    def fit_factor(cls, returns, n_factors=5):
+        """Modèle à facteurs statistiques (ACP) par SVD des rendements centrés, sans former la matrice dense"""
+        X = np.asarray(returns, dtype=float)
+        X = X - X.mean(axis=0)
+        n_factors = min(n_factors, min(X.shape) - 1)
+        _, singular_values, components = np.linalg.svd(X, full_matrices=False)
+        loadings = components[:n_factors].T * (singular_values[:n_factors] / np.sqrt(len(X) - 1))
+        # Variance spécifique : variance totale moins la part expliquée par les facteurs
+        total_variance = X.var(axis=0, ddof=1)
+        specific_variance = np.maximum(total_variance - (loadings ** 2).sum(axis=1),
+                                       1e-6 * total_variance)
+        return cls(loadings=loadings, specific_variance=specific_variance, method='factor',
+                   n_factors=n_factors)
+
+    @property
+    def is_factor(self):
+        return self.loadings is not None
+
+    @property
+    def n_assets(self):
+        return len(self.specific_variance) if self.is_factor else len(self.matrix)
+
+    @cached_property
+    def matrix(self):
+        """Matrice de covariance dense (formée à la demande pour un modèle factoriel)"""
+        matrix = self.loadings @ self.loadings.T
+        matrix[np.diag_indices(self.n_assets)] += self.specific_variance
+        return matrix
+
+    @cached_property
+    def eigen(self):
+        """Valeurs et vecteurs propres (ordre croissant)"""
+        return np.linalg.eigh(self.matrix)
+
+    @cached_property
+    def cholesky(self):
+        """Facteur de Cholesky, après réparation définie positive si nécessaire"""
+        try:
+            return np.linalg.cholesky(self.matrix)
+        except np.linalg.LinAlgError:
+            return np.linalg.cholesky(nearest_positive_definite(self.matrix))
+
+    def portfolio_variance(self, weights):
+        """Variance w' Σ w d'un ou plusieurs portefeuilles (lignes), en O(actifs x facteurs) pour un modèle factoriel"""
+        weights = np.asarray(weights, dtype=float)
+        if self.is_factor:
+            exposures = weights @ self.loadings
+            return (exposures ** 2).sum(axis=-1) + (weights ** 2) @ self.specific_variance
+        return np.einsum('...i,ij,...j->...', weights, self.matrix, weights)
+
+    def sample(self, rng, n_samples):
+        """Chocs centrés de covariance Σ ; un modèle factoriel ne tire que facteurs et résidus spécifiques"""
+        if self.is_factor:
+            factors = rng.standard_normal((n_samples, self.loadings.shape[1]))
+            specific = rng.standard_normal((n_samples, self.n_assets))
+            return factors @ self.loadings.T + specific * np.sqrt(self.specific_variance)
+        return rng.standard_normal((n_samples, self.n_assets)) @ self.cholesky.T
@@ -1,39 +1,135 @@
-```python
 # src/data_loader.py
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
-import warnings
-warnings.filterwarnings('ignore')
+from price_cache import PriceCache, YahooPriceSource
+from bulk_downloader import BulkDownloader
 
 class DataLoader:
-    def __init__(self, start_date, end_date):
+    # Écart toléré entre la date de début demandée et la première cotation en cache
+    # (week-ends et jours fériés)
+    CACHE_START_TOLERANCE_DAYS = 7
+    # Dernières cotations en cache retéléchargées à chaque rafraîchissement : les cours
+    # ajustés sont recalculés sur tout l'historique après un dividende ou une division
+    REFRESH_OVERLAP_ROWS = 5
+    REFRESH_TOLERANCE = 1e-6
+    
+    def __init__(self, start_date, end_date, source=None, cache_dir=None, offline=False,
+                 downloader=None):
         self.start_date = start_date
         self.end_date = end_date
+        self.source = source or YahooPriceSource()
+        self.downloader = downloader or BulkDownloader()
+        self.last_download_report = None
+        self.cache = PriceCache(cache_dir) if cache_dir else None
+        self.offline = offline
+        if offline and self.cache is None:
+            raise ValueError("Le mode hors ligne nécessite un répertoire de cache")
     
     def download_market_data(self, symbols):
-        """Télécharge les données de marché depuis Yahoo Finance"""
+        """Télécharge les données de marché (depuis le cache local, puis la source pour les dates manquantes)"""
         print(f"Téléchargement des données pour {len(symbols)} actifs...")
-        data = {}
+        prices, report = self.bulk_download(symbols)
         
         for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                hist_data = ticker.history(start=self.start_date, end=self.end_date)
-                if not hist_data.empty:
-                    data[symbol] = hist_data['Close']
-                    print(f"✓ {symbol}: {len(hist_data)} points de données")
-                else:
-                    print(f"✗ {symbol}: Aucune donnée")
-            except Exception as e:
-                print(f"✗ {symbol}: Erreur - {e}")
+            if symbol in report['missing']:
+                print(f"✗ {symbol}: {report['missing'][symbol]}")
+            else:
+                print(f"✓ {symbol}: {prices[symbol].count()} points de données")
+        if report['partial']:
+            print(f"Attention : historique incomplet pour {', '.join(report['partial'])}")
+        
+        return prices
+    
+    def bulk_download(self, symbols):
+        """Téléchargement concurrent avec reprises ; renvoie les prix et un rapport des symboles manquants ou partiels"""
+        # Avec le cache, seules les requêtes réseau consomment le débit autorisé
+        data, report = self.downloader.download(
+            symbols, self._load_symbol, self.start_date, self.end_date,
+            rate_limited=self.cache is None
+        )
+        
+        if self.cache is not None and not self.offline:
+            self.cache.save_index()
+        
+        self.last_download_report = report
+        return pd.DataFrame(data), report
+    
+    def _load_symbol(self, symbol):
+        """Charge un symbole depuis le cache ou directement depuis la source"""
+        if self.cache is not None:
+            return self._load_with_cache(symbol)
+        return self.source.fetch(symbol, self.start_date, self.end_date)
+    
+    def _load_with_cache(self, symbol):
+        """Lit un symbole depuis le cache et ne télécharge que la partie manquante"""
+        start = pd.Timestamp(self.start_date)
+        end = pd.Timestamp(self.end_date)
+        cached = self.cache.load(symbol)
+        
+        # Début couvert si le cache commence près de la date demandée, ou si la source
+        # a déjà été interrogée depuis cette date (titre coté plus tard)
+        tolerance = pd.Timedelta(days=self.CACHE_START_TOLERANCE_DAYS)
+        checked_start = self.cache.checked_start(symbol)
+        covered = cached is not None and not cached.empty and (
+            cached.index[0] <= start + tolerance
+            or (checked_start is not None and pd.Timestamp(checked_start) <= start)
+        )
+        
+        if not self.offline and (not covered or self.cache.last_checked(symbol) != self.end_date):
+            if not covered:
+                # Historique absent ou trop court : téléchargement complet
+                cached = self._refetch(symbol)
+            else:
+                # Fin manquante, précédée d'un recouvrement avec les dernières cotations en cache
+                overlap = cached.iloc[-self.REFRESH_OVERLAP_ROWS:]
+                fetch_start = overlap.index[0].strftime('%Y-%m-%d')
+                if pd.Timestamp(fetch_start) < end:
+                    self.downloader.throttle()
+                    fresh = self.source.fetch(symbol, fetch_start, self.end_date)
+                    if not self._overlap_matches(overlap, fresh):
+                        # Cours ajustés recalculés par la source : historique complet retéléchargé
+                        cached = self._refetch(symbol)
+                    elif not fresh.empty:
+                        cached = self.cache.store(symbol, fresh)
+            self.cache.mark_checked(symbol, self.end_date, self.start_date)
         
-        return pd.DataFrame(data)
+        if cached is None:
+            return pd.Series(dtype=float, name=symbol)
+        # Restriction à la période demandée (fin exclue, comme la source)
+        return cached[(cached.index >= start) & (cached.index < end)]
+    
+    def _refetch(self, symbol):
+        """Retélécharge tout l'historique demandé d'un symbole et remplace sa série en cache"""
+        self.downloader.throttle()
+        fresh = self.source.fetch(symbol, self.start_date, self.end_date)
+        if fresh.empty:
+            return self.cache.load(symbol)
+        self.cache.clear(symbol)
+        return self.cache.store(symbol, fresh)
+    
+    def _overlap_matches(self, overlap, fresh):
+        """Vérifie que la source confirme les dernières cotations en cache"""
+        index = pd.DatetimeIndex(fresh.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        fresh = pd.Series(np.asarray(fresh, dtype=float), index=index.normalize())
+        common = overlap.index.intersection(fresh.index)
+        if common.empty:
+            return True
+        return np.allclose(fresh.loc[common].to_numpy(), overlap.loc[common].to_numpy(),
+                           rtol=self.REFRESH_TOLERANCE, atol=0.0)
+    
+    def prices_since(self, symbols, last_date):
+        """Prix des dates postérieures à last_date (mise à jour quotidienne, via le cache local)"""
+        prices, _ = self.bulk_download(symbols)
+        if prices.empty or last_date is None:
+            return prices
+        return prices[prices.index > pd.Timestamp(last_date)]
     
-    def calculate_returns(self, prices):
-        """Calcule les rendements quotidiens"""
-        returns = prices.pct_change().dropna()
+    def calculate_returns(self, prices, how='any'):
+        """Calcule les rendements quotidiens (how='all' conserve les dates partiellement cotées)"""
+        returns = prices.pct_change().dropna(how=how)
         return returns
     
     def generate_sample_data(self, symbols, portfolio_weights):
@@ -62,4 +158,3 @@ class DataLoader:
         """Enregistre les données au format CSV"""
         data.to_csv(filename, index=True)
         print(f"Données enregistrées dans {filename}")
-```
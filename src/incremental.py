@@ -0,0 +1,181 @@
+# src/incremental.py
+import os
+import json
+import numpy as np
+import pandas as pd
+from collections import deque
+from backtesting import SlidingQuantile
+
+class IncrementalRiskState:
+    """État persistant des indicateurs de risque, mis à jour date par date en O(actifs²)"""
+    # Nombre minimal de rendements pour les moments d'ordre 4
+    MIN_OBSERVATIONS = 4
+
+    def __init__(self, columns, weights, confidence_level=0.95, window=None):
+        self.columns = list(columns)
+        self.weights = np.asarray(list(weights.values()) if isinstance(weights, dict) else weights,
+                                  dtype=float)
+        self.confidence_level = confidence_level
+        # Fenêtre glissante (nombre de rendements) ou historique croissant si None
+        self.window = window
+        n_assets = len(self.columns)
+
+        self.last_prices = np.full(n_assets, np.nan)
+        self.last_date = None
+        # Sommes courantes : rendements, produits croisés (covariance) et puissances
+        # des rendements du portefeuille (moyenne, écart-type, asymétrie, aplatissement)
+        self.count = 0
+        self.sums = np.zeros(n_assets)
+        self.cross_products = np.zeros((n_assets, n_assets))
+        self.portfolio_power_sums = np.zeros(4)
+        self.rows = deque()
+        # Retraits depuis la dernière resynchronisation des sommes sur la fenêtre
+        self.removals = 0
+        self.sorted_window = SlidingQuantile(window or float('inf'))
+
+    @classmethod
+    def from_prices(cls, prices, weights, confidence_level=0.95, window=None):
+        """Construit l'état à partir de l'historique complet des prix (une seule fois)"""
+        state = cls(prices.columns, weights, confidence_level, window)
+        state.update(prices)
+        return state
+
+    def _add(self, row):
+        portfolio_return = row @ self.weights
+        self.count += 1
+        self.sums += row
+        self.cross_products += np.outer(row, row)
+        self.portfolio_power_sums += portfolio_return ** np.arange(1, 5)
+        self.rows.append(row)
+        self.sorted_window.push(portfolio_return)
+
+    def _remove_oldest(self):
+        row = self.rows.popleft()
+        portfolio_return = row @ self.weights
+        self.count -= 1
+        self.sums -= row
+        self.cross_products -= np.outer(row, row)
+        self.portfolio_power_sums -= portfolio_return ** np.arange(1, 5)
+        self.removals += 1
+        # Resynchronisation périodique pour limiter la dérive numérique des soustractions
+        if self.removals % self.window == 0:
+            self._resync()
+
+    def _resync(self):
+        """Recalcule les sommes courantes à partir des rendements de la fenêtre"""
+        rows = np.array(self.rows)
+        portfolio_returns = rows @ self.weights
+        self.sums = rows.sum(axis=0)
+        self.cross_products = rows.T @ rows
+        self.portfolio_power_sums = (portfolio_returns[:, None] ** np.arange(1, 5)).sum(axis=0)
+
+    def update(self, new_prices):
+        """Intègre de nouvelles dates de prix (Series pour une date, DataFrame sinon) ; None tant que l'historique est trop court"""
+        if isinstance(new_prices, pd.Series):
+            new_prices = new_prices.to_frame().T
+        new_prices = new_prices[self.columns]
+        if self.last_date is not None:
+            new_prices = new_prices[new_prices.index > self.last_date]
+
+        for date, prices in zip(new_prices.index, new_prices.to_numpy(dtype=float)):
+            # Même convention que DataLoader.calculate_returns (pct_change puis dropna)
+            row = prices / self.last_prices - 1
+            self.last_prices = prices
+            self.last_date = date
+            if np.isnan(row).any():
+                continue
+            self._add(row)
+            if self.window is not None and self.count > self.window:
+                # La fenêtre triée retire elle-même son plus ancien rendement
+                self._remove_oldest()
+        return self.metrics() if self.count >= self.MIN_OBSERVATIONS else None
+
+    @property
+    def mean_vector(self):
+        return self.sums / self.count
+
+    @property
+    def covariance(self):
+        """Covariance empirique (ddof=1) à partir des produits croisés"""
+        mean = self.mean_vector
+        return (self.cross_products - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+    def metrics(self, portfolio_value=1000000):
+        """Statistiques du portefeuille, VaR historique et paramétrique et Expected Shortfall courantes"""
+        if self.count < self.MIN_OBSERVATIONS:
+            raise ValueError("Au moins quatre rendements sont nécessaires")
+        from scipy import stats
+        n = self.count
+        s1, s2, s3, s4 = self.portfolio_power_sums
+        mean = s1 / n
+        # Moments centrés à partir des sommes de puissances
+        m2 = s2 / n - mean ** 2
+        m3 = s3 / n - 3 * mean * s2 / n + 2 * mean ** 3
+        m4 = s4 / n - 4 * mean * s3 / n + 6 * mean ** 2 * s2 / n - 3 * mean ** 4
+        # Volatilité issue de la covariance des actifs : w' Σ w
+        std = np.sqrt(self.weights @ self.covariance @ self.weights)
+        skewness = np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+        kurtosis = (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * (m4 / m2 ** 2 - 3) + 6)
+
+        q = (1 - self.confidence_level) * 100
+        historical_var = -self.sorted_window.percentile(q)
+        expected_shortfall = -self.sorted_window.tail_mean(-historical_var)
+        z_score = stats.norm.ppf(self.confidence_level)
+        parametric_var = -(mean - z_score * std)
+
+        return {
+            'date': self.last_date,
+            'observations': n,
+            'portfolio_stats': {
+                'portfolio_value': portfolio_value,
+                'mean_daily_return': mean,
+                'volatility': std,
+                'sharpe_ratio': mean / std * np.sqrt(252),
+                'skewness': skewness,
+                'kurtosis': kurtosis,
+                'min_return': self.sorted_window.sorted_values[0],
+                'max_return': self.sorted_window.sorted_values[-1]
+            },
+            'historical': {'var': historical_var, 'var_value': historical_var * portfolio_value},
+            'parametric': {'var': parametric_var, 'var_value': parametric_var * portfolio_value,
+                           'mean': mean, 'std': std},
+            'expected_shortfall': {'es': expected_shortfall,
+                                   'es_value': expected_shortfall * portfolio_value}
+        }
+
+    def save(self, path):
+        """Enregistre l'état (tableaux .npz et métadonnées JSON)"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = np.array(self.rows) if self.rows else np.empty((0, len(self.columns)))
+        meta = {
+            'columns': self.columns,
+            'confidence_level': self.confidence_level,
+            'window': self.window,
+            'last_date': None if self.last_date is None else str(pd.Timestamp(self.last_date))
+        }
+        # Écriture atomique, comme le cache de prix
+        temporary = path + '.tmp.npz'
+        np.savez(temporary, meta=np.array(json.dumps(meta)), weights=self.weights,
+                 last_prices=self.last_prices, sums=self.sums,
+                 cross_products=self.cross_products,
+                 portfolio_power_sums=self.portfolio_power_sums, rows=rows)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """Recharge un état enregistré par save()"""
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            state = cls(meta['columns'], data['weights'], meta['confidence_level'], meta['window'])
+            state.last_prices = data['last_prices']
+            state.sums = data['sums']
+            state.cross_products = data['cross_products']
+            state.portfolio_power_sums = data['portfolio_power_sums']
+            rows = data['rows']
+        state.last_date = None if meta['last_date'] is None else pd.Timestamp(meta['last_date'])
+        state.count = len(rows)
+        state.rows = deque(rows)
+        for row in rows:
+            state.sorted_window.push(row @ state.weights)
+        return state
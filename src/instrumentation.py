@@ -0,0 +1,302 @@
+# src/instrumentation.py
+import os
+import sys
+import json
+import time
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# Méthodes coûteuses instrumentées par défaut, par classe
+HOT_METHODS = {
+    'DataLoader': ('download_market_data', 'calculate_returns', 'generate_sample_data'),
+    'VaRCalculator': ('historical_var', 'parametric_var', 'delta_normal_var', 'cornish_fisher_var',
+                      'calculate_expected_shortfall', 'multi_horizon_var', 'filtered_historical_var',
+                      'incremental_state', 'calculate_portfolio_stats', 'batch_var'),
+    'MonteCarloSimulator': ('simulate_gbm', 'simulate_gbm_streaming', 'monte_carlo_var',
+                            'correlated_mc_simulation', 'correlated_mc_streaming',
+                            'parallel_mc_simulation', 'multi_horizon_var', 'volatility_scaled_mc',
+                            'scenario_mc_simulation', 'variance_reduced_var', 'adaptive_mc_var'),
+    'RiskVisualizer': ('render_all', 'plot_returns_distribution', 'plot_monte_carlo_simulations',
+                       'plot_var_comparison', 'plot_interactive_var_analysis'),
+    'ReportGenerator': ('generate_summary_report', 'save_detailed_report', 'generate_latex_report'),
+}
+
+PROFILERS = ('cprofile', 'sampling')
+
+def _array_bytes(obj, depth=0):
+    """Taille totale en octets des tableaux NumPy/pandas contenus dans un résultat"""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=False).sum())
+    if isinstance(obj, pd.Series):
+        return obj.values.nbytes
+    if depth < 2 and isinstance(obj, dict):
+        return sum(_array_bytes(value, depth + 1) for value in obj.values())
+    if depth < 2 and isinstance(obj, (list, tuple)):
+        return sum(_array_bytes(value, depth + 1) for value in obj)
+    return 0
+
+class SamplingProfiler:
+    """Profileur par échantillonnage : relève périodiquement la pile du thread observé"""
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        """Écrit les piles au format « folded » (une pile et son nombre d'échantillons par ligne)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, n=15):
+        """Fonctions les plus souvent au sommet de la pile"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(n)
+
+class Instrumentation:
+    """Mesures par étape du pipeline : temps réel et CPU, pic mémoire, tailles de tableaux et compteurs"""
+    def __init__(self, enabled=True, track_memory=False, profile_stage=None, profiler='cprofile',
+                 profile_dir='output/profile'):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Profileur inconnu : {profiler}")
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.stages = {}
+        self._order = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _entry(self, name):
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = {
+                    'calls': 0, 'wall_time': 0.0, 'cpu_time': 0.0,
+                    'peak_memory_bytes': 0, 'counters': {}
+                }
+                self._order.append(name)
+            return self.stages[name]
+
+    @contextmanager
+    def stage(self, name, **counters):
+        """Mesure un bloc de code ; les étapes imbriquées sont mesurées séparément"""
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        frame = {'peak': 0}
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            # Le pic courant appartient à l'étape englobante avant la remise à zéro
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start'] = current
+        stack.append(frame)
+
+        profiler = self._start_profiler(name)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            self._stop_profiler(name, profiler)
+            stack.pop()
+
+            peak_bytes = 0
+            if self.track_memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                peak_bytes = peak - frame['start']
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+                tracemalloc.reset_peak()
+
+            entry = self._entry(name)
+            with self._lock:
+                entry['calls'] += 1
+                entry['wall_time'] += wall_time
+                entry['cpu_time'] += cpu_time
+                entry['peak_memory_bytes'] = max(entry['peak_memory_bytes'], peak_bytes)
+                for key, value in counters.items():
+                    entry['counters'][key] = entry['counters'].get(key, 0) + value
+
+    def record(self, name, **counters):
+        """Ajoute des compteurs (tailles de tableaux, nombre de trajectoires...) à une étape"""
+        if not self.enabled:
+            return
+        entry = self._entry(name)
+        with self._lock:
+            for key, value in counters.items():
+                entry['counters'][key] = entry['counters'].get(key, 0) + value
+
+    def _start_profiler(self, name):
+        if name != self.profile_stage:
+            return None
+        if self.profiler == 'sampling':
+            profiler = SamplingProfiler()
+            profiler.start()
+            return profiler
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, name, profiler):
+        """Arrête le profileur de l'étape et enregistre son résultat"""
+        if profiler is None:
+            return
+        os.makedirs(self.profile_dir, exist_ok=True)
+        filename = name.replace('.', '_')
+        if self.profiler == 'sampling':
+            profiler.stop()
+            path = os.path.join(self.profile_dir, f'{filename}.folded')
+            profiler.dump(path)
+            print(f"\nProfil par échantillonnage de l'étape '{name}' : {path}")
+            for function, count in profiler.top():
+                print(f"  {count:6d}  {function}")
+            return
+        import pstats
+        profiler.disable()
+        path = os.path.join(self.profile_dir, f'{filename}.prof')
+        profiler.dump_stats(path)
+        print(f"\nProfil cProfile de l'étape '{name}' : {path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+    def wrap(self, function, name, counters=None):
+        """Enveloppe une fonction : chaque appel est mesuré comme une étape"""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                result = function(*args, **kwargs)
+            self.record(name, array_bytes=_array_bytes(result), **(counters(result) if counters else {}))
+            return result
+        return wrapper
+
+    def instrument(self, obj, methods=None):
+        """Instrumente les méthodes coûteuses d'une instance (sans modifier sa classe)"""
+        if not self.enabled:
+            return obj
+        class_name = type(obj).__name__
+        counters = None
+        if hasattr(obj, 'n_simulations'):
+            # Nombre de trajectoires simulées (effectif adaptatif s'il est renvoyé)
+            def counters(result):
+                n_paths = result.get('n_paths', obj.n_simulations) if isinstance(result, dict) else obj.n_simulations
+                return {'paths': n_paths}
+        for method in methods or HOT_METHODS.get(class_name, ()):
+            if hasattr(obj, method):
+                setattr(obj, method, self.wrap(getattr(obj, method), f'{class_name}.{method}', counters))
+        return obj
+
+    def summary(self):
+        """Mesures par étape, dans l'ordre de première exécution"""
+        rows = []
+        for name in self._order:
+            entry = self.stages[name]
+            counters = dict(entry['counters'])
+            rows.append({
+                'stage': name,
+                'calls': entry['calls'],
+                'wall_time': entry['wall_time'],
+                'cpu_time': entry['cpu_time'],
+                'peak_memory_bytes': entry['peak_memory_bytes'],
+                'array_bytes': counters.pop('array_bytes', 0),
+                'counters': counters
+            })
+        return rows
+
+    def max_rss_bytes(self):
+        """Pic de mémoire résidente du processus"""
+        try:
+            import resource
+        except ImportError:
+            return 0
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def to_json(self, path):
+        """Exporte les mesures au format JSON"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'max_rss_bytes': self.max_rss_bytes(), 'stages': self.summary()}, f, indent=1)
+
+    def to_prometheus(self, path, prefix='var_pipeline'):
+        """Exporte les mesures au format texte Prometheus (node_exporter textfile collector)"""
+        metrics = (
+            ('calls_total', 'counter', "Nombre d'exécutions de l'étape", 'calls'),
+            ('wall_seconds', 'gauge', "Temps réel cumulé de l'étape", 'wall_time'),
+            ('cpu_seconds', 'gauge', "Temps CPU cumulé de l'étape", 'cpu_time'),
+            ('peak_memory_bytes', 'gauge', "Pic de mémoire allouée pendant l'étape", 'peak_memory_bytes'),
+            ('array_bytes', 'gauge', "Taille cumulée des tableaux produits par l'étape", 'array_bytes'),
+        )
+        rows = self.summary()
+        lines = []
+        for suffix, kind, description, key in metrics:
+            lines.append(f"# HELP {prefix}_{suffix} {description}")
+            lines.append(f"# TYPE {prefix}_{suffix} {kind}")
+            for row in rows:
+                lines.append(f'{prefix}_{suffix}{{stage="{row["stage"]}"}} {row[key]}')
+        for row in rows:
+            for counter, value in row['counters'].items():
+                lines.append(f'{prefix}_{counter}{{stage="{row["stage"]}"}} {value}')
+        lines.append(f"# TYPE {prefix}_max_rss_bytes gauge")
+        lines.append(f"{prefix}_max_rss_bytes {self.max_rss_bytes()}")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def export(self, path):
+        """Exporte selon l'extension : .prom pour Prometheus, JSON sinon"""
+        if path.endswith('.prom'):
+            self.to_prometheus(path)
+        else:
+            self.to_json(path)
+
+    def print_summary(self):
+        """Affiche le tableau des temps par étape"""
+        print(f"\n{'Étape':<45}{'Appels':>7}{'Réel (s)':>11}{'CPU (s)':>10}{'Pic (Mo)':>10}")
+        for row in self.summary():
+            print(f"{row['stage']:<45}{row['calls']:>7}{row['wall_time']:>11.3f}"
+                  f"{row['cpu_time']:>10.3f}{row['peak_memory_bytes'] / 2 ** 20:>10.1f}")
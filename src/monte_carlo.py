@@ -1,29 +1,198 @@
 # src/monte_carlo.py
 import numpy as np
 import pandas as pd
-from scipy import stats
-import warnings
-warnings.filterwarnings('ignore')
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from risk_context import RiskContext
+import os
+import itertools
+
+def _correlated_shocks(rng, L, n_paths, n_assets, model=None):
+    """Chocs corrélés centrés : facteur de Cholesky, ou tirage des facteurs et résidus d'un modèle factoriel"""
+    if model is not None:
+        return model.sample(rng, n_paths)
+    return rng.standard_normal((n_paths, n_assets)) @ L.T
+
+def _simulate_terminal_block(mean_returns, L, initial_assets, time_horizon, n_paths, seed_sequence,
+                             dtype=np.float64, model=None):
+    """Simule un bloc de trajectoires corrélées avec son propre générateur et renvoie les valeurs finales par actif"""
+    rng = np.random.default_rng(seed_sequence)
+    asset_values = np.tile(np.asarray(initial_assets, dtype=dtype), (n_paths, 1))
+    for t in range(1, time_horizon):
+        shocks = _correlated_shocks(rng, L, n_paths, len(initial_assets), model)
+        np.multiply(asset_values, 1 + (mean_returns + shocks), out=asset_values, casting='same_kind')
+    return asset_values
+
+def _simulate_horizon_block(mean_returns, L, initial_assets, horizons, n_paths, seed_sequence,
+                            dtype=np.float64, model=None):
+    """Simule un bloc de trajectoires corrélées et relève la valeur du portefeuille à chaque horizon demandé"""
+    rng = np.random.default_rng(seed_sequence)
+    asset_values = np.tile(np.asarray(initial_assets, dtype=dtype), (n_paths, 1))
+    slots = {horizon: i for i, horizon in enumerate(horizons)}
+    portfolio_values = np.empty((n_paths, len(horizons)))
+    # Mêmes tirages que _simulate_terminal_block : la valeur au dernier horizon est
+    # identique à celle d'une simulation terminale de même longueur
+    for t in range(1, max(horizons) + 1):
+        shocks = _correlated_shocks(rng, L, n_paths, len(initial_assets), model)
+        np.multiply(asset_values, 1 + (mean_returns + shocks), out=asset_values, casting='same_kind')
+        if t in slots:
+            portfolio_values[:, slots[t]] = asset_values.sum(axis=1, dtype=np.float64)
+    return portfolio_values
+
+def _simulate_volatility_block(mean_returns, L, initial_assets, time_horizon, n_paths, seed_sequence,
+                               dtype, omega, alpha, beta, initial_variance):
+    """Simule un bloc de trajectoires dont la variance de chaque actif suit la récursion GARCH/EWMA le long du chemin"""
+    rng = np.random.default_rng(seed_sequence)
+    asset_values = np.tile(np.asarray(initial_assets, dtype=dtype), (n_paths, 1))
+    variance = np.tile(initial_variance, (n_paths, 1))
+    # L est ici le facteur de Cholesky de la matrice de corrélation
+    for t in range(1, time_horizon):
+        Z = rng.standard_normal((n_paths, len(initial_assets)))
+        shocks = np.sqrt(variance) * (Z @ L.T)
+        np.multiply(asset_values, 1 + (mean_returns + shocks), out=asset_values, casting='same_kind')
+        variance = omega + alpha * shocks ** 2 + beta * variance
+    return asset_values
+
+def _simulate_scenario_block(initial_assets, time_horizon, n_paths, seed_sequence, dtype, generator):
+    """Simule un bloc de trajectoires dont les rendements quotidiens sont tirés par un générateur de scénarios"""
+    rng = np.random.default_rng(seed_sequence)
+    asset_values = np.tile(np.asarray(initial_assets, dtype=dtype), (n_paths, 1))
+    for shocks in generator.steps(rng, n_paths, time_horizon - 1):
+        np.multiply(asset_values, 1 + shocks, out=asset_values, casting='same_kind')
+    return asset_values
+
+def _quantile_confidence_interval(values, alpha, ci_level=0.95):
+    """Quantile empirique et intervalle de confiance par statistiques d'ordre (loi binomiale)"""
+    from scipy import stats
+    n = len(values)
+    z_score = stats.norm.ppf(0.5 + ci_level / 2)
+    half_width = z_score * np.sqrt(n * alpha * (1 - alpha))
+    lower = int(np.clip(np.floor(n * alpha - half_width), 0, n - 1))
+    upper = int(np.clip(np.ceil(n * alpha + half_width), 0, n - 1))
+    partitioned = np.partition(values, [lower, upper])
+    return np.percentile(values, alpha * 100), partitioned[lower], partitioned[upper]
+
+class _PathReservoir:
+    """Conserve un échantillon sous-échantillonné de trajectoires, la trajectoire moyenne et les quantiles par date"""
+    QUANTILE_LEVELS = (5, 25, 50, 75, 95)
+    # Nombre maximal de dates où les quantiles sont calculés sur toutes les trajectoires
+    QUANTILE_POINTS = 64
+    
+    def __init__(self, time_horizon, n_paths, n_simulations, stride=1):
+        times = np.arange(0, time_horizon, max(1, int(stride)))
+        if times[-1] != time_horizon - 1:
+            times = np.append(times, time_horizon - 1)
+        self.times = times
+        self._slots = {t: i for i, t in enumerate(times)}
+        self.paths = np.zeros((len(times), min(n_paths, n_simulations)))
+        self.mean_path = np.zeros(len(times))
+        # Quantiles sur une grille éclaircie des dates conservées : un tri partiel de toutes
+        # les trajectoires à chaque pas dominerait le coût de la simulation
+        band_stride = -(-len(times) // self.QUANTILE_POINTS)
+        quantile_times = times[::band_stride]
+        if quantile_times[-1] != times[-1]:
+            quantile_times = np.append(quantile_times, times[-1])
+        self.quantile_times = quantile_times
+        self._quantile_slots = {t: i for i, t in enumerate(quantile_times)}
+        self.quantile_paths = np.zeros((len(quantile_times), len(self.QUANTILE_LEVELS)))
+    
+    def record(self, t, values):
+        """Enregistre l'état courant des trajectoires si le pas de temps est conservé"""
+        slot = self._slots.get(t)
+        if slot is not None:
+            self.paths[slot] = values[:self.paths.shape[1]]
+            self.mean_path[slot] = values.mean(dtype=np.float64)
+        slot = self._quantile_slots.get(t)
+        if slot is not None:
+            self.quantile_paths[slot] = np.percentile(values, self.QUANTILE_LEVELS)
+    
+    def result(self, final_values, initial_value):
+        """Assemble le résultat de la simulation en flux"""
+        return {
+            'initial_value': initial_value,
+            'final_values': final_values,
+            'sample_paths': self.paths,
+            'mean_path': self.mean_path,
+            'path_times': self.times,
+            'quantile_paths': pd.DataFrame(self.quantile_paths, index=self.quantile_times,
+                                           columns=list(self.QUANTILE_LEVELS))
+        }
 
 class MonteCarloSimulator:
-    def __init__(self, n_simulations=10000, time_horizon=252, random_seed=42):
+    # Compteur des fichiers de stockage créés par ce processus
+    _storage_counter = itertools.count()
+    
+    def __init__(self, n_simulations=10000, time_horizon=252, random_seed=42, chunk_size=1000,
+                 n_workers=None, backend='process', dtype=np.float64, storage_dir=None,
+                 covariance='sample', n_factors=5):
         self.n_simulations = n_simulations
         self.time_horizon = time_horizon
         self.random_seed = random_seed
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.backend = backend
+        # Précision de stockage des trajectoires (float32 divise la mémoire par deux) ;
+        # les quantiles et P&L sont toujours calculés en float64
+        self.dtype = np.dtype(dtype)
+        # Répertoire des fichiers np.memmap adossant les grands tenseurs de trajectoires
+        self.storage_dir = storage_dir
+        self.storage_files = []
+        # Estimateur de covariance des simulations corrélées (voir covariance.COVARIANCE_METHODS)
+        self.covariance = covariance
+        self.n_factors = n_factors
         np.random.seed(random_seed)
     
-    def simulate_gbm(self, returns, weights, initial_portfolio_value=1000000):
+    def _shock_model(self, context, dense=False):
+        """Facteur de Cholesky de la covariance retenue, ou modèle factoriel à échantillonner directement"""
+        if self.covariance == 'sample':
+            # L'estimateur empirique reprend le facteur de Cholesky déjà mémorisé
+            return context.cholesky, None
+        model = context.covariance_model(self.covariance, n_factors=self.n_factors)
+        if model.is_factor and not dense:
+            # Tirage en O(actifs x facteurs) par trajectoire, sans matrice dense ni Cholesky
+            return None, model
+        return model.cholesky, None
+    
+    def _portfolio_volatility(self, context):
+        """Volatilité quotidienne du portefeuille sous l'estimateur de covariance retenu"""
+        if self.covariance == 'sample':
+            return context.portfolio_std
+        return float(np.sqrt(context.covariance_model(self.covariance, n_factors=self.n_factors)
+                             .portfolio_variance(context.weights)))
+    
+    def _allocate(self, shape, name):
+        """Alloue un tableau de trajectoires, en mémoire ou projeté sur un fichier si storage_dir est défini"""
+        if self.storage_dir is None:
+            return np.empty(shape, dtype=self.dtype)
+        os.makedirs(self.storage_dir, exist_ok=True)
+        path = os.path.join(self.storage_dir,
+                            f'mc_{os.getpid()}_{next(self._storage_counter)}_{name}.dat')
+        self.storage_files.append(path)
+        return np.memmap(path, dtype=self.dtype, mode='w+', shape=shape)
+    
+    def cleanup_storage(self):
+        """Supprime les fichiers de stockage des trajectoires (à appeler une fois les résultats libérés)"""
+        remaining = []
+        for path in self.storage_files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                # Fichier encore projeté en mémoire (Windows)
+                remaining.append(path)
+        self.storage_files = remaining
+    
+    def simulate_gbm(self, returns, weights, initial_portfolio_value=1000000, context=None):
         """Simulation Monte-Carlo utilisant le mouvement brownien géométrique"""
-        # Calcul du rendement du portefeuille
-        portfolio_returns = (returns * weights).sum(axis=1)
+        context = context or RiskContext.from_data(returns, weights)
         
         # Calcul des paramètres
-        mean_return = portfolio_returns.mean()
-        std_return = portfolio_returns.std()
+        mean_return = context.portfolio_mean
+        std_return = self._portfolio_volatility(context)
         dt = 1  # quotidien
         
         # Génération des trajectoires aléatoires
-        simulations = np.zeros((self.time_horizon, self.n_simulations))
+        simulations = self._allocate((self.time_horizon, self.n_simulations), 'gbm')
         simulations[0] = initial_portfolio_value
         
         for t in range(1, self.time_horizon):
@@ -31,18 +200,54 @@ class MonteCarloSimulator:
             shocks = np.random.normal(mean_return * dt, 
                                     std_return * np.sqrt(dt), 
                                     self.n_simulations)
-            simulations[t] = simulations[t-1] * (1 + shocks)
+            np.multiply(simulations[t-1], 1 + shocks, out=simulations[t], casting='same_kind')
         
         return simulations
     
+    def simulate_gbm_streaming(self, returns, weights, initial_portfolio_value=1000000,
+                               n_paths_to_keep=100, path_stride=1, context=None):
+        """Simulation GBM en flux : seul l'état courant de chaque trajectoire est conservé"""
+        context = context or RiskContext.from_data(returns, weights)
+        
+        mean_return = context.portfolio_mean
+        std_return = self._portfolio_volatility(context)
+        dt = 1  # quotidien
+        
+        # Même séquence de tirages que simulate_gbm : valeurs finales identiques
+        values = np.full(self.n_simulations, float(initial_portfolio_value), dtype=self.dtype)
+        reservoir = _PathReservoir(self.time_horizon, n_paths_to_keep,
+                                   self.n_simulations, path_stride)
+        reservoir.record(0, values)
+        
+        for t in range(1, self.time_horizon):
+            shocks = np.random.normal(mean_return * dt, 
+                                    std_return * np.sqrt(dt), 
+                                    self.n_simulations)
+            np.multiply(values, 1 + shocks, out=values, casting='same_kind')
+            reservoir.record(t, values)
+        
+        return reservoir.result(values, float(initial_portfolio_value))
+    
     def monte_carlo_var(self, simulations, confidence_level=0.95):
         """Calcul de la VaR basée sur la simulation Monte-Carlo"""
-        # Calcul de la distribution des valeurs finales
-        final_values = simulations[-1, :]
+        mean_path = None
+        path_times = None
+        quantile_paths = None
+        if isinstance(simulations, dict):
+            # Résultat d'une simulation en flux : seules les valeurs finales existent
+            final_values = simulations['final_values']
+            initial_value = simulations['initial_value']
+            mean_path = simulations.get('mean_path')
+            path_times = simulations.get('path_times')
+            quantile_paths = simulations.get('quantile_paths')
+            simulations = simulations.get('sample_paths')
+        else:
+            # Calcul de la distribution des valeurs finales (vue, sans copie)
+            final_values = simulations[-1, :]
+            initial_value = float(simulations[0, 0])
         
-        # Calcul des profits/pertes (P&L)
-        initial_value = simulations[0, 0]
-        pnl = final_values - initial_value
+        # Calcul des profits/pertes (P&L), accumulé en float64 quel que soit le stockage
+        pnl = np.subtract(final_values, initial_value, dtype=np.float64)
         
         # Calcul de la VaR
         var_mc = -np.percentile(pnl, (1 - confidence_level) * 100)
@@ -53,46 +258,294 @@ class MonteCarloSimulator:
             'var_value': var_mc,
             'final_values': final_values,
             'pnl_distribution': pnl,
-            'simulations': simulations
+            'simulations': simulations,
+            'mean_path': mean_path,
+            'path_times': path_times,
+            'quantile_paths': quantile_paths,
+            'confidence_level': confidence_level
         }
     
-    def correlated_mc_simulation(self, returns, weights, initial_portfolio_value=1000000):
+    def correlated_mc_simulation(self, returns, weights, initial_portfolio_value=1000000, context=None):
         """Simulation Monte-Carlo prenant en compte la corrélation des actifs"""
-        # Calcul de la matrice de covariance
-        cov_matrix = returns.cov()
-        
-        # Décomposition de Cholesky
-        try:
-            L = np.linalg.cholesky(cov_matrix)
-        except np.linalg.LinAlgError:
-            # Si la matrice n'est pas définie positive, utiliser la matrice définie positive la plus proche
-            from sklearn.covariance import ledoit_wolf
-            cov_matrix = ledoit_wolf(returns)[0]
-            L = np.linalg.cholesky(cov_matrix)
+        context = context or RiskContext.from_data(returns, weights)
+        # Tirage du tenseur complet des chocs : un modèle factoriel est densifié
+        L, _ = self._shock_model(context, dense=True)
         
         n_assets = len(weights)
         dt = 1
+        chunk_size = max(1, int(self.chunk_size or self.n_simulations))
+        
+        mean_returns = context.mean_vector * dt
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
         
-        # Génération des nombres aléatoires corrélés
-        simulations = np.zeros((self.time_horizon, self.n_simulations, n_assets))
-        portfolio_values = np.zeros((self.time_horizon, self.n_simulations))
+        simulations = self._allocate((self.time_horizon, self.n_simulations, n_assets), 'assets')
+        portfolio_values = self._allocate((self.time_horizon, self.n_simulations), 'portfolio')
         
-        for i in range(self.n_simulations):
-            # Génération des nombres aléatoires indépendants
-            Z = np.random.normal(0, 1, (self.time_horizon, n_assets))
+        # Traitement par blocs de trajectoires pour borner la mémoire temporaire
+        for start in range(0, self.n_simulations, chunk_size):
+            stop = min(start + chunk_size, self.n_simulations)
+            
+            # Génération des nombres aléatoires indépendants (trajectoires, jours, actifs) :
+            # même ordre de tirage que trajectoire par trajectoire, donc résultats
+            # identiques à graine égale quelle que soit la taille des blocs
+            Z = np.random.normal(0, 1, (stop - start, self.time_horizon, n_assets))
             # Conversion en nombres aléatoires corrélés
             correlated_Z = Z @ L.T
             
-            # Simulation des trajectoires de prix pour chaque actif
-            asset_paths = np.zeros((self.time_horizon, n_assets))
-            asset_paths[0] = initial_portfolio_value * np.array(list(weights.values()))
+            # Facteurs de croissance, précédés de la valeur initiale de chaque actif
+            growth = np.empty_like(correlated_Z, dtype=self.dtype)
+            growth[:, 0, :] = initial_assets
+            growth[:, 1:, :] = 1 + (mean_returns + correlated_Z[:, 1:, :] * np.sqrt(dt))
             
-            for t in range(1, self.time_horizon):
-                returns_t = (returns.mean().values * dt + 
-                           correlated_Z[t] * np.sqrt(dt))
-                asset_paths[t] = asset_paths[t-1] * (1 + returns_t)
+            # Capitalisation par produit cumulé le long de l'axe temporel
+            asset_paths = np.cumprod(growth, axis=1)
             
-            simulations[:, i, :] = asset_paths
-            portfolio_values[:, i] = asset_paths.sum(axis=1)
+            simulations[:, start:stop, :] = asset_paths.transpose(1, 0, 2)
+            portfolio_values[:, start:stop] = asset_paths.sum(axis=2).T
         
         return portfolio_values, simulations
+    
+    def correlated_mc_streaming(self, returns, weights, initial_portfolio_value=1000000,
+                                n_paths_to_keep=100, path_stride=1, context=None):
+        """Simulation corrélée en flux : mémoire en O(simulations x actifs) au lieu de O(jours x simulations x actifs)"""
+        context = context or RiskContext.from_data(returns, weights)
+        L, model = self._shock_model(context)
+        
+        dt = 1
+        mean_returns = context.mean_vector * dt
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        
+        # État courant de chaque actif pour chaque trajectoire
+        asset_values = np.tile(initial_assets.astype(self.dtype), (self.n_simulations, 1))
+        reservoir = _PathReservoir(self.time_horizon, n_paths_to_keep,
+                                   self.n_simulations, path_stride)
+        reservoir.record(0, asset_values.sum(axis=1, dtype=np.float64))
+        
+        # Tirages pas de temps par pas de temps : résultats statistiquement
+        # équivalents, mais pas identiques, à correlated_mc_simulation
+        for t in range(1, self.time_horizon):
+            if model is not None:
+                shocks = model.sample(np.random, self.n_simulations)
+            else:
+                Z = np.random.normal(0, 1, (self.n_simulations, len(initial_assets)))
+                shocks = Z @ L.T
+            np.multiply(asset_values, 1 + (mean_returns + shocks * np.sqrt(dt)),
+                        out=asset_values, casting='same_kind')
+            reservoir.record(t, asset_values.sum(axis=1, dtype=np.float64))
+        
+        result = reservoir.result(asset_values.sum(axis=1, dtype=np.float64), float(initial_assets.sum()))
+        result['final_asset_values'] = asset_values
+        result['initial_asset_values'] = initial_assets
+        return result
+    
+    def _map_blocks(self, block_function, leading_args, n_workers=None, backend=None, extra_args=()):
+        """Répartit les blocs de trajectoires sur un pool de processus ou de threads
+
+        block_function(*leading_args, n_paths, seed_sequence, dtype, *extra_args) simule un bloc.
+        """
+        n_workers = n_workers or self.n_workers
+        backend = backend or self.backend
+        
+        # Découpage en blocs de taille fixe, chacun doté d'un flux aléatoire
+        # indépendant issu de SeedSequence : le résultat ne dépend que de la
+        # graine et de la taille des blocs, pas du nombre de workers
+        block_size = max(1, int(self.chunk_size or self.n_simulations))
+        block_sizes = [min(block_size, self.n_simulations - start)
+                       for start in range(0, self.n_simulations, block_size)]
+        seed_sequences = np.random.SeedSequence(self.random_seed).spawn(len(block_sizes))
+        
+        args = (*([value] * len(block_sizes) for value in leading_args),
+                block_sizes, seed_sequences, [self.dtype] * len(block_sizes),
+                *([value] * len(block_sizes) for value in extra_args))
+        
+        if n_workers <= 1 or len(block_sizes) == 1:
+            return list(map(block_function, *args))
+        executor_class = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+        with executor_class(max_workers=n_workers) as executor:
+            return list(executor.map(block_function, *args))
+    
+    def parallel_mc_simulation(self, returns, weights, initial_portfolio_value=1000000,
+                               n_workers=None, backend=None, context=None):
+        """Simulation corrélée répartie sur un pool de processus ou de threads, reproductible quel que soit le nombre de workers"""
+        context = context or RiskContext.from_data(returns, weights)
+        L, model = self._shock_model(context)
+        
+        mean_returns = context.mean_vector
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        
+        blocks = self._map_blocks(_simulate_terminal_block,
+                                  (mean_returns, L, initial_assets, self.time_horizon),
+                                  n_workers, backend, extra_args=(model,))
+        
+        # Fusion des blocs dans l'ordre de leur création
+        final_asset_values = np.concatenate(blocks, axis=0)
+        
+        return {
+            'initial_value': float(initial_assets.sum()),
+            'final_values': final_asset_values.sum(axis=1, dtype=np.float64),
+            'final_asset_values': final_asset_values,
+            'initial_asset_values': initial_assets
+        }
+    
+    def multi_horizon_var(self, returns, weights, initial_portfolio_value=1000000,
+                          horizons=(1, 5, 10, 21, 252), confidence_level=0.95, n_workers=None,
+                          backend=None, context=None):
+        """VaR et ES Monte-Carlo à plusieurs horizons (en jours), lues sur une seule passe de simulation"""
+        context = context or RiskContext.from_data(returns, weights)
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        initial_value = float(initial_assets.sum())
+        horizons = sorted({int(horizon) for horizon in horizons})
+        # Un horizon hors de [1, time_horizon] ne serait jamais relevé pendant la simulation
+        if not horizons or horizons[0] < 1 or horizons[-1] > self.time_horizon:
+            raise ValueError(f"Horizons invalides : {horizons} (attendus entre 1 et {self.time_horizon} jours)")
+        
+        L, model = self._shock_model(context)
+        blocks = self._map_blocks(_simulate_horizon_block,
+                                  (context.mean_vector, L, initial_assets, horizons),
+                                  n_workers, backend, extra_args=(model,))
+        pnl = np.concatenate(blocks, axis=0) - initial_value
+        
+        # Quantiles et moyennes de queue de toutes les colonnes (horizons) à la fois
+        alpha = 1 - confidence_level
+        quantiles = np.percentile(pnl, alpha * 100, axis=0)
+        tail = pnl <= quantiles
+        tail_means = np.where(tail, pnl, 0.0).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+        
+        table = pd.DataFrame({
+            'var_value': -quantiles,
+            'var': -quantiles / initial_value,
+            'es_value': -tail_means,
+            'es': -tail_means / initial_value
+        }, index=pd.Index(horizons, name='horizon'))
+        return {
+            'initial_value': initial_value,
+            'horizons': table,
+            'pnl_distribution': pnl,
+            'confidence_level': confidence_level
+        }
+    
+    def volatility_scaled_mc(self, returns, weights, initial_portfolio_value=1000000, method='garch',
+                             engine=None, n_workers=None, backend=None, context=None):
+        """Simulation corrélée à volatilité conditionnelle : départ à la volatilité prévue, récursion GARCH/EWMA par trajectoire, corrélation DCC"""
+        context = context or RiskContext.from_data(returns, weights)
+        engine = engine or context.volatility(method)
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        
+        correlation_cholesky = np.linalg.cholesky(engine.dcc.correlation)
+        blocks = self._map_blocks(
+            _simulate_volatility_block,
+            (engine.mean, correlation_cholesky, initial_assets, self.time_horizon), n_workers, backend,
+            extra_args=(engine.omega, engine.alpha, engine.beta, engine.forecast_variance)
+        )
+        final_asset_values = np.concatenate(blocks, axis=0)
+        
+        return {
+            'initial_value': float(initial_assets.sum()),
+            'final_values': final_asset_values.sum(axis=1, dtype=np.float64),
+            'final_asset_values': final_asset_values,
+            'initial_asset_values': initial_assets,
+            'forecast_volatility': engine.forecast_volatility
+        }
+    
+    def scenario_mc_simulation(self, returns, weights, initial_portfolio_value=1000000,
+                               generator='student_t', n_workers=None, backend=None, context=None,
+                               **generator_options):
+        """Simulation à queues épaisses : Student multivariée, copules sur marginales empiriques ou rééchantillonnage historique"""
+        from scenario_generators import build_generator
+        context = context or RiskContext.from_data(returns, weights)
+        if isinstance(generator, str):
+            # Covariance des générateurs gaussien, Student et factoriel : celle du simulateur par défaut
+            generator_options.setdefault('covariance', self.covariance)
+            generator_options.setdefault('n_factors', self.n_factors)
+            generator = build_generator(generator, context, **generator_options)
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        
+        # Même découpage en blocs et mêmes flux SeedSequence que parallel_mc_simulation
+        blocks = self._map_blocks(_simulate_scenario_block, (initial_assets, self.time_horizon),
+                                  n_workers, backend, extra_args=(generator,))
+        final_asset_values = np.concatenate(blocks, axis=0)
+        
+        return {
+            'initial_value': float(initial_assets.sum()),
+            'final_values': final_asset_values.sum(axis=1, dtype=np.float64),
+            'final_asset_values': final_asset_values,
+            'initial_asset_values': initial_assets,
+            'generator': type(generator).__name__
+        }
+    
+    def variance_reduced_var(self, returns, weights, initial_portfolio_value=1000000,
+                             confidence_level=0.95, method='antithetic', n_replications=10,
+                             context=None):
+        """VaR Monte-Carlo avec réduction de variance (antithétique, Sobol, préférentiel, contrôle) et erreur standard"""
+        from variance_reduction import VarianceReducedSampler
+        context = context or RiskContext.from_data(returns, weights)
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        # L'échantillonneur requiert un facteur de Cholesky dense (exposition linéaire, Sobol)
+        L, _ = self._shock_model(context, dense=True)
+        
+        sampler = VarianceReducedSampler(
+            context.mean_vector, L, initial_assets,
+            self.time_horizon - 1, self.chunk_size
+        )
+        return sampler.estimate_var(
+            method, np.random.SeedSequence(self.random_seed), self.n_simulations,
+            confidence_level, n_replications
+        )
+    
+    def adaptive_mc_var(self, returns, weights, initial_portfolio_value=1000000,
+                        confidence_level=0.95, rel_tolerance=0.01, max_paths=None,
+                        min_paths=None, ci_level=0.95, context=None):
+        """VaR Monte-Carlo adaptative : simulation par lots jusqu'à la précision relative demandée ou épuisement du budget"""
+        context = context or RiskContext.from_data(returns, weights)
+        L, model = self._shock_model(context)
+        mean_returns = context.mean_vector
+        initial_assets = initial_portfolio_value * np.array(list(weights.values()))
+        initial_value = float(initial_assets.sum())
+        
+        batch_size = max(1, int(self.chunk_size or self.n_simulations))
+        max_paths = max_paths or self.n_simulations
+        min_paths = min_paths or min(max_paths, 2 * batch_size)
+        alpha = 1 - confidence_level
+        
+        # Un flux SeedSequence par lot : résultats reproductibles et identiques
+        # aux premiers lots de parallel_mc_simulation pour une même graine
+        seed_sequence = np.random.SeedSequence(self.random_seed)
+        final_blocks = []
+        trace = []
+        n_paths = 0
+        converged = False
+        
+        while n_paths < max_paths:
+            size = min(batch_size, max_paths - n_paths)
+            block = _simulate_terminal_block(mean_returns, L, initial_assets,
+                                             self.time_horizon, size, seed_sequence.spawn(1)[0],
+                                             self.dtype, model)
+            final_blocks.append(block.sum(axis=1, dtype=np.float64))
+            n_paths += size
+            
+            pnl = np.concatenate(final_blocks) - initial_value
+            quantile, ci_low, ci_high = _quantile_confidence_interval(pnl, alpha, ci_level)
+            var_value = -quantile
+            relative_half_width = (ci_high - ci_low) / 2 / abs(var_value) if var_value else np.inf
+            trace.append({
+                'n_paths': n_paths,
+                'var_value': var_value,
+                'ci_low': -ci_high,
+                'ci_high': -ci_low,
+                'relative_half_width': relative_half_width
+            })
+            
+            if n_paths >= min_paths and relative_half_width <= rel_tolerance:
+                converged = True
+                break
+        
+        result = self.monte_carlo_var({'initial_value': initial_value,
+                                       'final_values': np.concatenate(final_blocks)},
+                                      confidence_level)
+        result.update({
+            'n_paths': n_paths,
+            'converged': converged,
+            'confidence_interval': (trace[-1]['ci_low'], trace[-1]['ci_high']),
+            'convergence_trace': pd.DataFrame(trace)
+        })
+        return result
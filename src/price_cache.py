@@ -0,0 +1,127 @@
+# src/price_cache.py
+import os
+import json
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+
+class PriceSource(ABC):
+    """Interface d'une source de prix de clôture"""
+    @abstractmethod
+    def fetch(self, symbol, start_date, end_date):
+        """Renvoie la série des prix de clôture de `symbol` entre deux dates (fin exclue)"""
+
+class YahooPriceSource(PriceSource):
+    """Source de prix Yahoo Finance"""
+    def __init__(self, session=None):
+        self.session = session
+
+    def fetch(self, symbol, start_date, end_date):
+        """Télécharge les prix de clôture depuis Yahoo Finance"""
+        import yfinance as yf
+        ticker = yf.Ticker(symbol, session=self.session) if self.session else yf.Ticker(symbol)
+        hist_data = ticker.history(start=start_date, end=end_date)
+        if hist_data.empty:
+            return pd.Series(dtype=float, name=symbol)
+        return hist_data['Close']
+
+def pooled_session(pool_size):
+    """Session HTTP dont le pool de connexions couvre tous les téléchargements concurrents"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+class PriceCache:
+    """Cache local des prix de clôture : un fichier NumPy mémoire-mappé par symbole, indexé par date"""
+    RECORD_DTYPE = np.dtype([('date', 'M8[D]'), ('close', 'f8')])
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._read_index()
+
+    def _path(self, symbol):
+        """Chemin du fichier de cache d'un symbole"""
+        safe_symbol = symbol.replace(os.sep, '_').replace('/', '_')
+        return os.path.join(self.cache_dir, f"{safe_symbol}.npy")
+
+    def _read_index(self):
+        """Lit la date de dernière vérification de chaque symbole"""
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {}
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_index(self):
+        """Enregistre l'index des dernières vérifications"""
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, index_path)
+
+    def load(self, symbol):
+        """Charge la série en cache d'un symbole (mémoire-mappée), ou None si absente"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        records = np.load(path, mmap_mode='r')
+        return pd.Series(np.asarray(records['close']),
+                         index=pd.DatetimeIndex(np.asarray(records['date']), name='Date'),
+                         name=symbol)
+
+    def store(self, symbol, prices):
+        """Fusionne de nouveaux prix avec le cache existant et réécrit le fichier"""
+        prices = prices.dropna()
+        index = pd.DatetimeIndex(prices.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        prices = pd.Series(prices.values, index=index.normalize())
+
+        cached = self.load(symbol)
+        if cached is not None:
+            prices = pd.concat([cached, prices])
+        # En cas de doublon, la valeur la plus récente l'emporte
+        prices = prices[~prices.index.duplicated(keep='last')].sort_index()
+
+        records = np.empty(len(prices), dtype=self.RECORD_DTYPE)
+        records['date'] = prices.index.values.astype('M8[D]')
+        records['close'] = prices.values
+
+        # Écriture atomique pour ne jamais laisser un fichier partiel
+        path = self._path(symbol)
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, records)
+        os.replace(tmp_path, path)
+        return self.load(symbol)
+
+    def last_checked(self, symbol):
+        """Date de la dernière interrogation de la source pour ce symbole"""
+        entry = self._index.get(symbol)
+        # Ancien format de l'index : date de fin seule
+        return entry.get('end') if isinstance(entry, dict) else entry
+
+    def checked_start(self, symbol):
+        """Date de début la plus ancienne demandée à la source pour ce symbole, ou None"""
+        entry = self._index.get(symbol)
+        return entry.get('start') if isinstance(entry, dict) else None
+
+    def mark_checked(self, symbol, date, start=None):
+        """Note que la source a été interrogée jusqu'à `date` (et depuis `start`) pour ce symbole"""
+        previous = self.checked_start(symbol)
+        if previous is not None and (start is None or previous < start):
+            start = previous
+        self._index[symbol] = {'end': date, 'start': start}
+
+    def clear(self, symbol):
+        """Supprime la série en cache d'un symbole (historique à retélécharger en entier)"""
+        path = self._path(symbol)
+        if os.path.exists(path):
+            os.remove(path)
+        self._index.pop(symbol, None)
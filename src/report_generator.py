@@ -2,8 +2,14 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import warnings
-warnings.filterwarnings('ignore')
+
+# Caractères spéciaux LaTeX et leur forme échappée
+_LATEX_SPECIAL = {'\\': '\\textbackslash{}', '&': '\\&', '%': '\\%', '$': '\\$', '#': '\\#',
+                  '_': '\\_', '{': '\\{', '}': '\\}'}
+
+def latex_escape(value):
+    """Échappe les caractères spéciaux LaTeX d'une cellule de tableau"""
+    return ''.join(_LATEX_SPECIAL.get(char, char) for char in str(value))
 
 class ReportGenerator:
     def __init__(self):
@@ -33,6 +39,17 @@ class ReportGenerator:
             'portfolio_composition': portfolio_data['weights']
         }
         
+        # Tests de résistance : P&L de chaque scénario, du plus défavorable au plus favorable
+        if 'stress' in var_results:
+            report['stress_tests'] = {
+                scenario: {
+                    'P&L': f"${row['pnl']:,.2f}",
+                    'Rendement': f"{row['return']:.2%}",
+                    'Multiple de la VaR': f"{row['var_multiple']:.1f}x"
+                }
+                for scenario, row in var_results['stress'].iterrows()
+            }
+        
         return report
     
     def save_detailed_report(self, report_data, filename):
@@ -62,6 +79,13 @@ class ReportGenerator:
             f.write("-" * 20 + "\n")
             for asset, weight in report_data['portfolio_composition'].items():
                 f.write(f"{asset} : {weight:.1%}\n")
+            
+            if 'stress_tests' in report_data:
+                f.write("\nTests de résistance :\n")
+                f.write("-" * 20 + "\n")
+                for scenario, values in report_data['stress_tests'].items():
+                    f.write(f"{scenario} : {values['P&L']} ({values['Rendement']}, "
+                            f"{values['Multiple de la VaR']} la VaR historique)\n")
         
         print(f"Rapport détaillé enregistré dans : {filename}")
     
@@ -87,7 +111,7 @@ Ce rapport fournit une analyse des risques pour un portefeuille multi-actifs, en
 
 \\section{{Informations sur le portefeuille}}
 \\begin{{itemize}}
-    \\item Nombre d'actifs : {report_data['portfolio_summary']['Nombre d\'actifs']}
+    \\item Nombre d'actifs : {report_data['portfolio_summary']["Nombre d'actifs"]}
     \\item Valeur du portefeuille : {report_data['portfolio_summary']['Valeur du portefeuille']}
     \\item Volatilité annualisée : {report_data['portfolio_summary']['Volatilité annualisée']}
     \\item Ratio de Sharpe : {report_data['portfolio_summary']['Ratio de Sharpe']}
@@ -103,7 +127,7 @@ Ce rapport fournit une analyse des risques pour un portefeuille multi-actifs, en
 """
         
         for key, value in report_data['risk_metrics'].items():
-            latex_content += f"{key} & {value} \\\\\n"
+            latex_content += f"{latex_escape(key)} & {latex_escape(value)} \\\\\n"
         
         latex_content += """
 \\bottomrule
@@ -121,14 +145,36 @@ Ce rapport fournit une analyse des risques pour un portefeuille multi-actifs, en
 """
         
         for asset, weight in report_data['portfolio_composition'].items():
-            latex_content += f"{asset} & {weight:.1%} \\\\\n"
+            latex_content += f"{latex_escape(asset)} & {latex_escape(f'{weight:.1%}')} \\\\\n"
         
         latex_content += """
 \\bottomrule
 \\end{tabular}
 \\caption{Allocation du portefeuille}
 \\end{table}
-
+"""
+        
+        if 'stress_tests' in report_data:
+            latex_content += """
+\\section{Tests de résistance}
+\\begin{table}[h]
+\\centering
+\\begin{tabular}{lrrr}
+\\toprule
+\\textbf{Scénario} & \\textbf{P\\&L} & \\textbf{Rendement} & \\textbf{Multiple de la VaR} \\\\
+\\midrule
+"""
+            for scenario, values in report_data['stress_tests'].items():
+                cells = [scenario, values['P&L'], values['Rendement'], values['Multiple de la VaR']]
+                latex_content += ' & '.join(latex_escape(cell) for cell in cells) + " \\\\\n"
+            latex_content += """
+\\bottomrule
+\\end{tabular}
+\\caption{P\\&L des scénarios de stress}
+\\end{table}
+"""
+        
+        latex_content += """
 \\end{document}
 """
         
@@ -0,0 +1,192 @@
+# src/risk_context.py
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+import numpy as np
+import pandas as pd
+
+class RiskContext:
+    """Données de risque d'un couple (rendements, poids), calculées une seule fois et mémorisées"""
+    CACHE_SIZE = 8
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, returns, weights=None):
+        if not isinstance(returns, pd.DataFrame):
+            returns = pd.DataFrame(np.asarray(returns, dtype=float))
+        self.returns = returns
+        self.weights = None if weights is None else self._weights_array(weights)
+
+    @staticmethod
+    def _weights_array(weights):
+        """Convertit les poids (dictionnaire ou tableau) en vecteur NumPy"""
+        if isinstance(weights, dict):
+            weights = list(weights.values())
+        return np.asarray(weights, dtype=float)
+
+    @classmethod
+    def content_hash(cls, returns, weights=None):
+        """Empreinte du contenu des rendements (valeurs, index, colonnes) et des poids"""
+        digest = hashlib.blake2b(digest_size=16)
+        if isinstance(returns, pd.DataFrame):
+            digest.update(np.ascontiguousarray(returns.to_numpy(dtype=float)).tobytes())
+            digest.update(pd.util.hash_array(returns.index.to_numpy()).tobytes())
+            digest.update(repr(list(returns.columns)).encode('utf-8'))
+        else:
+            values = np.ascontiguousarray(returns, dtype=float)
+            digest.update(repr(values.shape).encode('utf-8'))
+            digest.update(values.tobytes())
+        if weights is not None:
+            digest.update(b'weights')
+            digest.update(np.ascontiguousarray(cls._weights_array(weights)).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_data(cls, returns, weights=None):
+        """Renvoie le contexte en cache pour ces données, ou en crée un nouveau"""
+        if isinstance(returns, RiskContext):
+            return returns
+        key = cls.content_hash(returns, weights)
+        with cls._cache_lock:
+            context = cls._cache.get(key)
+            if context is not None:
+                cls._cache.move_to_end(key)
+                return context
+        context = cls(returns, weights)
+        with cls._cache_lock:
+            cls._cache[key] = context
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return context
+
+    @classmethod
+    def clear_cache(cls):
+        """Vide le cache des contextes"""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @cached_property
+    def returns_matrix(self):
+        """Matrice NumPy des rendements (observations x actifs)"""
+        return np.ascontiguousarray(self.returns.to_numpy(dtype=float))
+
+    @cached_property
+    def mean_vector(self):
+        """Rendement moyen de chaque actif"""
+        return self.returns.mean().values
+
+    @cached_property
+    def covariance(self):
+        """Matrice de covariance des rendements"""
+        return self.returns.cov().values
+
+    @cached_property
+    def cholesky(self):
+        """Facteur de Cholesky de la matrice de covariance"""
+        try:
+            return np.linalg.cholesky(self.covariance)
+        except np.linalg.LinAlgError:
+            if np.isnan(self.returns_matrix).any():
+                # Covariance par paires sur des historiques de longueurs différentes : réparation
+                from covariance import nearest_positive_definite
+                return np.linalg.cholesky(nearest_positive_definite(self.covariance))
+            # Si la matrice n'est pas définie positive, utiliser l'estimateur de Ledoit-Wolf
+            return self.covariance_model('ledoit_wolf').cholesky
+
+    @cached_property
+    def centered_returns(self):
+        """Rendements des actifs centrés sur leur moyenne"""
+        return self.returns_matrix - self.mean_vector
+
+    def covariance_model(self, method='sample', n_factors=5, **params):
+        """Estimation de covariance (sample, ledoit_wolf, ewma, factor) et ses décompositions, mémorisées par paramètres"""
+        models = self.__dict__.setdefault('_covariance_models', {})
+        # Le nombre de facteurs ne concerne que le modèle factoriel : les autres
+        # estimateurs partagent une seule entrée quel que soit n_factors
+        if method == 'factor':
+            params['n_factors'] = n_factors
+        key = (method, tuple(sorted(params.items())))
+        if key not in models:
+            from covariance import CovarianceModel
+            if method == 'sample':
+                # Réutilise la covariance empirique déjà mémorisée
+                models[key] = CovarianceModel(self.covariance, method='sample')
+            else:
+                # Les estimateurs ne tolèrent pas les cotations manquantes : dates complètes uniquement
+                returns = self.returns_matrix
+                returns = returns[~np.isnan(returns).any(axis=1)]
+                models[key] = CovarianceModel.fit(returns, method, **params)
+        return models[key]
+
+    def volatility(self, method='garch'):
+        """Moteur de volatilité conditionnelle ajusté sur ces rendements, mémorisé par méthode"""
+        engines = self.__dict__.setdefault('_volatility_engines', {})
+        if method not in engines:
+            from volatility import VolatilityEngine
+            engines[method] = VolatilityEngine(method).fit(self.returns_matrix)
+        return engines[method]
+
+    def empirical_marginals(self, grid_size=4097):
+        """Marginales empiriques et table de quantiles de ces rendements, mémorisées par taille de grille"""
+        marginals = self.__dict__.setdefault('_empirical_marginals', {})
+        if grid_size not in marginals:
+            from scenario_generators import EmpiricalMarginals
+            marginals[grid_size] = EmpiricalMarginals(self.returns_matrix, grid_size)
+        return marginals[grid_size]
+
+    def copula_generator(self, dof=None, grid_size=4097):
+        """Générateur de copule (gaussienne si dof est None) et sa table d'inversion, mémorisés par paramètres"""
+        generators = self.__dict__.setdefault('_copula_generators', {})
+        key = (dof, grid_size)
+        if key not in generators:
+            from scenario_generators import CopulaGenerator
+            generators[key] = CopulaGenerator(self.empirical_marginals(grid_size), dof)
+        return generators[key]
+
+    def _require_weights(self):
+        if self.weights is None:
+            raise ValueError("Ce contexte de risque n'a pas de poids de portefeuille")
+
+    @cached_property
+    def portfolio_array(self):
+        """Rendements du portefeuille sous forme de tableau NumPy"""
+        self._require_weights()
+        return self.returns_matrix @ self.weights
+
+    @cached_property
+    def portfolio_returns(self):
+        """Rendements du portefeuille indexés par date"""
+        return pd.Series(self.portfolio_array, index=self.returns.index)
+
+    @cached_property
+    def portfolio_mean(self):
+        return self.portfolio_returns.mean()
+
+    @cached_property
+    def portfolio_std(self):
+        return self.portfolio_returns.std()
+
+    @cached_property
+    def sorted_portfolio_returns(self):
+        """Rendements du portefeuille triés (statistiques d'ordre)"""
+        return np.sort(self.portfolio_array)
+
+    @cached_property
+    def _sorted_cumsum(self):
+        return np.cumsum(self.sorted_portfolio_returns)
+
+    def percentile(self, q):
+        """Percentile des rendements du portefeuille (interpolation linéaire, comme np.percentile)"""
+        sorted_returns = self.sorted_portfolio_returns
+        position = (len(sorted_returns) - 1) * q / 100
+        lower = int(np.floor(position))
+        upper = min(lower + 1, len(sorted_returns) - 1)
+        return sorted_returns[lower] + (sorted_returns[upper] - sorted_returns[lower]) * (position - lower)
+
+    def tail_mean(self, threshold):
+        """Moyenne et nombre des rendements inférieurs ou égaux au seuil"""
+        count = int(np.searchsorted(self.sorted_portfolio_returns, threshold, side='right'))
+        if count == 0:
+            return threshold, 0
+        return self._sorted_cumsum[count - 1] / count, count
@@ -0,0 +1,318 @@
+# src/risk_service.py
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from var_calculator import VaRCalculator
+from risk_context import RiskContext
+
+SERVICE_METHODS = ('historical', 'parametric', 'monte_carlo')
+
+class ResultCache:
+    """Cache LRU des résultats, borné par leur taille totale (octets de la représentation JSON)"""
+    def __init__(self, max_bytes=1000000):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = len(json.dumps(value))
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            # Éviction des entrées les moins récemment utilisées jusqu'à respecter le budget
+            while self.bytes > self.max_bytes:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+class MicroBatcher:
+    """Regroupe les requêtes concurrentes : un thread évalue chaque lot en un seul appel vectorisé"""
+    def __init__(self, evaluate, max_batch=256, max_wait=0.002):
+        self.evaluate = evaluate
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='risk-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, request):
+        future = Future()
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("Le service de risque est arrêté")
+            self._pending.append((request, future))
+            self._condition.notify()
+        return future
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending and not self._stopped:
+                self._condition.wait()
+            # Courte attente pour laisser arriver les requêtes concurrentes
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                results = self.evaluate([request for request, _ in batch])
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+
+class RiskService:
+    """Service de risque résident : rendements, covariance, Cholesky et scénarios Monte-Carlo gardés en mémoire"""
+    MAX_SCENARIO_SETS = 4
+
+    def __init__(self, returns, portfolio_value=1000000, confidence_level=0.95, n_simulations=10000,
+                 random_seed=42, cache_bytes=1000000, max_batch=256, max_wait=0.002, max_horizon=252,
+                 covariance='sample', n_factors=5):
+        self.columns = list(returns.columns)
+        self.portfolio_value = portfolio_value
+        self.confidence_level = confidence_level
+        self.n_simulations = n_simulations
+        self.random_seed = random_seed
+        # Horizon Monte-Carlo maximal : une simulation plus longue bloquerait le thread de regroupement
+        self.max_horizon = max_horizon
+        # Estimateur de covariance partagé par la VaR paramétrique et les scénarios Monte-Carlo
+        self.covariance = covariance
+        self.n_factors = n_factors
+        self.context = RiskContext.from_data(returns)
+        self.cache = ResultCache(cache_bytes)
+        self._calculators = {}
+        self._historical_scenarios = {}
+        self._mc_scenarios = OrderedDict()
+        self._batcher = MicroBatcher(self._evaluate_batch, max_batch, max_wait)
+
+    def warm(self, horizons=(1,)):
+        """Précalcule covariance, Cholesky et jeux de scénarios pour les horizons donnés"""
+        self.context.covariance_model(self.covariance, n_factors=self.n_factors).cholesky
+        for horizon in horizons:
+            self.scenarios('historical', horizon)
+            self.scenarios('monte_carlo', horizon)
+        return self
+
+    def close(self):
+        self._batcher.stop()
+
+    def _calculator(self, confidence_level):
+        if confidence_level not in self._calculators:
+            self._calculators[confidence_level] = VaRCalculator(confidence_level)
+        return self._calculators[confidence_level]
+
+    def scenarios(self, method, horizon):
+        """Rendements par actif à l'horizon : fenêtres historiques chevauchantes ou trajectoires simulées (achat-conservation)"""
+        if method == 'historical':
+            if horizon not in self._historical_scenarios:
+                log_returns = np.log1p(self.context.returns_matrix)
+                cumulative = np.vstack([np.zeros(len(self.columns)), np.cumsum(log_returns, axis=0)])
+                self._historical_scenarios[horizon] = np.expm1(cumulative[horizon:] - cumulative[:-horizon])
+            return self._historical_scenarios[horizon]
+
+        if horizon not in self._mc_scenarios:
+            from monte_carlo import MonteCarloSimulator
+            # Trajectoires à valeur initiale unitaire par actif, partagées par tous les portefeuilles
+            simulator = MonteCarloSimulator(self.n_simulations, horizon + 1, self.random_seed, n_workers=1,
+                                            covariance=self.covariance, n_factors=self.n_factors)
+            unit_weights = {symbol: 1.0 for symbol in self.columns}
+            result = simulator.parallel_mc_simulation(self.context.returns, unit_weights, 1.0,
+                                                      context=self.context)
+            self._mc_scenarios[horizon] = result['final_asset_values'] - 1.0
+            while len(self._mc_scenarios) > self.MAX_SCENARIO_SETS:
+                self._mc_scenarios.popitem(last=False)
+        self._mc_scenarios.move_to_end(horizon)
+        return self._mc_scenarios[horizon]
+
+    def parse_request(self, request):
+        """Valide une requête et renvoie (poids, méthode, niveau de confiance, horizon)"""
+        weights = request.get('weights')
+        if isinstance(weights, dict):
+            unknown = set(weights) - set(self.columns)
+            if unknown:
+                raise ValueError(f"Actifs inconnus : {', '.join(sorted(unknown))}")
+            weights = [weights.get(symbol, 0.0) for symbol in self.columns]
+        if weights is None or len(weights) != len(self.columns):
+            raise ValueError(f"Poids attendus pour les {len(self.columns)} actifs : {', '.join(self.columns)}")
+        method = request.get('method', 'historical')
+        if method not in SERVICE_METHODS:
+            raise ValueError(f"Méthode inconnue : {method}")
+        confidence_level = float(request.get('confidence', self.confidence_level))
+        if not 0 < confidence_level < 1:
+            raise ValueError("Le niveau de confiance doit être compris entre 0 et 1")
+        horizon = int(request.get('horizon', 1))
+        if horizon < 1 or (method == 'historical' and horizon >= len(self.context.returns)):
+            raise ValueError(f"Horizon invalide : {horizon}")
+        if method == 'monte_carlo' and horizon > self.max_horizon:
+            raise ValueError(f"Horizon Monte-Carlo limité à {self.max_horizon} jours : {horizon}")
+        return tuple(float(weight) for weight in weights), method, confidence_level, horizon
+
+    def _evaluate_batch(self, keys):
+        """Évalue un lot de requêtes : un appel vectorisé par groupe (méthode, confiance, horizon)"""
+        groups = {}
+        for i, key in enumerate(keys):
+            groups.setdefault(key[1:], []).append(i)
+        results = [None] * len(keys)
+        for (method, confidence_level, horizon), indices in groups.items():
+            weights = np.array([keys[i][0] for i in indices])
+            try:
+                values = self._evaluate_group(weights, method, confidence_level, horizon)
+            except Exception as error:
+                values = [error] * len(indices)
+            for i, value in zip(indices, values):
+                results[i] = value
+        return results
+
+    def _evaluate_group(self, weights, method, confidence_level, horizon):
+        calculator = self._calculator(confidence_level)
+        if method == 'parametric':
+            from scipy.special import ndtri
+            result = calculator.delta_normal_var(None, weights, covariance=self.covariance,
+                                                 context=self.context, n_factors=self.n_factors)
+            # Loi normale i.i.d. : moyenne en h, écart-type en √h
+            mean = result['mean'] * horizon
+            std = result['std'] * np.sqrt(horizon)
+            z_score = ndtri(confidence_level)
+            var = z_score * std - mean
+            es = std * np.exp(-z_score ** 2 / 2) / np.sqrt(2 * np.pi) / (1 - confidence_level) - mean
+        else:
+            result = calculator.batch_var(self.scenarios(method, horizon), weights)
+            var, es = result['var'], result['es']
+        return [{'var': float(v), 'var_value': float(v * self.portfolio_value),
+                 'es': float(e), 'es_value': float(e * self.portfolio_value)}
+                for v, e in zip(var, es)]
+
+    def query(self, requests):
+        """Répond à une ou plusieurs requêtes de VaR/ES, depuis le cache ou par lots"""
+        single = isinstance(requests, dict)
+        requests = [requests] if single else list(requests)
+        keys = [self.parse_request(request) for request in requests]
+
+        results = [self.cache.get(key) for key in keys]
+        futures = {}
+        for key, result in zip(keys, results):
+            if result is None and key not in futures:
+                futures[key] = self._batcher.submit(key)
+        for key, future in futures.items():
+            self.cache.put(key, future.result())
+
+        results = [result if result is not None else futures[key].result()
+                   for key, result in zip(keys, results)]
+        return results[0] if single else results
+
+    def what_if(self, request):
+        """VaR avant et après des transactions hypothétiques (variations de poids par actif)"""
+        trades = request.get('trades', {})
+        unknown = set(trades) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Actifs inconnus : {', '.join(sorted(unknown))}")
+        before = self.parse_request(request)[0]
+        after = [weight + trades.get(symbol, 0.0) for symbol, weight in zip(self.columns, before)]
+        base, modified = self.query([dict(request, weights=list(before)), dict(request, weights=after)])
+        return {'before': base, 'after': modified,
+                'delta_var_value': modified['var_value'] - base['var_value']}
+
+    def stats(self):
+        return {'cache': self.cache.stats(), 'batches': self._batcher.batches,
+                'batched_requests': self._batcher.requests, 'assets': self.columns,
+                'scenario_sets': {'historical': sorted(self._historical_scenarios),
+                                  'monte_carlo': list(self._mc_scenarios)}}
+
+class _RiskRequestHandler(BaseHTTPRequestHandler):
+    """Point d'accès HTTP JSON : GET /health, GET /stats, POST /var, POST /whatif"""
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send(200, self.server.service.stats())
+        else:
+            self._send(404, {'error': f"Chemin inconnu : {self.path}"})
+
+    def do_POST(self):
+        routes = {'/var': self.server.service.query, '/whatif': self.server.service.what_if}
+        if self.path not in routes:
+            self._send(404, {'error': f"Chemin inconnu : {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            self._send(200, routes[self.path](payload))
+        except (ValueError, TypeError, AttributeError) as error:
+            self._send(400, {'error': str(error)})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+class _RiskHTTPServer(ThreadingHTTPServer):
+    # File d'attente des connexions élargie (5 par défaut) pour les rafales de requêtes concurrentes
+    request_queue_size = 128
+    daemon_threads = True
+
+def make_server(service, host='127.0.0.1', port=0, verbose=False):
+    """Crée le serveur HTTP multithread du service (port 0 : port libre choisi par le système)"""
+    server = _RiskHTTPServer((host, port), _RiskRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
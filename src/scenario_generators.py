@@ -0,0 +1,147 @@
+# src/scenario_generators.py
+import numpy as np
+
+SCENARIO_GENERATORS = ('gaussian', 'student_t', 'gaussian_copula', 't_copula',
+                       'bootstrap', 'block_bootstrap', 'factor')
+
+def student_t_dof(excess_kurtosis, min_dof=4.5, max_dof=30.0):
+    """Degrés de liberté de Student reproduisant l'excès d'aplatissement observé (κ = 6 / (ν - 4))"""
+    if not np.isfinite(excess_kurtosis) or excess_kurtosis <= 6 / (max_dof - 4):
+        return max_dof
+    return float(np.clip(4 + 6 / excess_kurtosis, min_dof, max_dof))
+
+def _lookup(table, position):
+    """Interpolation linéaire dans une table (points de grille x actifs) à des positions exprimées en pas de grille"""
+    position = np.clip(position, 0, len(table) - 1)
+    lower = np.minimum(position.astype(np.intp), len(table) - 2)
+    fraction = position - lower
+    columns = np.arange(table.shape[1])
+    low = table[lower, columns]
+    return low + fraction * (table[lower + 1, columns] - low)
+
+class EmpiricalMarginals:
+    """Lois marginales empiriques des actifs, avec table de quantiles pour l'inverse de la fonction de répartition"""
+    def __init__(self, returns, grid_size=4097):
+        returns = np.asarray(returns, dtype=float)
+        self.n_observations, self.n_assets = returns.shape
+        # Quantiles sur une grille régulière de probabilités : l'inversion se
+        # réduit ensuite à une interpolation linéaire indexée, sans tri ni recherche
+        self.grid_size = grid_size
+        self.table = np.ascontiguousarray(np.quantile(returns, np.linspace(0, 1, grid_size), axis=0))
+
+        # Corrélation des scores normaux des rangs (estimateur de la copule)
+        from scipy.special import ndtri
+        ranks = returns.argsort(axis=0).argsort(axis=0) + 1
+        scores = ndtri(ranks / (self.n_observations + 1))
+        self.rank_correlation = np.corrcoef(scores, rowvar=False)
+
+    def ppf(self, u):
+        """Quantiles des marginales pour des probabilités u (trajectoires x actifs)"""
+        return _lookup(self.table, np.asarray(u) * (self.grid_size - 1))
+
+class GaussianGenerator:
+    """Chocs gaussiens corrélés : mêmes tirages que la simulation corrélée de référence"""
+    def __init__(self, mean_returns, L):
+        self.mean_returns = mean_returns
+        self.L = L
+
+    def steps(self, rng, n_paths, n_steps):
+        for _ in range(n_steps):
+            Z = rng.standard_normal((n_paths, len(self.mean_returns)))
+            yield self.mean_returns + Z @ self.L.T
+
+class FactorGenerator:
+    """Chocs gaussiens d'un modèle factoriel : coût O(actifs x facteurs) par trajectoire et par jour"""
+    def __init__(self, mean_returns, model):
+        self.mean_returns = mean_returns
+        self.model = model
+
+    def steps(self, rng, n_paths, n_steps):
+        for _ in range(n_steps):
+            yield self.mean_returns + self.model.sample(rng, n_paths)
+
+class StudentTGenerator:
+    """Chocs de Student multivariés, de même moyenne et covariance que le modèle gaussien"""
+    def __init__(self, mean_returns, L, dof):
+        if dof <= 2:
+            raise ValueError("La loi de Student requiert plus de deux degrés de liberté")
+        self.mean_returns = mean_returns
+        self.L = L
+        self.dof = dof
+
+    def steps(self, rng, n_paths, n_steps):
+        for _ in range(n_steps):
+            Z = rng.standard_normal((n_paths, len(self.mean_returns)))
+            # Mélange de variance commun aux actifs : W ~ χ²(ν), normalisé pour une variance unitaire
+            scale = np.sqrt((self.dof - 2) / rng.chisquare(self.dof, n_paths))
+            yield self.mean_returns + (Z @ self.L.T) * scale[:, None]
+
+class CopulaGenerator:
+    """Copule gaussienne ou de Student sur les marginales empiriques"""
+    TAIL_PROBABILITY = 1e-6
+
+    def __init__(self, marginals, dof=None, grid_size=16385):
+        from scipy.special import ndtr, ndtri, stdtr, stdtrit
+        self.marginals = marginals
+        self.L = np.linalg.cholesky(marginals.rank_correlation)
+        self.dof = dof
+        # Table composée x -> F⁻¹(C(x)) sur une grille régulière de la variable de la copule :
+        # la fonction de répartition de la copule n'est plus évaluée pendant la simulation
+        if dof is None:
+            self.x_max = -ndtri(self.TAIL_PROBABILITY)
+            cdf = ndtr
+        else:
+            self.x_max = -stdtrit(dof, self.TAIL_PROBABILITY)
+            cdf = lambda x: stdtr(dof, x)
+        x_grid = np.linspace(-self.x_max, self.x_max, grid_size)
+        self.x_step = x_grid[1] - x_grid[0]
+        self.table = np.ascontiguousarray(marginals.ppf(np.repeat(cdf(x_grid)[:, None],
+                                                                  marginals.n_assets, axis=1)))
+
+    def steps(self, rng, n_paths, n_steps):
+        for _ in range(n_steps):
+            X = rng.standard_normal((n_paths, self.marginals.n_assets)) @ self.L.T
+            if self.dof is not None:
+                X /= np.sqrt(rng.chisquare(self.dof, n_paths) / self.dof)[:, None]
+            yield _lookup(self.table, (X + self.x_max) / self.x_step)
+
+class BootstrapGenerator:
+    """Rééchantillonnage des dates historiques, par dates isolées ou par blocs de dates consécutives"""
+    def __init__(self, returns, block_length=1):
+        self.returns = np.ascontiguousarray(returns, dtype=float)
+        if not 1 <= block_length <= len(self.returns):
+            raise ValueError("Longueur de bloc invalide")
+        self.block_length = int(block_length)
+
+    def steps(self, rng, n_paths, n_steps):
+        n_starts = len(self.returns) - self.block_length + 1
+        for t in range(n_steps):
+            if t % self.block_length == 0:
+                # Début d'un nouveau bloc pour toutes les trajectoires
+                index = rng.integers(0, n_starts, n_paths)
+            else:
+                index += 1
+            yield self.returns[index]
+
+def build_generator(name, context, dof=None, block_length=10, grid_size=4097, covariance='sample',
+                    n_factors=5):
+    """Construit un générateur de scénarios à partir des données en cache d'un RiskContext"""
+    if name not in SCENARIO_GENERATORS:
+        raise ValueError(f"Générateur de scénarios inconnu : {name}")
+    if name in ('student_t', 't_copula') and dof is None:
+        dof = student_t_dof(context.portfolio_returns.kurt())
+
+    if name in ('gaussian', 'student_t'):
+        # Facteur de Cholesky de la covariance retenue (l'estimateur empirique reprend le cache historique)
+        L = (context.cholesky if covariance == 'sample'
+             else context.covariance_model(covariance, n_factors=n_factors).cholesky)
+        if name == 'gaussian':
+            return GaussianGenerator(context.mean_vector, L)
+        return StudentTGenerator(context.mean_vector, L, dof)
+    if name == 'factor':
+        return FactorGenerator(context.mean_vector, context.covariance_model('factor', n_factors=n_factors))
+    if name == 'gaussian_copula':
+        return context.copula_generator(None, grid_size)
+    if name == 't_copula':
+        return context.copula_generator(dof, grid_size)
+    return BootstrapGenerator(context.returns_matrix, 1 if name == 'bootstrap' else block_length)
@@ -0,0 +1,133 @@
+# src/stress_testing.py
+import numpy as np
+import pandas as pd
+from risk_context import RiskContext
+
+# Bibliothèque de scénarios : rejeu historique (prix entre deux dates si l'historique
+# les couvre) ou mouvements de facteurs ; 'market' est le choc de marché de repli
+DEFAULT_SCENARIOS = {
+    'Crise financière 2008': {'start': '2008-09-12', 'end': '2008-11-20', 'factors': {'market': -0.40}},
+    'Krach COVID-19 2020': {'start': '2020-02-19', 'end': '2020-03-23', 'factors': {'market': -0.34}},
+    'Lundi noir 1987': {'factors': {'market': -0.2047}},
+    'Éclatement de la bulle internet': {'factors': {'market': -0.49}},
+    'Repli de marché -8 %': {'factors': {'market': -0.08}},
+    'Hausse de marché +10 %': {'factors': {'market': 0.10}},
+}
+
+class StressTester:
+    """Scénarios de stress nommés compilés en matrice de chocs dense (scénarios x actifs), appliqués par produit matriciel"""
+    CACHE_SIZE = 8
+
+    def __init__(self, scenarios=None, market_proxy=None, factor_returns=None):
+        self.scenarios = dict(DEFAULT_SCENARIOS if scenarios is None else scenarios)
+        # Actif servant de facteur de marché (moyenne équipondérée des actifs à défaut)
+        self.market_proxy = market_proxy
+        # Séries de facteurs supplémentaires (taux, change...) pour les chocs utilisateur
+        self.factor_returns = factor_returns
+        self._compiled = {}
+
+    def add_scenario(self, name, factors=None, assets=None, start=None, end=None):
+        """Ajoute un scénario : mouvements de facteurs, chocs directs par actif et/ou fenêtre de rejeu historique"""
+        scenario = {'factors': dict(factors or {}), 'assets': dict(assets or {})}
+        if start is not None:
+            scenario.update({'start': start, 'end': end})
+        self.scenarios[name] = scenario
+        self._compiled.clear()
+
+    def add_factor_grid(self, factor='market', moves=None):
+        """Ajoute une grille de chocs d'un facteur (un scénario par niveau de choc)"""
+        moves = np.linspace(-0.5, 0.2, 15) if moves is None else moves
+        for move in moves:
+            self.scenarios[f'{factor} {move:+.1%}'] = {'factors': {factor: float(move)}}
+        self._compiled.clear()
+
+    def factor_betas(self, returns):
+        """Sensibilités des actifs aux facteurs (régression des rendements sur les facteurs, avec constante)"""
+        returns = pd.DataFrame(returns)
+        if self.market_proxy is not None and self.market_proxy in returns.columns:
+            market = returns[self.market_proxy]
+        else:
+            market = returns.mean(axis=1)
+        factors = pd.DataFrame({'market': market})
+        if self.factor_returns is not None:
+            factors = factors.join(pd.DataFrame(self.factor_returns), how='left')
+        factors = factors.reindex(returns.index).fillna(0.0)
+
+        design = np.column_stack([np.ones(len(factors)), factors.to_numpy(dtype=float)])
+        coefficients = np.linalg.lstsq(design, returns.to_numpy(dtype=float), rcond=None)[0]
+        return pd.DataFrame(coefficients[1:], index=factors.columns, columns=returns.columns)
+
+    def _cache_key(self, returns, prices):
+        key = RiskContext.content_hash(returns)
+        if prices is not None:
+            key += RiskContext.content_hash(prices)
+        return key
+
+    def compile(self, returns, prices=None):
+        """Matrice de chocs (scénarios x actifs), mise en cache pour ces données et cette bibliothèque"""
+        key = self._cache_key(returns, prices)
+        if key in self._compiled:
+            return self._compiled[key]
+
+        returns = pd.DataFrame(returns)
+        betas = self.factor_betas(returns)
+        names = list(self.scenarios)
+        shocks = np.zeros((len(names), returns.shape[1]))
+
+        for i, name in enumerate(names):
+            scenario = self.scenarios[name]
+            moves = pd.Series(scenario.get('factors', {}), dtype=float)
+            unknown = set(moves.index) - set(betas.index)
+            if unknown:
+                raise ValueError(f"Facteurs inconnus dans le scénario '{name}' : {', '.join(sorted(unknown))}")
+            # Choc implicite par les facteurs : B' x mouvements
+            shocks[i] = moves @ betas.loc[moves.index] if len(moves) else 0.0
+
+            if 'start' in scenario and prices is not None:
+                # Rejeu historique des actifs cotés sur toute la fenêtre
+                window = prices.loc[pd.Timestamp(scenario['start']):pd.Timestamp(scenario['end'])]
+                window = window.reindex(columns=returns.columns)
+                covered = (window.index.size > 1 and
+                           window.index[0] <= pd.Timestamp(scenario['start']) + pd.Timedelta(days=7))
+                if covered:
+                    replay = (window.iloc[-1] / window.iloc[0] - 1).to_numpy(dtype=float)
+                    available = ~np.isnan(replay)
+                    shocks[i, available] = replay[available]
+
+            for asset, move in scenario.get('assets', {}).items():
+                if asset in returns.columns:
+                    shocks[i, returns.columns.get_loc(asset)] = move
+
+        compiled = pd.DataFrame(shocks, index=pd.Index(names, name='scenario'), columns=returns.columns)
+        self._compiled[key] = compiled
+        while len(self._compiled) > self.CACHE_SIZE:
+            self._compiled.pop(next(iter(self._compiled)))
+        return compiled
+
+    def historical_windows(self, prices, horizon=10, step=1):
+        """Scénarios de rejeu de toutes les fenêtres historiques glissantes de `horizon` jours"""
+        values = prices.to_numpy(dtype=float)
+        starts = np.arange(0, len(values) - horizon, step)
+        shocks = values[starts + horizon] / values[starts] - 1
+        names = [f"{prices.index[s]:%Y-%m-%d} +{horizon} j" for s in starts]
+        return pd.DataFrame(shocks, index=pd.Index(names, name='scenario'), columns=prices.columns)
+
+    def run(self, returns, weights, portfolio_value=1000000, prices=None, shocks=None):
+        """P&L de chaque scénario pour un ou plusieurs portefeuilles (dictionnaire de poids ou matrice k x actifs)"""
+        shocks = self.compile(returns, prices) if shocks is None else shocks
+        if isinstance(weights, dict):
+            weights = pd.Series(weights).reindex(shocks.columns).fillna(0.0).to_numpy()
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+
+        # Un seul produit matriciel pour tous les scénarios et portefeuilles
+        pnl = shocks.to_numpy() @ weights.T * portfolio_value
+        columns = ['pnl'] if len(weights) == 1 else [f'portefeuille_{i + 1}' for i in range(len(weights))]
+        return pd.DataFrame(pnl, index=shocks.index, columns=columns)
+
+    def stress_table(self, returns, weights, portfolio_value=1000000, prices=None, var_value=None):
+        """Tableau de stress d'un portefeuille : P&L, rendement et multiple de la VaR par scénario"""
+        pnl = self.run(returns, weights, portfolio_value, prices)['pnl']
+        table = pd.DataFrame({'pnl': pnl, 'return': pnl / portfolio_value})
+        if var_value:
+            table['var_multiple'] = -pnl / var_value
+        return table.sort_values('pnl')
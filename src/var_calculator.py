@@ -1,42 +1,40 @@
 # src/var_calculator.py
 import numpy as np
 import pandas as pd
-from scipy import stats
-import warnings
-warnings.filterwarnings('ignore')
+from risk_context import RiskContext
 
 class VaRCalculator:
-    def __init__(self, confidence_level=0.95):
+    def __init__(self, confidence_level=0.95, batch_size=4096):
         self.confidence_level = confidence_level
+        self.batch_size = batch_size
     
-    def historical_var(self, returns, weights, portfolio_value=1000000):
+    def historical_var(self, returns, weights, portfolio_value=1000000, context=None):
         """Calcul de la VaR par simulation historique"""
-        # Calcul du rendement du portefeuille
-        portfolio_returns = (returns * weights).sum(axis=1)
+        # Rendements du portefeuille et statistiques d'ordre partagés
+        context = context or RiskContext.from_data(returns, weights)
         
         # Calcul de la VaR
-        var_historical = -np.percentile(portfolio_returns, 
-                                      (1 - self.confidence_level) * 100)
+        var_historical = -context.percentile((1 - self.confidence_level) * 100)
         var_historical_value = var_historical * portfolio_value
         
         return {
             'var': var_historical,
             'var_value': var_historical_value,
-            'portfolio_returns': portfolio_returns
+            'portfolio_returns': context.portfolio_returns
         }
     
-    def parametric_var(self, returns, weights, portfolio_value=1000000):
+    def parametric_var(self, returns, weights, portfolio_value=1000000, covariance='sample',
+                       context=None, n_factors=5):
         """Calcul de la VaR paramétrique (méthode variance-covariance)"""
-        # Calcul du rendement du portefeuille
-        portfolio_returns = (returns * weights).sum(axis=1)
+        context = context or RiskContext.from_data(returns, weights)
         
-        # Calcul de la moyenne et de l'écart-type
-        mean_return = portfolio_returns.mean()
-        std_return = portfolio_returns.std()
-        
-        # Calcul de la VaR (en utilisant la distribution normale)
-        z_score = stats.norm.ppf(self.confidence_level)
-        var_parametric = -(mean_return - z_score * std_return)
+        # Moyenne w'μ et écart-type √(w'Σw) à partir des moments mémorisés des actifs,
+        # sans reconstruire la série des rendements du portefeuille
+        result = self.delta_normal_var(returns, context.weights, portfolio_value,
+                                       covariance=covariance, context=context, n_factors=n_factors)
+        mean_return = result['mean'][0]
+        std_return = result['std'][0]
+        var_parametric = result['var'][0, 0]
         var_parametric_value = var_parametric * portfolio_value
         
         return {
@@ -46,8 +44,105 @@ class VaRCalculator:
             'std': std_return
         }
     
-    def calculate_expected_shortfall(self, portfolio_returns, portfolio_value=1000000):
+    def _weights_matrix(self, weights, context):
+        """Matrice de poids (portefeuilles x actifs) à partir d'un dictionnaire, d'un vecteur ou d'une matrice"""
+        if weights is None:
+            weights = context.weights
+        elif isinstance(weights, dict):
+            weights = pd.Series(weights).reindex(context.returns.columns).fillna(0.0).to_numpy()
+        return np.atleast_2d(np.asarray(weights, dtype=float))
+    
+    def delta_normal_var(self, returns, weights, portfolio_value=1000000, confidence_levels=None,
+                         covariance='sample', context=None, n_factors=5):
+        """VaR delta-normale √(w'Σw)·z − w'μ pour plusieurs portefeuilles et niveaux de confiance à la fois"""
+        from scipy.special import ndtri
+        context = context or RiskContext.from_data(returns)
+        weights = self._weights_matrix(weights, context)
+        confidence_levels = np.atleast_1d(self.confidence_level if confidence_levels is None
+                                          else confidence_levels).astype(float)
+        
+        # Σ et μ mémorisés par le contexte : O(actifs²) par portefeuille (O(actifs x facteurs)
+        # pour un modèle factoriel), indépendamment du nombre d'observations
+        model = context.covariance_model(covariance, n_factors=n_factors)
+        mean = weights @ context.mean_vector
+        std = np.sqrt(model.portfolio_variance(weights))
+        var = std[:, None] * ndtri(confidence_levels) - mean[:, None]
+        
+        return {
+            'var': var,
+            'var_value': var * portfolio_value,
+            'mean': mean,
+            'std': std,
+            'confidence_levels': confidence_levels
+        }
+    
+    @staticmethod
+    def _portfolio_higher_moments(context, weights, max_elements=2 ** 22):
+        """Troisième et quatrième moments centrés de portefeuilles (lignes de poids)"""
+        n_observations = context.returns_matrix.shape[0]
+        # Rendements centrés (mémorisés) projetés sur les portefeuilles, par blocs : O(T x actifs x portefeuilles)
+        m3 = np.empty(len(weights))
+        m4 = np.empty(len(weights))
+        block = max(1, max_elements // n_observations)
+        for start in range(0, len(weights), block):
+            centered = context.centered_returns @ weights[start:start + block].T
+            squared = centered * centered
+            m3[start:start + block] = (squared * centered).mean(axis=0)
+            m4[start:start + block] = (squared * squared).mean(axis=0)
+        return m3, m4
+    
+    def cornish_fisher_var(self, returns, weights, portfolio_value=1000000, confidence_levels=None,
+                           covariance='sample', context=None, n_factors=5):
+        """VaR modifiée de Cornish-Fisher, asymétrie et aplatissement des rendements de chaque portefeuille"""
+        from scipy.special import ndtri
+        context = context or RiskContext.from_data(returns)
+        weights = self._weights_matrix(weights, context)
+        confidence_levels = np.atleast_1d(self.confidence_level if confidence_levels is None
+                                          else confidence_levels).astype(float)
+        
+        mean = weights @ context.mean_vector
+        # Moments centrés du portefeuille : w'Σw, w'M3(w⊗w) et w'M4(w⊗w⊗w)
+        m2 = np.einsum('pi,ij,pj->p', weights, context.covariance, weights) * (
+            (len(context.returns) - 1) / len(context.returns))
+        m3, m4 = self._portfolio_higher_moments(context, weights)
+        # Asymétrie et aplatissement empiriques ; écart-type de l'estimateur de covariance retenu,
+        # comme pour la VaR paramétrique
+        std = np.sqrt(context.covariance_model(covariance, n_factors=n_factors).portfolio_variance(weights))
+        skewness = m3 / m2 ** 1.5
+        excess_kurtosis = m4 / m2 ** 2 - 3
+        
+        # Quantile normal corrigé (développement de Cornish-Fisher)
+        z = ndtri(1 - confidence_levels)[None, :]
+        S = skewness[:, None]
+        K = excess_kurtosis[:, None]
+        z_cf = (z + (z ** 2 - 1) * S / 6 + (z ** 3 - 3 * z) * K / 24
+                - (2 * z ** 3 - 5 * z) * S ** 2 / 36)
+        var = -(mean[:, None] + z_cf * std[:, None])
+        
+        return {
+            'var': var,
+            'var_value': var * portfolio_value,
+            'mean': mean,
+            'std': std,
+            'skewness': skewness,
+            'excess_kurtosis': excess_kurtosis,
+            'confidence_levels': confidence_levels
+        }
+    
+    def calculate_expected_shortfall(self, portfolio_returns, portfolio_value=1000000, context=None):
         """Calcul de l'Expected Shortfall (CVaR)"""
+        if context is not None:
+            # Seuil et moyenne de queue lus sur les statistiques d'ordre du contexte
+            var_threshold = -context.percentile((1 - self.confidence_level) * 100)
+            portfolio_returns = context.portfolio_returns
+            tail_mean, tail_count = context.tail_mean(-var_threshold)
+            expected_shortfall = -tail_mean if tail_count > 0 else var_threshold
+            return {
+                'es': expected_shortfall,
+                'es_value': expected_shortfall * portfolio_value,
+                'tail_losses': portfolio_returns[portfolio_returns <= -var_threshold]
+            }
+        
         var_threshold = -np.percentile(portfolio_returns, 
                                      (1 - self.confidence_level) * 100)
         
@@ -67,15 +162,96 @@ class VaRCalculator:
             'tail_losses': tail_losses
         }
     
-    def calculate_portfolio_stats(self, returns, weights, portfolio_value=1000000):
+    def multi_horizon_var(self, returns, weights, horizons=(1, 5, 10, 21, 252),
+                          portfolio_value=1000000, context=None):
+        """VaR et ES historiques et paramétriques sur plusieurs horizons (en jours) en un seul appel"""
+        context = context or RiskContext.from_data(returns, weights)
+        from scipy import stats
+        alpha = 1 - self.confidence_level
+        z_score = stats.norm.ppf(self.confidence_level)
+        es_factor = stats.norm.pdf(z_score) / alpha
+        
+        # Rendements composés sur fenêtres glissantes chevauchantes : différences
+        # de la somme cumulée des log-rendements, une seule passe pour tous les horizons
+        log_returns = np.log1p(context.portfolio_array)
+        cumulative = np.concatenate([[0.0], np.cumsum(log_returns)])
+        n_obs = len(log_returns)
+        # Horizons entiers d'au moins un jour, laissant plusieurs fenêtres historiques
+        invalid = [horizon for horizon in horizons
+                   if horizon != int(horizon) or not 1 <= int(horizon) < n_obs]
+        if invalid or not len(horizons):
+            raise ValueError(f"Horizons invalides : {list(invalid)} (entiers attendus entre 1 et "
+                             f"{n_obs - 1} jours pour {n_obs} observations)")
+        
+        # Moments exacts du rendement composé sur h jours (rendements i.i.d.)
+        growth = 1 + context.portfolio_mean
+        second_moment = context.portfolio_std ** 2 + growth ** 2
+        
+        rows = []
+        for horizon in horizons:
+            horizon = int(horizon)
+            window_returns = np.expm1(cumulative[horizon:] - cumulative[:-horizon])
+            quantile = np.percentile(window_returns, alpha * 100)
+            tail = window_returns[window_returns <= quantile]
+            historical_var = -quantile
+            historical_es = -tail.mean() if len(tail) > 0 else historical_var
+            n_windows = len(window_returns)
+            
+            mean = growth ** horizon - 1
+            std = np.sqrt(max(second_moment ** horizon - growth ** (2 * horizon), 0.0))
+            rows.append({
+                'horizon': horizon,
+                'historical_var': historical_var,
+                'historical_es': historical_es,
+                'parametric_var': z_score * std - mean,
+                'parametric_es': es_factor * std - mean,
+                'mean': mean,
+                'std': std,
+                'n_windows': n_windows
+            })
+        
+        table = pd.DataFrame(rows).set_index('horizon')
+        for column in ('historical_var', 'historical_es', 'parametric_var', 'parametric_es'):
+            table[f'{column}_value'] = table[column] * portfolio_value
+        return table
+    
+    def filtered_historical_var(self, returns, weights, portfolio_value=1000000, method='garch',
+                                engine=None, context=None):
+        """VaR et ES par simulation historique filtrée (résidus standardisés remis à la volatilité EWMA/GARCH prévue)"""
+        context = context or RiskContext.from_data(returns, weights)
+        # Un moteur fourni (mis à jour au fil de l'eau) prime sur celui du contexte
+        engine = engine or context.volatility(method)
+        scenarios = engine.filtered_scenarios() @ context.weights
+        
+        var_filtered = -np.percentile(scenarios, (1 - self.confidence_level) * 100)
+        tail = scenarios[scenarios <= -var_filtered]
+        es_filtered = -tail.mean() if len(tail) > 0 else var_filtered
+        
+        return {
+            'var': var_filtered,
+            'var_value': var_filtered * portfolio_value,
+            'es': es_filtered,
+            'es_value': es_filtered * portfolio_value,
+            'forecast_volatility': np.sqrt(context.weights @ engine.forecast_covariance @ context.weights),
+            'scenarios': scenarios,
+            'method': engine.method
+        }
+    
+    def incremental_state(self, prices, weights, window=None):
+        """État incrémental (sommes courantes, produits croisés, fenêtre triée) construit sur l'historique des prix"""
+        from incremental import IncrementalRiskState
+        return IncrementalRiskState.from_prices(prices, weights, self.confidence_level, window)
+    
+    def calculate_portfolio_stats(self, returns, weights, portfolio_value=1000000, context=None):
         """Calcul des statistiques du portefeuille"""
-        portfolio_returns = (returns * weights).sum(axis=1)
+        context = context or RiskContext.from_data(returns, weights)
+        portfolio_returns = context.portfolio_returns
         
         stats_dict = {
             'portfolio_value': portfolio_value,
-            'mean_daily_return': portfolio_returns.mean(),
-            'volatility': portfolio_returns.std(),
-            'sharpe_ratio': portfolio_returns.mean() / portfolio_returns.std() * np.sqrt(252),
+            'mean_daily_return': context.portfolio_mean,
+            'volatility': context.portfolio_std,
+            'sharpe_ratio': context.portfolio_mean / context.portfolio_std * np.sqrt(252),
             'skewness': portfolio_returns.skew(),
             'kurtosis': portfolio_returns.kurtosis(),
             'min_return': portfolio_returns.min(),
@@ -83,3 +259,75 @@ class VaRCalculator:
         }
         
         return stats_dict
+    
+    def batch_var(self, returns, weights_matrix, portfolio_value=1000000, context=None):
+        """VaR, ES et statistiques pour une matrice de poids (k portefeuilles x n actifs) en un seul appel"""
+        if context is not None:
+            returns_matrix = context.returns_matrix
+        else:
+            returns_matrix = np.asarray(returns, dtype=float)
+        weights_matrix = np.atleast_2d(np.asarray(weights_matrix, dtype=float))
+        n_obs = returns_matrix.shape[0]
+        n_portfolios = weights_matrix.shape[0]
+        
+        # Indices d'ordre encadrant le percentile (interpolation linéaire comme np.percentile)
+        position = (n_obs - 1) * (1 - self.confidence_level)
+        lower = int(np.floor(position))
+        upper = min(lower + 1, n_obs - 1)
+        fraction = position - lower
+        from scipy import stats
+        z_score = stats.norm.ppf(self.confidence_level)
+        
+        keys = ('var', 'es', 'parametric_var', 'mean', 'volatility', 'sharpe_ratio',
+                'skewness', 'kurtosis', 'min_return', 'max_return')
+        results = {key: np.empty(n_portfolios) for key in keys}
+        
+        # Traitement par blocs de portefeuilles pour borner la mémoire (n_obs x bloc)
+        for start in range(0, n_portfolios, self.batch_size):
+            stop = min(start + self.batch_size, n_portfolios)
+            # Toutes les séries de rendements du bloc en un seul produit matriciel,
+            # une ligne contiguë par portefeuille
+            portfolio_returns = weights_matrix[start:stop] @ returns_matrix.T
+            
+            # Sélection partielle au lieu d'un tri complet
+            partitioned = np.partition(portfolio_returns, [lower, upper], axis=1)
+            quantile = partitioned[:, lower] + (partitioned[:, upper] - partitioned[:, lower]) * fraction
+            
+            tail = portfolio_returns <= quantile[:, None]
+            tail_count = tail.sum(axis=1)
+            tail_sum = np.where(tail, portfolio_returns, 0.0).sum(axis=1)
+            tail_mean = np.where(tail_count > 0, tail_sum / np.maximum(tail_count, 1), quantile)
+            
+            # Moments centrés (skewness et kurtosis corrigées du biais, comme pandas)
+            mean = portfolio_returns.mean(axis=1)
+            centered = portfolio_returns - mean[:, None]
+            centered_sq = centered * centered
+            m2 = centered_sq.mean(axis=1)
+            m3 = (centered_sq * centered).mean(axis=1)
+            m4 = (centered_sq * centered_sq).mean(axis=1)
+            std = np.sqrt(m2 * n_obs / (n_obs - 1))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                g1 = m3 / m2 ** 1.5
+                g2 = m4 / m2 ** 2 - 3
+                skewness = np.sqrt(n_obs * (n_obs - 1)) / (n_obs - 2) * g1
+                kurtosis = (n_obs - 1) / ((n_obs - 2) * (n_obs - 3)) * ((n_obs + 1) * g2 + 6)
+                sharpe_ratio = mean / std * np.sqrt(252)
+            
+            block = slice(start, stop)
+            results['var'][block] = -quantile
+            results['es'][block] = -tail_mean
+            results['parametric_var'][block] = -(mean - z_score * std)
+            results['mean'][block] = mean
+            results['volatility'][block] = std
+            results['sharpe_ratio'][block] = sharpe_ratio
+            results['skewness'][block] = skewness
+            results['kurtosis'][block] = kurtosis
+            results['min_return'][block] = partitioned.min(axis=1)
+            results['max_return'][block] = partitioned.max(axis=1)
+        
+        results['var_value'] = results['var'] * portfolio_value
+        results['es_value'] = results['es'] * portfolio_value
+        results['parametric_var_value'] = results['parametric_var'] * portfolio_value
+        results['portfolio_value'] = portfolio_value
+        
+        return results
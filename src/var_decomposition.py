@@ -0,0 +1,140 @@
+# src/var_decomposition.py
+import numpy as np
+import pandas as pd
+from scipy import stats
+from risk_context import RiskContext
+
+def _percentile_along_axis0(matrix, q):
+    """Percentile par colonne par sélection partielle (interpolation linéaire, comme np.percentile)"""
+    n = matrix.shape[0]
+    position = (n - 1) * q / 100
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    partitioned = np.partition(matrix, [lower, upper], axis=0)
+    return partitioned[lower] + (partitioned[upper] - partitioned[lower]) * (position - lower)
+
+class VaRDecomposer:
+    """Décomposition de la VaR et de l'ES par actif : contributions marginales, par composante et incrémentales"""
+    # Nombre maximal d'éléments (scénarios x actifs) traités à la fois pour la VaR incrémentale
+    BLOCK_ELEMENTS = 4_000_000
+
+    def __init__(self, confidence_level=0.95, bandwidth=None):
+        self.confidence_level = confidence_level
+        self.bandwidth = bandwidth
+
+    def _table(self, assets, weights, marginal_var, incremental_var, marginal_es,
+               incremental_es, var, es, portfolio_value):
+        """Assemble le tableau de décomposition (montants en valeur de portefeuille)"""
+        component_var = weights * marginal_var
+        component_es = weights * marginal_es
+        table = pd.DataFrame({
+            'weight': weights,
+            'marginal_var': marginal_var * portfolio_value,
+            'component_var': component_var * portfolio_value,
+            'component_var_pct': component_var / var if var else np.nan,
+            'incremental_var': incremental_var * portfolio_value,
+            'marginal_es': marginal_es * portfolio_value,
+            'component_es': component_es * portfolio_value,
+            'component_es_pct': component_es / es if es else np.nan,
+            'incremental_es': incremental_es * portfolio_value
+        }, index=assets)
+        return {
+            'var': var,
+            'var_value': var * portfolio_value,
+            'es': es,
+            'es_value': es * portfolio_value,
+            'decomposition': table
+        }
+
+    def parametric(self, returns, weights, portfolio_value=1000000, covariance='sample', context=None,
+                   n_factors=5):
+        """Décomposition analytique (gradient de la VaR delta-normale à travers la covariance)"""
+        context = context or RiskContext.from_data(returns, weights)
+        w = context.weights
+        mu = context.mean_vector
+        # Même estimateur que VaRCalculator.parametric_var : les composantes somment à la VaR paramétrique
+        cov = context.covariance_model(covariance, n_factors=n_factors).matrix
+
+        alpha = 1 - self.confidence_level
+        z_score = stats.norm.ppf(self.confidence_level)
+        es_factor = stats.norm.pdf(z_score) / alpha
+
+        cov_w = cov @ w
+        sigma = np.sqrt(w @ cov_w)
+        mean = w @ mu
+        var = z_score * sigma - mean
+        es = es_factor * sigma - mean
+
+        # Gradients : dVaR/dw = z * (Sigma w) / sigma - mu
+        marginal_var = z_score * cov_w / sigma - mu
+        marginal_es = es_factor * cov_w / sigma - mu
+
+        # Retrait exact de chaque position, en forme fermée pour tous les actifs à la fois
+        sigma_without = np.sqrt(np.maximum(sigma ** 2 - 2 * w * cov_w + w ** 2 * np.diag(cov), 0.0))
+        mean_without = mean - w * mu
+        incremental_var = var - (z_score * sigma_without - mean_without)
+        incremental_es = es - (es_factor * sigma_without - mean_without)
+
+        return self._table(context.returns.columns, w, marginal_var, incremental_var,
+                           marginal_es, incremental_es, var, es, portfolio_value)
+
+    def historical(self, returns, weights, portfolio_value=1000000, context=None):
+        """Décomposition sur les scénarios historiques (attribution de queue lissée par noyau)"""
+        context = context or RiskContext.from_data(returns, weights)
+        return self.from_scenarios(context.returns_matrix, context.weights, portfolio_value,
+                                   assets=context.returns.columns)
+
+    def monte_carlo(self, mc_results, portfolio_value=None, assets=None):
+        """Décomposition sur les scénarios Monte-Carlo par actif (valeurs finales simulées)"""
+        initial_assets = np.asarray(mc_results['initial_asset_values'], dtype=float)
+        portfolio_value = portfolio_value or initial_assets.sum()
+        # Rendements par actif sur l'horizon ; un actif de poids nul n'a pas de rendement observable
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scenarios = mc_results['final_asset_values'] / initial_assets - 1
+        scenarios = np.where(initial_assets != 0, scenarios, 0.0)
+        return self.from_scenarios(scenarios, initial_assets / portfolio_value,
+                                   portfolio_value, assets=assets)
+
+    def from_scenarios(self, scenarios, weights, portfolio_value=1000000, assets=None):
+        """Décomposition à partir d'une matrice de scénarios (scénarios x actifs), en un seul passage"""
+        scenarios = np.asarray(scenarios, dtype=float)
+        w = np.asarray(weights, dtype=float)
+        n_scenarios, n_assets = scenarios.shape
+        q = (1 - self.confidence_level) * 100
+
+        portfolio = scenarios @ w
+        threshold = np.percentile(portfolio, q)
+        var = -threshold
+
+        # VaR marginale : espérance des rendements des actifs conditionnellement à
+        # une perte de portefeuille proche de la VaR, estimée par noyau gaussien
+        bandwidth = self.bandwidth
+        if bandwidth is None:
+            spread = min(portfolio.std(ddof=1),
+                         (np.percentile(portfolio, 75) - np.percentile(portfolio, 25)) / 1.34)
+            bandwidth = 0.9 * spread * n_scenarios ** (-0.2)
+        kernel = np.exp(-0.5 * ((portfolio - threshold) / bandwidth) ** 2)
+        marginal_var = -(kernel @ scenarios) / kernel.sum()
+
+        # ES marginale : espérance conditionnelle exacte dans la queue
+        tail = portfolio <= threshold
+        es = -portfolio[tail].mean()
+        marginal_es = -scenarios[tail].mean(axis=0)
+
+        # VaR/ES incrémentales : portefeuilles privés de chaque actif, traités par blocs d'actifs
+        incremental_var = np.empty(n_assets)
+        incremental_es = np.empty(n_assets)
+        block = max(1, self.BLOCK_ELEMENTS // max(n_scenarios, 1))
+        for start in range(0, n_assets, block):
+            stop = min(start + block, n_assets)
+            without = portfolio[:, None] - scenarios[:, start:stop] * w[start:stop]
+            thresholds = _percentile_along_axis0(without, q)
+            tail_without = without <= thresholds
+            tail_means = np.where(tail_without, without, 0.0).sum(axis=0) / tail_without.sum(axis=0)
+            incremental_var[start:stop] = var + thresholds
+            incremental_es[start:stop] = es + tail_means
+
+        if assets is None:
+            assets = [f'Actif {i + 1}' for i in range(n_assets)]
+        return self._table(assets, w, marginal_var, incremental_var,
+                           marginal_es, incremental_es, var, es, portfolio_value)
@@ -0,0 +1,180 @@
+# src/variance_reduction.py
+import warnings
+import numpy as np
+from scipy import stats
+from scipy.stats import qmc
+
+METHODS = ('plain', 'antithetic', 'sobol', 'importance', 'control_variate')
+# Nombre maximal de dimensions des suites de Sobol de scipy
+SOBOL_MAX_DIMENSION = getattr(qmc.Sobol, 'MAXDIM', 21201)
+
+def brownian_bridge_schedule(n_steps):
+    """Ordre de construction du pont brownien : (gauche, milieu, droite, poids gauche, poids droit, écart-type)"""
+    schedule = []
+    intervals = [(0, n_steps)]
+    while intervals:
+        left, right = intervals.pop(0)
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        schedule.append((left, mid, right,
+                         (right - mid) / (right - left),
+                         (mid - left) / (right - left),
+                         np.sqrt((mid - left) * (right - mid) / (right - left))))
+        intervals.append((left, mid))
+        intervals.append((mid, right))
+    return schedule
+
+def brownian_bridge_increments(z, schedule=None):
+    """Transforme des normales (trajectoires, pas, actifs) ordonnées par importance en incréments browniens"""
+    n_paths, n_steps, n_assets = z.shape
+    schedule = schedule or brownian_bridge_schedule(n_steps)
+    W = np.zeros((n_paths, n_steps + 1, n_assets))
+    # La première coordonnée (la mieux répartie en quasi-aléatoire) fixe le point terminal
+    W[:, n_steps] = np.sqrt(n_steps) * z[:, 0]
+    for k, (left, mid, right, w_left, w_right, std) in enumerate(schedule, start=1):
+        W[:, mid] = w_left * W[:, left] + w_right * W[:, right] + std * z[:, k]
+    return np.diff(W, axis=1)
+
+def weighted_quantile(values, weights, q):
+    """Quantile de la fonction de répartition pondérée F(x) = moyenne(poids * 1{valeur <= x})"""
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order]) / len(values)
+    index = min(int(np.searchsorted(cumulative, q, side='left')), len(values) - 1)
+    return values[order][index]
+
+class VarianceReducedSampler:
+    """Estimation de la VaR Monte-Carlo avec réduction de variance et erreur standard par réplications"""
+    def __init__(self, mean_returns, cholesky, initial_assets, n_steps, chunk_size=1000):
+        self.mean_returns = np.asarray(mean_returns, dtype=float)
+        self.L = np.asarray(cholesky, dtype=float)
+        self.initial_assets = np.asarray(initial_assets, dtype=float)
+        self.n_steps = n_steps
+        self.n_assets = len(self.initial_assets)
+        self.chunk_size = max(1, int(chunk_size))
+        self._bridge = brownian_bridge_schedule(n_steps)
+        # Étapes du pont brownien couvertes par la suite de Sobol (les premières, qui portent
+        # l'essentiel de la variance) ; les suivantes sont tirées en pseudo-aléatoire
+        self.sobol_steps = min(n_steps, SOBOL_MAX_DIMENSION // self.n_assets)
+
+        # Approximation linéaire du P&L : gaussienne de loi connue (VaR paramétrique)
+        exposure = self.L.T @ self.initial_assets
+        self.linear_mean = n_steps * (self.initial_assets @ self.mean_returns)
+        self.linear_std = np.sqrt(n_steps) * np.linalg.norm(exposure)
+        # Direction des pertes dans l'espace des chocs, pour l'échantillonnage préférentiel
+        self.loss_direction = -exposure / np.linalg.norm(exposure)
+
+    def _evaluate(self, Z):
+        """P&L exact et approximation linéaire pour un bloc de chocs normaux (trajectoires, pas, actifs)"""
+        asset_returns = self.mean_returns + Z @ self.L.T
+        final_assets = self.initial_assets * np.prod(1 + asset_returns, axis=1)
+        pnl = final_assets.sum(axis=1) - self.initial_assets.sum()
+        linear_pnl = asset_returns.sum(axis=1) @ self.initial_assets
+        return pnl, linear_pnl
+
+    def _draw(self, method, rng, n_paths, sobol=None, shift=0.0):
+        """Tire un bloc de chocs normaux selon la méthode choisie"""
+        shape = (n_paths, self.n_steps, self.n_assets)
+        if method == 'antithetic':
+            half = rng.standard_normal(((n_paths + 1) // 2, self.n_steps, self.n_assets))
+            return np.concatenate([half, -half], axis=0)[:n_paths]
+        if method == 'sobol':
+            with warnings.catch_warnings():
+                # Les effectifs qui ne sont pas des puissances de 2 restent valides
+                warnings.simplefilter('ignore', UserWarning)
+                uniforms = sobol.random(n_paths)
+            uniforms = np.clip(uniforms, 1e-12, 1 - 1e-12)
+            # Dimensions ordonnées par étape du pont brownien, puis par actif
+            z = np.empty(shape)
+            z[:, :self.sobol_steps] = stats.norm.ppf(uniforms).reshape(n_paths, self.sobol_steps,
+                                                                       self.n_assets)
+            z[:, self.sobol_steps:] = rng.standard_normal(
+                (n_paths, self.n_steps - self.sobol_steps, self.n_assets))
+            return brownian_bridge_increments(z, self._bridge)
+        Z = rng.standard_normal(shape)
+        if method == 'importance':
+            Z += shift * self.loss_direction
+        return Z
+
+    def replicate(self, method, rng, n_paths, confidence_level):
+        """Une réplication indépendante : renvoie l'estimation du quantile du P&L"""
+        if method not in METHODS:
+            raise ValueError(f"Méthode de réduction de variance inconnue : {method}")
+        alpha = 1 - confidence_level
+        z_alpha = stats.norm.ppf(alpha)
+
+        sobol = None
+        if method == 'sobol':
+            if self.sobol_steps == 0:
+                raise ValueError(f"Sobol impossible : {self.n_assets} actifs dépassent la limite de "
+                                 f"{SOBOL_MAX_DIMENSION} dimensions")
+            if self.sobol_steps < self.n_steps:
+                warnings.warn(
+                    f"Sobol limité à {SOBOL_MAX_DIMENSION} dimensions : {self.n_steps} pas x "
+                    f"{self.n_assets} actifs = {self.n_steps * self.n_assets} ; seules les "
+                    f"{self.sobol_steps} premières étapes du pont brownien sont quasi-aléatoires, "
+                    "les autres sont tirées en pseudo-aléatoire", RuntimeWarning)
+            sobol = qmc.Sobol(d=self.sobol_steps * self.n_assets, scramble=True, seed=rng)
+        # Décalage par pas tel que le P&L linéaire moyen se situe au quantile visé
+        shift = abs(z_alpha) / np.sqrt(self.n_steps) if method == 'importance' else 0.0
+
+        pnl_blocks, linear_blocks, log_lr_blocks = [], [], []
+        for start in range(0, n_paths, self.chunk_size):
+            size = min(self.chunk_size, n_paths - start)
+            Z = self._draw(method, rng, size, sobol, shift)
+            pnl, linear_pnl = self._evaluate(Z)
+            pnl_blocks.append(pnl)
+            linear_blocks.append(linear_pnl)
+            if method == 'importance':
+                # Rapport de vraisemblance N(0, I) / N(shift * v, I) sur l'ensemble des pas
+                projection = (Z @ self.loss_direction).sum(axis=1)
+                log_lr_blocks.append(-shift * projection + 0.5 * self.n_steps * shift ** 2)
+
+        pnl = np.concatenate(pnl_blocks)
+        if method == 'importance':
+            likelihood_ratio = np.exp(np.concatenate(log_lr_blocks))
+            return weighted_quantile(pnl, likelihood_ratio, alpha)
+
+        if method == 'control_variate':
+            # Variable de contrôle : P&L linéaire gaussien dont le quantile est connu
+            linear_pnl = np.concatenate(linear_blocks)
+            linear_quantile = self.linear_mean + z_alpha * self.linear_std
+            pnl_quantile = np.percentile(pnl, alpha * 100)
+            indicator_x = (pnl <= pnl_quantile).astype(float)
+            indicator_y = (linear_pnl <= linear_quantile).astype(float)
+            variance_y = indicator_y.var()
+            beta = np.cov(indicator_x, indicator_y)[0, 1] / variance_y if variance_y > 0 else 0.0
+            # Niveau corrigé : F_X(q) = alpha + beta * (F_Y(q_Y) - alpha)
+            adjusted = np.clip(alpha + beta * (indicator_y.mean() - alpha), 0.0, 1.0)
+            return np.percentile(pnl, adjusted * 100)
+
+        return np.percentile(pnl, alpha * 100)
+
+    def estimate_var(self, method, seed_sequence, n_paths, confidence_level=0.95, n_replications=10):
+        """VaR moyenne sur des réplications indépendantes, avec erreur standard et intervalle de confiance"""
+        n_replications = max(2, int(n_replications))
+        paths_per_replication = max(1, n_paths // n_replications)
+        quantiles = np.array([
+            self.replicate(method, np.random.default_rng(child), paths_per_replication,
+                           confidence_level)
+            for child in seed_sequence.spawn(n_replications)
+        ])
+
+        var_values = -quantiles
+        var_value = var_values.mean()
+        standard_error = var_values.std(ddof=1) / np.sqrt(n_replications)
+        t_score = stats.t.ppf(0.975, n_replications - 1)
+        initial_value = self.initial_assets.sum()
+
+        return {
+            'var': var_value / initial_value,
+            'var_value': var_value,
+            'standard_error': standard_error,
+            'confidence_interval': (var_value - t_score * standard_error,
+                                    var_value + t_score * standard_error),
+            'relative_error': standard_error / abs(var_value) if var_value else np.inf,
+            'replications': var_values,
+            'n_paths': paths_per_replication * n_replications,
+            'method': method,
+            'confidence_level': confidence_level
+        }
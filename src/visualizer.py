@@ -1,79 +1,161 @@
 # src/visualizer.py
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 import numpy as np
 import pandas as pd
-import warnings
-warnings.filterwarnings('ignore')
 
-# Configuration du style matplotlib
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+def _update_digest(digest, obj):
+    """Alimente l'empreinte avec une représentation canonique des données d'entrée d'un graphique"""
+    if isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode('utf-8'))
+            _update_digest(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _update_digest(digest, item)
+    elif isinstance(obj, (pd.Series, pd.DataFrame)):
+        digest.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(str(obj.dtype).encode('utf-8') + str(obj.shape).encode('utf-8'))
+        # Lecture directe du tampon (tableaux projetés en mémoire compris), sans copie
+        digest.update(np.ascontiguousarray(obj).data)
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+def _render_job(settings, method_name, args, kwargs):
+    """Trace un graphique dans un processus worker (mode sans affichage)"""
+    visualizer = RiskVisualizer(headless=True, dpi=settings['dpi'])
+    getattr(visualizer, method_name)(*args, **kwargs)
+    return kwargs.get('save_path')
 
 class RiskVisualizer:
-    def __init__(self):
+    # Niveaux de quantiles du graphique en éventail
+    FAN_LEVELS = (5, 25, 50, 75, 95)
+    MANIFEST_FILE = '.render_manifest.json'
+    
+    def __init__(self, headless=False, dpi=300, n_workers=1, cache_dir=None):
         self.fig_size = (12, 8)
+        self.headless = headless
+        self.dpi = dpi
+        self.n_workers = n_workers
+        self.cache_dir = cache_dir
+    
+    def _pyplot(self):
+        """Importe pyplot à la demande, avec le moteur Agg en mode sans affichage"""
+        import matplotlib
+        if self.headless:
+            matplotlib.use('Agg', force=True)
+        import matplotlib.pyplot as plt
+        return plt
+    
+    @contextmanager
+    def _style(self):
+        """Applique le style des graphiques le temps d'un tracé, sans modifier l'état global"""
+        plt = self._pyplot()
+        try:
+            import seaborn as sns
+        except ImportError:
+            sns = None
+        with plt.style.context('seaborn-v0_8'):
+            if sns is None:
+                yield plt
+            else:
+                with sns.color_palette("husl"):
+                    yield plt
+    
+    def _finish(self, plt, fig, save_path):
+        """Enregistre la figure, l'affiche hors mode sans affichage, puis libère la mémoire"""
+        if save_path:
+            fig.savefig(save_path, dpi=self.dpi, bbox_inches='tight')
+        if not self.headless:
+            plt.show()
+        plt.close(fig)
     
     def plot_returns_distribution(self, returns, var_results, save_path=None):
         """Trace la distribution des rendements et la VaR"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-        
-        # Graphique de gauche : histogramme de la distribution des rendements
-        ax1.hist(returns, bins=50, alpha=0.7, density=True, edgecolor='black')
-        ax1.axvline(-var_results['historical']['var'], color='red', 
-                   linestyle='--', linewidth=2, label=f"VaR {var_results['confidence_level']*100}%")
-        ax1.axvline(-var_results['expected_shortfall']['es'], color='darkred', 
-                   linestyle='--', linewidth=2, label='Expected Shortfall')
-        ax1.set_xlabel('Rendement journalier')
-        ax1.set_ylabel('Fréquence')
-        ax1.set_title('Distribution des rendements du portefeuille et mesures de risque')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # Graphique de droite : QQ-plot pour tester la normalité
         from scipy import stats
-        stats.probplot(returns, dist="norm", plot=ax2)
-        ax2.set_title('QQ-plot des rendements (test de normalité)')
-        
-        plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        with self._style() as plt:
+            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+            
+            # Graphique de gauche : histogramme de la distribution des rendements
+            ax1.hist(returns, bins=50, alpha=0.7, density=True, edgecolor='black')
+            ax1.axvline(-var_results['historical']['var'], color='red', 
+                       linestyle='--', linewidth=2, label=f"VaR {var_results['confidence_level']*100}%")
+            ax1.axvline(-var_results['expected_shortfall']['es'], color='darkred', 
+                       linestyle='--', linewidth=2, label='Expected Shortfall')
+            ax1.set_xlabel('Rendement journalier')
+            ax1.set_ylabel('Fréquence')
+            ax1.set_title('Distribution des rendements du portefeuille et mesures de risque')
+            ax1.legend()
+            ax1.grid(True, alpha=0.3)
+            
+            # Graphique de droite : QQ-plot pour tester la normalité
+            stats.probplot(returns, dist="norm", plot=ax2)
+            ax2.set_title('QQ-plot des rendements (test de normalité)')
+            
+            fig.tight_layout()
+            self._finish(plt, fig, save_path)
     
-    def plot_monte_carlo_simulations(self, mc_results, save_path=None):
-        """Trace les résultats de la simulation Monte-Carlo"""
+    def plot_monte_carlo_simulations(self, mc_results, save_path=None, fan_chart=True):
+        """Trace les résultats de la simulation Monte-Carlo (éventail de quantiles et échantillon de trajectoires)"""
+        from matplotlib.collections import LineCollection
         simulations = mc_results['simulations']
         
-        plt.figure(figsize=self.fig_size)
-        
-        # Tracer un échantillon de trajectoires
-        n_paths_to_plot = 100
-        for i in range(min(n_paths_to_plot, simulations.shape[1])):
-            plt.plot(simulations[:, i], alpha=0.1, color='blue')
+        # Abscisses : pas de temps conservés (sous-échantillonnés en mode flux)
+        path_times = mc_results.get('path_times')
+        if path_times is None:
+            path_times = np.arange(simulations.shape[0])
         
-        # Tracer la trajectoire moyenne et le niveau de VaR
-        mean_path = simulations.mean(axis=1)
-        initial_value = simulations[0, 0]
-        var_level = initial_value * (1 - mc_results['var'])
-        
-        plt.plot(mean_path, color='red', linewidth=2, label='Trajectoire moyenne')
-        plt.axhline(var_level, color='darkred', linestyle='--', 
-                   linewidth=2, label=f"VaR {mc_results['confidence_level']*100}%")
-        plt.axhline(initial_value, color='green', linestyle='-', 
-                   linewidth=2, label='Valeur initiale')
-        
-        plt.xlabel('Temps (jours)')
-        plt.ylabel('Valeur du portefeuille')
-        plt.title('Simulation Monte-Carlo - Trajectoires de la valeur du portefeuille')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        with self._style() as plt:
+            fig, ax = plt.subplots(figsize=self.fig_size)
+            
+            if fan_chart:
+                # Éventail de quantiles calculé sur toutes les trajectoires
+                quantile_paths = mc_results.get('quantile_paths')
+                if quantile_paths is None:
+                    # Quantiles date par date : évite de copier tout le tenseur des trajectoires
+                    quantile_paths = pd.DataFrame(
+                        [np.percentile(row, self.FAN_LEVELS) for row in simulations],
+                        index=path_times, columns=list(self.FAN_LEVELS)
+                    )
+                # Dates des quantiles : grille éventuellement plus éclaircie que les trajectoires
+                band_times = quantile_paths.index.to_numpy()
+                ax.fill_between(band_times, quantile_paths[5], quantile_paths[95],
+                                color='blue', alpha=0.15, label='Quantiles 5 %-95 %')
+                ax.fill_between(band_times, quantile_paths[25], quantile_paths[75],
+                                color='blue', alpha=0.3, label='Quantiles 25 %-75 %')
+            
+            # Échantillon de trajectoires tracé en une seule collection de lignes
+            n_paths_to_plot = 100
+            sample = simulations[:, :n_paths_to_plot]
+            segments = np.stack([np.broadcast_to(path_times[:, None], sample.shape), sample], axis=-1)
+            ax.add_collection(LineCollection(segments.transpose(1, 0, 2), colors='blue',
+                                             alpha=0.05 if fan_chart else 0.1, linewidths=1))
+            
+            # Tracer la trajectoire moyenne et le niveau de VaR
+            mean_path = mc_results.get('mean_path')
+            if mean_path is None:
+                mean_path = simulations.mean(axis=1, dtype=np.float64)
+            initial_value = simulations[0, 0]
+            var_level = initial_value * (1 - mc_results['var'])
+            
+            ax.plot(path_times, mean_path, color='red', linewidth=2, label='Trajectoire moyenne')
+            ax.axhline(var_level, color='darkred', linestyle='--', 
+                       linewidth=2, label=f"VaR {mc_results['confidence_level']*100}%")
+            ax.axhline(initial_value, color='green', linestyle='-', 
+                       linewidth=2, label='Valeur initiale')
+            ax.autoscale_view()
+            
+            ax.set_xlabel('Temps (jours)')
+            ax.set_ylabel('Valeur du portefeuille')
+            ax.set_title('Simulation Monte-Carlo - Trajectoires de la valeur du portefeuille')
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+            
+            self._finish(plt, fig, save_path)
     
     def plot_var_comparison(self, var_results, save_path=None):
         """Compare les résultats de VaR obtenus par différentes méthodes"""
@@ -84,25 +166,82 @@ class RiskVisualizer:
             var_results['monte_carlo']['var_value']
         ]
         
-        plt.figure(figsize=(10, 6))
-        bars = plt.bar(methods, var_values, color=['skyblue', 'lightcoral', 'lightgreen'])
-        
-        plt.ylabel('VaR (en valeur)')
-        plt.title('Comparaison des méthodes de calcul de la VaR')
+        with self._style() as plt:
+            fig, ax = plt.subplots(figsize=(10, 6))
+            bars = ax.bar(methods, var_values, color=['skyblue', 'lightcoral', 'lightgreen'])
+            
+            ax.set_ylabel('VaR (en valeur)')
+            ax.set_title('Comparaison des méthodes de calcul de la VaR')
+            
+            # Ajouter des étiquettes de valeur sur les barres
+            for bar, value in zip(bars, var_values):
+                ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1000,
+                        f'{value:,.0f} $', ha='center', va='bottom')
+            
+            ax.grid(True, alpha=0.3, axis='y')
+            
+            self._finish(plt, fig, save_path)
+    
+    def _input_hash(self, method_name, args, kwargs):
+        """Empreinte des données d'entrée d'un graphique"""
+        digest = hashlib.blake2b(digest_size=16)
+        _update_digest(digest, [method_name, self.dpi, list(args),
+                                {k: v for k, v in kwargs.items() if k != 'save_path'}])
+        return digest.hexdigest()
+    
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, self.MANIFEST_FILE)
+    
+    def _read_manifest(self):
+        if not self.cache_dir or not os.path.exists(self._manifest_path()):
+            return {}
+        with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def render_all(self, jobs):
+        """Trace une liste de graphiques (nom de méthode, args, kwargs) en parallèle, en sautant ceux dont les entrées n'ont pas changé"""
+        manifest = self._read_manifest()
+        pending = []
+        skipped = []
+        for method_name, args, kwargs in jobs:
+            save_path = kwargs.get('save_path')
+            input_hash = self._input_hash(method_name, args, kwargs)
+            # Saut réservé au rendu sans affichage : en mode interactif, la figure doit être montrée
+            if (self.headless and self.cache_dir and save_path and manifest.get(save_path) == input_hash
+                    and os.path.exists(save_path)):
+                skipped.append(save_path)
+                continue
+            pending.append((method_name, args, kwargs, input_hash))
         
-        # Ajouter des étiquettes de valeur sur les barres
-        for bar, value in zip(bars, var_values):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1000,
-                    f'{value:,.0f} $', ha='center', va='bottom')
+        settings = {'dpi': self.dpi}
+        if self.headless and self.n_workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(pending))) as executor:
+                futures = [executor.submit(_render_job, settings, method_name, args, kwargs)
+                           for method_name, args, kwargs, _ in pending]
+                for future in futures:
+                    future.result()
+        else:
+            for method_name, args, kwargs, _ in pending:
+                getattr(self, method_name)(*args, **kwargs)
         
-        plt.grid(True, alpha=0.3, axis='y')
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for method_name, args, kwargs, input_hash in pending:
+                if kwargs.get('save_path'):
+                    manifest[kwargs['save_path']] = input_hash
+            with open(self._manifest_path(), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        return {'rendered': [job[2].get('save_path') for job in pending], 'skipped': skipped}
     
     def plot_interactive_var_analysis(self, returns, var_results, mc_results):
         """Crée une visualisation interactive (Plotly)"""
+        if self.headless:
+            # Aucun affichage possible : la figure Plotly ne serait jamais vue
+            return None
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
         fig = make_subplots(
             rows=2, cols=2,
             subplot_titles=('Distribution des rendements et VaR', 'Simulation Monte-Carlo',
@@ -126,9 +265,15 @@ class RiskVisualizer:
         
         # Simulation Monte-Carlo (affichage d'un sous-ensemble de trajectoires)
         simulations = mc_results['simulations']
+        path_times = mc_results.get('path_times')
+        if path_times is None:
+            path_times = np.arange(simulations.shape[0])
+        mean_path = mc_results.get('mean_path')
+        if mean_path is None:
+            mean_path = simulations.mean(axis=1)
         for i in range(min(50, simulations.shape[1])):
             fig.add_trace(
-                go.Scatter(y=simulations[:, i], mode='lines',
+                go.Scatter(x=path_times, y=simulations[:, i], mode='lines',
                           line=dict(width=1, color='lightblue'),
                           showlegend=False),
                 row=1, col=2
@@ -136,7 +281,7 @@ class RiskVisualizer:
         
         # Trajectoire moyenne
         fig.add_trace(
-            go.Scatter(y=simulations.mean(axis=1), mode='lines',
+            go.Scatter(x=path_times, y=mean_path, mode='lines',
                       line=dict(width=3, color='red'), name='Trajectoire moyenne'),
             row=1, col=2
         )
@@ -158,3 +303,4 @@ class RiskVisualizer:
         fig.update_layout(height=800, title_text="Tableau de bord de l'analyse des risques du portefeuille")
 
         fig.show()
+        return fig
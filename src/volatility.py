@@ -0,0 +1,169 @@
+# src/volatility.py
+import numpy as np
+
+VOLATILITY_METHODS = ('ewma', 'garch')
+
+def garch_filter(residuals, omega, alpha, beta, initial_variance):
+    """Récursion σ²_t = ω + α e²_{t-1} + β σ²_{t-1} vectorisée sur les actifs ; renvoie les variances et la prévision suivante"""
+    residuals = np.asarray(residuals, dtype=float)
+    shape = np.broadcast(omega, alpha, beta, initial_variance).shape
+    variances = np.empty((len(residuals),) + shape)
+    variance = np.broadcast_to(initial_variance, shape).astype(float)
+    squared = residuals ** 2
+    for t in range(len(residuals)):
+        variances[t] = variance
+        variance = omega + alpha * squared[t] + beta * variance
+    return variances, variance
+
+def garch_log_likelihood(residuals, omega, alpha, beta, initial_variance):
+    """Log-vraisemblance gaussienne (constantes omises) de la récursion GARCH, cumulée pas à pas sans conserver les variances"""
+    residuals = np.asarray(residuals, dtype=float)
+    shape = np.broadcast(omega, alpha, beta, initial_variance).shape
+    variance = np.broadcast_to(initial_variance, shape).astype(float)
+    log_likelihood = np.zeros(shape)
+    squared = residuals ** 2
+    for t in range(len(residuals)):
+        log_likelihood -= 0.5 * (np.log(variance) + squared[t] / variance)
+        variance *= beta
+        variance += omega + alpha * squared[t]
+    return log_likelihood
+
+def fit_garch(residuals, alphas=None, betas=None, refine=True):
+    """Estimation GARCH(1,1) par maximum de vraisemblance gaussienne sur grille, tous actifs à la fois"""
+    # Variance de long terme ciblée sur la variance empirique : ω = s² (1 - α - β)
+    residuals = np.asarray(residuals, dtype=float)
+    n_assets = residuals.shape[1]
+    sample_variance = residuals.var(axis=0)
+    alphas = np.linspace(0.01, 0.30, 15) if alphas is None else np.asarray(alphas, dtype=float)
+    betas = np.linspace(0.50, 0.98, 25) if betas is None else np.asarray(betas, dtype=float)
+
+    def evaluate(alpha_grid, beta_grid):
+        # Grilles (points x actifs), évaluées en une seule récursion ; les points non stationnaires sont exclus.
+        # La vraisemblance est cumulée dans la récursion : mémoire en O(points x actifs), indépendante de T
+        valid = alpha_grid + beta_grid < 0.999
+        omega = sample_variance * np.where(valid, 1 - alpha_grid - beta_grid, 1.0)
+        log_likelihood = garch_log_likelihood(residuals, omega, alpha_grid, beta_grid, sample_variance)
+        log_likelihood = np.where(valid, log_likelihood, -np.inf)
+        best = log_likelihood.argmax(axis=0)
+        columns = np.arange(n_assets)
+        return alpha_grid[best, columns], beta_grid[best, columns], log_likelihood[best, columns]
+
+    alpha_grid, beta_grid = np.meshgrid(alphas, betas, indexing='ij')
+    alpha_grid = np.repeat(alpha_grid.reshape(-1, 1), n_assets, axis=1)
+    beta_grid = np.repeat(beta_grid.reshape(-1, 1), n_assets, axis=1)
+    alpha, beta, log_likelihood = evaluate(alpha_grid, beta_grid)
+
+    if refine:
+        # Grille fine centrée sur l'optimum de chaque actif (un pas grossier de part et d'autre)
+        alpha_step = (alphas[-1] - alphas[0]) / max(len(alphas) - 1, 1)
+        beta_step = (betas[-1] - betas[0]) / max(len(betas) - 1, 1)
+        offsets = np.linspace(-1, 1, 9)
+        d_alpha, d_beta = np.meshgrid(offsets * alpha_step, offsets * beta_step, indexing='ij')
+        alpha_fine = np.clip(alpha + d_alpha.reshape(-1, 1), 1e-4, 0.999)
+        beta_fine = np.clip(beta + d_beta.reshape(-1, 1), 0.0, 0.999)
+        alpha, beta, log_likelihood = evaluate(alpha_fine, beta_fine)
+
+    omega = sample_variance * (1 - alpha - beta)
+    return {'omega': omega, 'alpha': alpha, 'beta': beta, 'log_likelihood': log_likelihood}
+
+def _correlation_from(Q):
+    """Normalise une matrice de quasi-corrélation Q en matrice de corrélation"""
+    scale = 1 / np.sqrt(np.diag(Q))
+    return Q * np.outer(scale, scale)
+
+class DCCCorrelation:
+    """Corrélation dynamique de type DCC : Q_t = (1 - a - b) Q̄ + a z z' + b Q_{t-1}"""
+    def __init__(self, a=0.05, b=0.93):
+        if a < 0 or b < 0 or a + b >= 1:
+            raise ValueError("Paramètres DCC invalides : a, b >= 0 et a + b < 1 requis")
+        self.a = a
+        self.b = b
+        self.Q_bar = None
+        self.Q = None
+
+    def fit(self, standardized_residuals):
+        """Filtre la corrélation sur l'historique des résidus standardisés (T x actifs)"""
+        z = np.asarray(standardized_residuals, dtype=float)
+        self.Q_bar = z.T @ z / len(z)
+        self.Q = self.Q_bar.copy()
+        for row in z:
+            self.Q = (1 - self.a - self.b) * self.Q_bar + self.a * np.outer(row, row) + self.b * self.Q
+        return self
+
+    def update(self, z):
+        """Intègre les résidus standardisés d'une nouvelle date en O(actifs²)"""
+        z = np.asarray(z, dtype=float)
+        self.Q = (1 - self.a - self.b) * self.Q_bar + self.a * np.outer(z, z) + self.b * self.Q
+        return self
+
+    @property
+    def correlation(self):
+        """Prévision de la matrice de corrélation du jour suivant"""
+        return _correlation_from(self.Q)
+
+class VolatilityEngine:
+    """Volatilités conditionnelles EWMA (RiskMetrics) ou GARCH(1,1) par actif, et corrélation DCC"""
+    def __init__(self, method='garch', lam=0.94, dcc_a=0.05, dcc_b=0.93):
+        if method not in VOLATILITY_METHODS:
+            raise ValueError(f"Modèle de volatilité inconnu : {method}")
+        self.method = method
+        self.lam = lam
+        self.dcc = DCCCorrelation(dcc_a, dcc_b)
+        self._history = []
+
+    def fit(self, returns):
+        """Ajuste le modèle sur l'historique des rendements (T x actifs)"""
+        returns = np.asarray(returns, dtype=float)
+        self.mean = returns.mean(axis=0)
+        residuals = returns - self.mean
+        sample_variance = residuals.var(axis=0)
+
+        if self.method == 'ewma':
+            # RiskMetrics : GARCH intégré sans constante
+            self.omega = np.zeros(returns.shape[1])
+            self.alpha = np.full(returns.shape[1], 1 - self.lam)
+            self.beta = np.full(returns.shape[1], self.lam)
+        else:
+            params = fit_garch(residuals)
+            self.omega, self.alpha, self.beta = params['omega'], params['alpha'], params['beta']
+
+        self.variances, self.forecast_variance = garch_filter(
+            residuals, self.omega, self.alpha, self.beta, sample_variance
+        )
+        self._residuals = residuals / np.sqrt(self.variances)
+        self._history = []
+        self.dcc.fit(self._residuals)
+        return self
+
+    def update(self, new_returns):
+        """Intègre une nouvelle date de rendements sans réestimer l'historique (O(actifs²))"""
+        residual = np.asarray(new_returns, dtype=float) - self.mean
+        standardized = residual / np.sqrt(self.forecast_variance)
+        self._history.append(standardized)
+        self.dcc.update(standardized)
+        self.forecast_variance = (self.omega + self.alpha * residual ** 2
+                                  + self.beta * self.forecast_variance)
+        return self
+
+    @property
+    def standardized_residuals(self):
+        """Résidus standardisés e_t / σ_t de tout l'historique, dates ajoutées comprises"""
+        if self._history:
+            self._residuals = np.vstack([self._residuals] + self._history)
+            self._history = []
+        return self._residuals
+
+    @property
+    def forecast_volatility(self):
+        """Prévision de la volatilité quotidienne de chaque actif pour le jour suivant"""
+        return np.sqrt(self.forecast_variance)
+
+    @property
+    def forecast_covariance(self):
+        """Prévision de la matrice de covariance du jour suivant (volatilités GARCH/EWMA et corrélation DCC)"""
+        volatility = self.forecast_volatility
+        return self.dcc.correlation * np.outer(volatility, volatility)
+
+    def filtered_scenarios(self):
+        """Scénarios de rendements par simulation historique filtrée : résidus standardisés remis à l'échelle de la volatilité prévue"""
+        return self.mean + self.standardized_residuals * self.forecast_volatility
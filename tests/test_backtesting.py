@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from backtesting import VaRBacktester
+from var_calculator import VaRCalculator
+
+class TestVaRBacktester(unittest.TestCase):
+
+    def setUp(self):
+        """Configure les données de test"""
+        np.random.seed(42)
+        self.returns = pd.Series(np.random.standard_t(4, 800) * 0.01,
+                                 index=pd.bdate_range('2020-01-01', periods=800))
+        self.backtester = VaRBacktester(confidence_level=0.95, window=250)
+
+    def test_rolling_series_match_full_recomputation(self):
+        """Teste les séries glissantes contre un recalcul complet sur chaque fenêtre"""
+        series = self.backtester.rolling_var(self.returns)
+        calculator = VaRCalculator(confidence_level=0.95)
+        self.assertEqual(len(series), 550)
+
+        for t in (250, 251, 499, 500, 799):
+            window = self.returns.iloc[t - 250:t]
+            row = series.loc[self.returns.index[t]]
+            expected_var = -np.percentile(window, 5)
+            expected_es = calculator.calculate_expected_shortfall(window, 1)['es']
+            self.assertAlmostEqual(row['historical_var'], expected_var, places=12)
+            self.assertAlmostEqual(row['historical_es'], expected_es, places=12)
+            self.assertAlmostEqual(row['parametric_var'],
+                                   -(window.mean() - 1.6448536269514722 * window.std()),
+                                   places=10)
+
+    def test_exception_tests(self):
+        """Teste les statistiques de Kupiec et de Christoffersen"""
+        exceptions = np.zeros(250, dtype=bool)
+        exceptions[::25] = True
+        kupiec = self.backtester.kupiec_test(exceptions)
+        self.assertEqual(kupiec['exceptions'], 10)
+        self.assertAlmostEqual(kupiec['lr_statistic'], 0.5634, places=3)
+        christoffersen = self.backtester.christoffersen_test(exceptions)
+        self.assertEqual(christoffersen['transitions']['n11'], 0)
+        self.assertGreaterEqual(christoffersen['lr_conditional_coverage'], kupiec['lr_statistic'])
+
+        result = self.backtester.backtest(self.returns)
+        self.assertIn('historical_exception', result['series'])
+        self.assertEqual(set(result['tests']), {'historical', 'parametric', 'ewma'})
+
+if __name__ == '__main__':
+    unittest.main()
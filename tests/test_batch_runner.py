@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from batch_runner import PortfolioBatchRunner, _evaluate_block
+from monte_carlo import MonteCarloSimulator
+from var_calculator import VaRCalculator
+
+class TestPortfolioBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        """Configure les données de test"""
+        np.random.seed(8)
+        self.returns = pd.DataFrame(np.random.normal(0.0005, 0.015, (600, 4)),
+                                    columns=['AAA', 'BBB', 'CCC', 'DDD'])
+        self.portfolios = {
+            'prudent': {'AAA': 0.2, 'DDD': 0.8},
+            'equilibre': {'AAA': 0.25, 'BBB': 0.25, 'CCC': 0.25, 'DDD': 0.25},
+            'dynamique': {'BBB': 0.7, 'CCC': 0.3, 'ZZZ': 0.1}
+        }
+
+    def test_batch_results_match_single_portfolio_calculations(self):
+        """Teste la table consolidée contre les calculs portefeuille par portefeuille"""
+        simulator = MonteCarloSimulator(n_simulations=2000, time_horizon=5, random_seed=1)
+        calculator = VaRCalculator(0.95)
+        tables = []
+        for n_workers, block_size in ((1, 256), (2, 1)):
+            runner = PortfolioBatchRunner(None, simulator, n_workers=n_workers,
+                                          block_size=block_size)
+            tables.append(runner.evaluate(self.returns, self.portfolios))
+        pd.testing.assert_frame_equal(tables[0], tables[1])
+
+        results = tables[0]
+        self.assertEqual(list(results.index), list(self.portfolios))
+        self.assertEqual(results.loc['dynamique', 'missing_symbols'], 'ZZZ')
+        for name, allocation in self.portfolios.items():
+            weights = np.array([allocation.get(symbol, 0.0) for symbol in self.returns.columns])
+            expected = calculator.historical_var(self.returns, weights)
+            self.assertAlmostEqual(results.loc[name, 'historical_var_value'],
+                                   expected['var_value'], places=6)
+        # Simulation sur time_horizon - 1 pas quotidiens
+        self.assertTrue((results['monte_carlo_4d_var_value'] > 0).all())
+
+    def test_short_history_only_truncates_its_holders(self):
+        """Un titre récemment coté ne réduit que l'historique des portefeuilles qui le détiennent"""
+        returns = self.returns.copy()
+        returns.iloc[:400, 2] = np.nan
+        simulator = MonteCarloSimulator(n_simulations=2000, time_horizon=5, random_seed=1)
+        for n_workers in (1, 2):
+            results = PortfolioBatchRunner(None, simulator, n_workers=n_workers,
+                                           block_size=1).evaluate(returns, self.portfolios)
+            self.assertEqual(results.loc['prudent', 'observations'], 600)
+            self.assertEqual(results.loc['equilibre', 'observations'], 200)
+            self.assertEqual(results.loc['dynamique', 'observations'], 200)
+
+        calculator = VaRCalculator(0.95)
+        expected = calculator.historical_var(self.returns, np.array([0.2, 0.0, 0.0, 0.8]))
+        self.assertAlmostEqual(results.loc['prudent', 'historical_var_value'], expected['var_value'], places=6)
+        expected = calculator.historical_var(returns.dropna(), np.array([0.25, 0.25, 0.25, 0.25]))
+        self.assertAlmostEqual(results.loc['equilibre', 'historical_var_value'], expected['var_value'], places=6)
+        self.assertTrue(np.isfinite(results['monte_carlo_4d_var_value']).all())
+
+        # Actifs de mêmes dates complètes : un seul bloc vectorisé pour tous les portefeuilles
+        runner = PortfolioBatchRunner(None, simulator, n_workers=1)
+        blocks = []
+        def spy(task):
+            blocks.append(len(task[0]))
+            return _evaluate_block(task)
+        with mock.patch('batch_runner._evaluate_block', spy):
+            runner.evaluate(self.returns, {'a': {'AAA': 1.0}, 'b': {'BBB': 1.0}, 'c': {'CCC': 0.5, 'DDD': 0.5}})
+        self.assertEqual(blocks, [3])
+
+        # Actifs sans aucune date commune : erreur explicite
+        disjoint = self.returns.copy()
+        disjoint.iloc[:300, 0] = np.nan
+        disjoint.iloc[300:, 1] = np.nan
+        with self.assertRaisesRegex(ValueError, 'Aucun historique commun'):
+            runner.evaluate(disjoint, {'a': {'AAA': 0.5, 'BBB': 0.5}})
+
+if __name__ == '__main__':
+    unittest.main()
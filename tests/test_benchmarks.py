@@ -0,0 +1,38 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from run_benchmarks import case_key, compare_to_baseline, expand_grid, _isolated_case
+
+class TestBenchmarks(unittest.TestCase):
+    def test_expand_grid(self):
+        """La grille est développée en produit cartésien avec des clés stables"""
+        cases = list(expand_grid({'historical_var': {'n_assets': [2, 4], 'n_obs': [100]}}))
+        self.assertEqual(len(cases), 2)
+        self.assertEqual(case_key(*cases[0]), 'historical_var[n_assets=2,n_obs=100]')
+
+    def test_compare_to_baseline(self):
+        """Seules les dégradations au-delà du seuil sont signalées"""
+        baseline = {'results': [{'key': 'a', 'wall_time': 1.0}, {'key': 'b', 'wall_time': 1.0},
+                                {'key': 'c', 'wall_time': 0.001}]}
+        results = [{'key': 'a', 'wall_time': 1.1}, {'key': 'b', 'wall_time': 1.5},
+                   {'key': 'c', 'wall_time': 0.01}, {'key': 'd', 'wall_time': 9.0}]
+        regressions = compare_to_baseline(results, baseline, threshold=0.25)
+        self.assertEqual([r['key'] for r in regressions], ['b'])
+        self.assertAlmostEqual(regressions[0]['ratio'], 1.5)
+
+    def test_run_case(self):
+        """Un petit cas s'exécute et renvoie temps, débit et mémoire"""
+        wall_time, units, unit, peak_rss = _isolated_case(
+            ('correlated_mc_streaming', {'n_assets': 3, 'n_simulations': 200, 'horizon': 5}, 1))
+        self.assertGreater(wall_time, 0)
+        self.assertEqual((units, unit), (200, 'paths/s'))
+        if sys.platform == 'win32':
+            self.assertIsNone(peak_rss)
+        else:
+            self.assertGreater(peak_rss, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from covariance import (CovarianceModel, ledoit_wolf_covariance, ewma_covariance,
+                        nearest_positive_definite)
+from risk_context import RiskContext
+from monte_carlo import MonteCarloSimulator
+
+try:
+    from sklearn.covariance import ledoit_wolf
+except ImportError:
+    ledoit_wolf = None
+
+class TestCovariance(unittest.TestCase):
+
+    def setUp(self):
+        """Rendements issus d'un modèle à trois facteurs sur quarante actifs"""
+        rng = np.random.default_rng(0)
+        self.loadings = rng.normal(0, 0.008, (40, 3))
+        self.returns = (rng.standard_normal((1500, 3)) @ self.loadings.T
+                        + rng.normal(0, 0.005, (1500, 40)))
+
+    @unittest.skipIf(ledoit_wolf is None, "scikit-learn non installé")
+    def test_ledoit_wolf_matches_sklearn(self):
+        """L'estimateur de Ledoit-Wolf reproduit celui de scikit-learn"""
+        matrix, shrinkage = ledoit_wolf_covariance(self.returns[:60])
+        expected, expected_shrinkage = ledoit_wolf(self.returns[:60])
+        np.testing.assert_allclose(matrix, expected)
+        self.assertAlmostEqual(shrinkage, expected_shrinkage)
+
+    def test_estimators_and_repair(self):
+        """Ledoit-Wolf reste définie positive avec moins d'observations que d'actifs ; réparation par écrêtage"""
+        matrix, shrinkage = ledoit_wolf_covariance(self.returns[:20])
+        self.assertTrue(0 < shrinkage <= 1)
+        self.assertGreater(np.linalg.eigvalsh(matrix).min(), 0)
+
+        ewma = ewma_covariance(self.returns, lam=1.0)
+        np.testing.assert_allclose(ewma, np.cov(self.returns, rowvar=False, ddof=0))
+
+        broken = np.array([[1.0, 0.9, -0.2], [0.9, 1.0, 0.95], [-0.2, 0.95, 1.0]])
+        self.assertLess(np.linalg.eigvalsh(broken).min(), 0)
+        repaired = nearest_positive_definite(broken)
+        self.assertGreater(np.linalg.eigvalsh(repaired).min(), 0)
+        np.testing.assert_allclose(CovarianceModel(broken).cholesky @ CovarianceModel(broken).cholesky.T,
+                                   repaired, atol=1e-10)
+
+    def test_factor_model_variance_without_dense_matrix(self):
+        """Le modèle factoriel approche la covariance sans former la matrice dense"""
+        model = CovarianceModel.fit(self.returns, 'factor', n_factors=3)
+        self.assertEqual(model.loadings.shape, (40, 3))
+        weights = np.random.default_rng(1).dirichlet(np.ones(40), size=10)
+        variance = model.portfolio_variance(weights)
+        self.assertNotIn('matrix', model.__dict__)
+
+        sample = np.cov(self.returns, rowvar=False)
+        np.testing.assert_allclose(variance, np.einsum('ij,jk,ik->i', weights, sample, weights), rtol=0.05)
+        np.testing.assert_allclose(variance, model.portfolio_variance(weights[0:1]).tolist()
+                                   + model.portfolio_variance(weights[1:]).tolist())
+        shocks = model.sample(np.random.default_rng(2), 200000)
+        np.testing.assert_allclose(np.cov(shocks, rowvar=False), model.matrix, atol=5e-6)
+
+    def test_context_cholesky_fallback_and_factor_simulation(self):
+        """Covariance singulière : repli sur Ledoit-Wolf sans scikit-learn ; simulation factorielle"""
+        returns = pd.DataFrame(self.returns[:20])
+        context = RiskContext(returns, np.full(40, 1 / 40))
+        L = context.cholesky
+        np.testing.assert_allclose(L @ L.T, ledoit_wolf_covariance(returns)[0], atol=1e-12)
+        self.assertIs(context.covariance_model('factor', n_factors=3),
+                      context.covariance_model('factor', n_factors=3))
+
+        weights = {i: 1 / 40 for i in range(40)}
+        simulator = MonteCarloSimulator(n_simulations=20000, time_horizon=2, n_workers=1)
+        returns = pd.DataFrame(self.returns)
+        factor = simulator.scenario_mc_simulation(returns, weights, generator='factor', n_factors=3)
+        gaussian = simulator.scenario_mc_simulation(returns, weights, generator='gaussian')
+        self.assertAlmostEqual(factor['final_values'].std() / gaussian['final_values'].std(), 1, delta=0.05)
+
+    def test_simulator_uses_configured_covariance(self):
+        """Les simulations corrélées tirent leurs chocs dans le modèle de covariance du simulateur"""
+        returns = pd.DataFrame(self.returns)
+        weights = {i: 1 / 40 for i in range(40)}
+        context = RiskContext.from_data(returns, np.full(40, 1 / 40))
+        reference = MonteCarloSimulator(n_simulations=4000, time_horizon=2, n_workers=1)
+        sample = reference.parallel_mc_simulation(returns, weights, context=context)
+        explicit = MonteCarloSimulator(n_simulations=4000, time_horizon=2, n_workers=1,
+                                       covariance='ledoit_wolf').parallel_mc_simulation(
+                                           returns, weights, context=context)
+        self.assertNotEqual(sample['final_values'][0], explicit['final_values'][0])
+
+        # Modèle factoriel : mêmes tirages que le générateur factoriel de scenario_mc_simulation
+        simulator = MonteCarloSimulator(n_simulations=4000, time_horizon=2, n_workers=1,
+                                        covariance='factor', n_factors=3)
+        factor = simulator.parallel_mc_simulation(returns, weights, context=context)
+        expected = simulator.scenario_mc_simulation(returns, weights, generator='factor', n_factors=3,
+                                                    context=context)
+        np.testing.assert_allclose(factor['final_values'], expected['final_values'])
+        streaming = simulator.correlated_mc_streaming(returns, weights, n_paths_to_keep=5, context=context)
+        self.assertAlmostEqual(streaming['final_values'].std() / factor['final_values'].std(), 1, delta=0.1)
+        gbm = simulator.simulate_gbm_streaming(returns, np.full(40, 1 / 40), context=context)
+        self.assertAlmostEqual(gbm['final_values'].std() / factor['final_values'].std(), 1, delta=0.1)
+        horizons = simulator.multi_horizon_var(returns, weights, horizons=(1,), context=context)
+        self.assertAlmostEqual(horizons['horizons'].loc[1, 'var_value'],
+                               simulator.monte_carlo_var(factor)['var_value'], places=6)
+
+    def test_parametric_and_simulations_share_one_factor_fit(self):
+        """VaR paramétrique, Cornish-Fisher et simulations utilisent le même modèle factoriel"""
+        from var_calculator import VaRCalculator
+        returns = pd.DataFrame(self.returns)
+        weights = np.full(40, 1 / 40)
+        context = RiskContext(returns, weights)
+        calculator = VaRCalculator(0.95)
+        simulator = MonteCarloSimulator(n_simulations=2000, time_horizon=2, n_workers=1,
+                                        covariance='factor', n_factors=2)
+        parametric = calculator.parametric_var(returns, weights, covariance='factor', n_factors=2,
+                                               context=context)
+        cornish_fisher = calculator.cornish_fisher_var(returns, weights, covariance='factor', n_factors=2,
+                                                       context=context)
+        self.assertAlmostEqual(parametric['std'], simulator._portfolio_volatility(context), places=15)
+        self.assertAlmostEqual(cornish_fisher['std'][0], parametric['std'], places=15)
+        self.assertEqual(list(context._covariance_models), [('factor', (('n_factors', 2),))])
+
+        # Générateur gaussien et échantillonneur à réduction de variance sur la covariance du simulateur
+        simulator.scenario_mc_simulation(returns, dict(enumerate(weights)), generator='gaussian',
+                                         context=context)
+        simulator.variance_reduced_var(returns, dict(enumerate(weights)), n_replications=2, context=context)
+        self.assertEqual(list(context._covariance_models), [('factor', (('n_factors', 2),))])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from data_loader import DataLoader
+from price_cache import PriceSource
+from bulk_downloader import BulkDownloader, RateLimiter
+import config
+import main
+
+class FakePriceSource(PriceSource):
+    """Source de prix locale enregistrant les requêtes reçues"""
+    def __init__(self, end='2024-12-31'):
+        dates = pd.bdate_range('2020-01-01', end, tz='America/New_York')
+        self.prices = pd.Series(100 + np.arange(len(dates), dtype=float), index=dates)
+        self.calls = []
+
+    def fetch(self, symbol, start_date, end_date):
+        self.calls.append((symbol, start_date, end_date))
+        index = self.prices.index.tz_localize(None)
+        mask = (index >= pd.Timestamp(start_date)) & (index < pd.Timestamp(end_date))
+        return self.prices[mask]
+
+class FlakyPriceSource(FakePriceSource):
+    """Source locale qui échoue un nombre donné de fois par symbole"""
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = dict(failures)
+
+    def fetch(self, symbol, start_date, end_date):
+        if self.failures.get(symbol, 0) > 0:
+            self.failures[symbol] -= 1
+            raise ConnectionError("délai dépassé")
+        if symbol == 'NEW':
+            return super().fetch(symbol, '2024-01-01', end_date)
+        if symbol == 'EMPTY':
+            return self.prices.iloc[:0]
+        return super().fetch(symbol, start_date, end_date)
+
+class TestDataLoader(unittest.TestCase):
+
+    def setUp(self):
+        """Configure un répertoire de cache temporaire"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache_fetches_only_missing_tail(self):
+        """Teste que seule la fin manquante est téléchargée lors d'un second passage"""
+        source = FakePriceSource()
+        loader = DataLoader('2021-01-01', '2024-06-01', source=source, cache_dir=self.cache_dir)
+        first = loader.download_market_data(['AAA', 'BBB'])
+        self.assertEqual(len(source.calls), 2)
+
+        loader = DataLoader('2021-01-01', '2024-07-01', source=source, cache_dir=self.cache_dir)
+        second = loader.download_market_data(['AAA', 'BBB'])
+        # Fin manquante précédée des cinq dernières cotations en cache (recouvrement)
+        self.assertEqual(sorted(source.calls[2:]), [('AAA', '2024-05-27', '2024-07-01'),
+                                                    ('BBB', '2024-05-27', '2024-07-01')])
+        pd.testing.assert_frame_equal(second.loc[first.index], first)
+        self.assertEqual(second.index[-1], pd.Timestamp('2024-06-28'))
+
+        # Même date de fin : aucun nouvel appel à la source
+        loader.download_market_data(['AAA', 'BBB'])
+        self.assertEqual(len(source.calls), 4)
+
+    def test_cache_refetches_restated_or_earlier_history(self):
+        """Cours ajustés recalculés ou début demandé plus tôt : historique complet retéléchargé"""
+        source = FakePriceSource()
+        DataLoader('2022-01-01', '2024-06-01', source=source,
+                   cache_dir=self.cache_dir).download_market_data(['AAA'])
+
+        # Dividende : la source recalcule tous les cours antérieurs
+        source.prices = source.prices * 0.98
+        loader = DataLoader('2022-01-01', '2024-07-01', source=source, cache_dir=self.cache_dir)
+        prices = loader.download_market_data(['AAA'])
+        self.assertEqual(source.calls[-1], ('AAA', '2022-01-01', '2024-07-01'))
+        expected = source.fetch('AAA', '2022-01-01', '2024-07-01')
+        np.testing.assert_allclose(prices['AAA'].to_numpy(), expected.to_numpy())
+
+        # Début plus ancien que le cache, même date de fin
+        n_calls = len(source.calls)
+        loader = DataLoader('2021-01-01', '2024-07-01', source=source, cache_dir=self.cache_dir)
+        prices = loader.download_market_data(['AAA'])
+        self.assertEqual(source.calls[n_calls], ('AAA', '2021-01-01', '2024-07-01'))
+        self.assertEqual(prices.index[0], pd.Timestamp('2021-01-01'))
+
+        # Titre coté après la date demandée : pas de nouveau téléchargement complet
+        flaky = FlakyPriceSource({})
+        for _ in range(2):
+            DataLoader('2021-01-01', '2024-07-01', source=flaky,
+                       cache_dir=self.cache_dir).download_market_data(['NEW'])
+        self.assertEqual(len(flaky.calls), 1)
+
+    def test_offline_mode_reads_cache_only(self):
+        """Teste le mode hors ligne"""
+        source = FakePriceSource()
+        DataLoader('2021-01-01', '2024-06-01', source=source,
+                   cache_dir=self.cache_dir).download_market_data(['AAA'])
+
+        offline_source = FakePriceSource()
+        loader = DataLoader('2022-01-01', '2024-06-01', source=offline_source,
+                            cache_dir=self.cache_dir, offline=True)
+        prices = loader.download_market_data(['AAA', 'ZZZ'])
+        self.assertEqual(offline_source.calls, [])
+        self.assertEqual(list(prices.columns), ['AAA'])
+        self.assertEqual(prices.index[0], pd.Timestamp('2022-01-03'))
+
+    def test_bulk_download_retries_and_reports(self):
+        """Teste les reprises avec attente exponentielle et le rapport de téléchargement"""
+        delays = []
+        source = FlakyPriceSource({'AAA': 2, 'DEAD': 10})
+        downloader = BulkDownloader(max_workers=4, max_retries=3, backoff=0.5,
+                                    jitter=0, sleep=delays.append)
+        loader = DataLoader('2021-01-01', '2024-06-01', source=source, downloader=downloader)
+        prices, report = loader.bulk_download(['AAA', 'BBB', 'NEW', 'EMPTY', 'DEAD'])
+
+        self.assertEqual(list(prices.columns), ['AAA', 'BBB', 'NEW'])
+        self.assertEqual(report['succeeded'], ['AAA', 'BBB', 'NEW'])
+        self.assertEqual(report['attempts']['AAA'], 3)
+        self.assertEqual(report['attempts']['DEAD'], 4)
+        self.assertEqual(sorted(report['missing']), ['DEAD', 'EMPTY'])
+        self.assertIn('délai dépassé', report['missing']['DEAD'])
+        self.assertEqual(list(report['partial']), ['NEW'])
+        self.assertEqual(sorted(delays), [0.5, 0.5, 1.0, 1.0, 2.0])
+
+    def test_rate_limiter_spaces_requests(self):
+        """Teste que le limiteur de débit espace les requêtes"""
+        clock = [0.0]
+        def sleep(seconds):
+            clock[0] += seconds
+        limiter = RateLimiter(4, clock=lambda: clock[0], sleep=sleep)
+        for _ in range(5):
+            limiter.acquire()
+        self.assertAlmostEqual(clock[0], 1.0)
+
+    def test_price_source_requires_fetch(self):
+        """Teste qu'une source de prix sans fetch ne peut pas être instanciée"""
+        class IncompleteSource(PriceSource):
+            pass
+        with self.assertRaises(TypeError):
+            IncompleteSource()
+
+    def test_loader_shares_one_pooled_session(self):
+        """Teste que le chargeur configuré crée une seule session HTTP, dimensionnée au nombre de workers"""
+        session = object()
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                mock.patch.object(config.Config, 'PRICE_CACHE_DIR', cache_dir), \
+                mock.patch('price_cache.pooled_session', return_value=session) as factory:
+            with mock.patch.object(config.Config, 'OFFLINE_MODE', False):
+                loader = main.build_data_loader()
+            factory.assert_called_once_with(config.Config.DOWNLOAD_WORKERS)
+            self.assertIs(loader.source.session, session)
+
+            with mock.patch.object(config.Config, 'OFFLINE_MODE', True):
+                self.assertIsNone(main.build_data_loader().source.session)
+            factory.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
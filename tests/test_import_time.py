@@ -0,0 +1,42 @@
+import unittest
+import sys
+import os
+import json
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+
+import config
+
+# Modules lourds qui ne doivent être chargés que par les étapes qui les utilisent
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'plotly', 'yfinance', 'sklearn', 'scipy')
+
+IMPORT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, 'src')
+start = time.perf_counter()
+import main, data_loader, var_calculator, monte_carlo, risk_context, visualizer, report_generator
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+class TestImportTime(unittest.TestCase):
+
+    def _measure(self):
+        """Mesure le temps d'import dans un interpréteur neuf"""
+        output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_heavy_dependencies_are_lazy(self):
+        """Teste qu'aucune dépendance lourde n'est chargée à l'import des modules"""
+        self.assertEqual(self._measure()['loaded'], [])
+
+    def test_startup_within_budget(self):
+        """Teste que le temps d'import reste sous le budget de démarrage"""
+        elapsed = min(self._measure()['elapsed'] for _ in range(3))
+        self.assertLess(elapsed, config.Config.IMPORT_TIME_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
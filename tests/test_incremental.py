@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from var_calculator import VaRCalculator
+from incremental import IncrementalRiskState
+
+class TestIncrementalRiskState(unittest.TestCase):
+
+    def setUp(self):
+        """Prix simulés de trois actifs, avec une cotation manquante"""
+        rng = np.random.default_rng(0)
+        self.prices = pd.DataFrame(
+            100 * np.cumprod(1 + rng.normal(0.0005, 0.01, (600, 3)), axis=0),
+            columns=['A', 'B', 'C'], index=pd.bdate_range('2020-01-01', periods=600)
+        )
+        self.prices.iloc[520, 1] = np.nan
+        self.weights = {'A': 0.5, 'B': 0.3, 'C': 0.2}
+        self.calculator = VaRCalculator(0.95)
+
+    def _expected(self, returns):
+        weights = np.array(list(self.weights.values()))
+        return (self.calculator.historical_var(returns, weights),
+                self.calculator.parametric_var(returns, weights),
+                self.calculator.calculate_portfolio_stats(returns, weights))
+
+    def test_daily_updates_match_full_recomputation(self):
+        """Les mises à jour date par date reproduisent le calcul complet"""
+        state = self.calculator.incremental_state(self.prices.iloc[:500], self.weights)
+        for date in self.prices.index[500:]:
+            metrics = state.update(self.prices.loc[date])
+
+        historical, parametric, portfolio_stats = self._expected(self.prices.pct_change().dropna())
+        self.assertEqual(metrics['observations'], 597)
+        self.assertAlmostEqual(metrics['historical']['var'], historical['var'], places=14)
+        self.assertAlmostEqual(metrics['parametric']['var'], parametric['var'], places=14)
+        for key in ('volatility', 'skewness', 'kurtosis', 'min_return', 'max_return'):
+            self.assertAlmostEqual(metrics['portfolio_stats'][key], portfolio_stats[key], places=10)
+
+    def test_rolling_window_and_persistence(self):
+        """La fenêtre glissante et l'état rechargé donnent les mêmes indicateurs"""
+        state = IncrementalRiskState.from_prices(self.prices.iloc[:550], self.weights, window=250)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.npz')
+            state.save(path)
+            restored = IncrementalRiskState.load(path)
+        # Les dates déjà intégrées sont ignorées
+        metrics = restored.update(self.prices.iloc[500:])
+
+        returns = self.prices.pct_change().dropna().iloc[-250:]
+        historical, parametric, _ = self._expected(returns)
+        self.assertEqual(metrics['observations'], 250)
+        self.assertEqual(metrics['date'], self.prices.index[-1])
+        self.assertAlmostEqual(metrics['historical']['var'], historical['var'], places=14)
+        self.assertAlmostEqual(metrics['parametric']['var'], parametric['var'], places=12)
+
+    def test_warm_up_and_periodic_resync(self):
+        """Aucun indicateur avant quatre rendements ; les sommes sont resynchronisées sur la fenêtre"""
+        state = IncrementalRiskState(self.prices.columns, self.weights, window=20)
+        self.assertIsNone(state.update(self.prices.iloc[:4]))
+        self.assertIsNotNone(state.update(self.prices.iloc[4:5]))
+
+        # Pic de prix sorti de la fenêtre : sans resynchronisation, les produits croisés
+        # garderaient l'erreur d'arrondi de rendements de l'ordre de 1e6
+        prices = self.prices.iloc[:81].copy()
+        prices.iloc[10] *= 1e6
+        state = IncrementalRiskState.from_prices(prices, self.weights, window=20)
+        self.assertEqual(state.removals, 60)
+        returns = prices.pct_change().dropna().iloc[-20:]
+        np.testing.assert_allclose(state.covariance, returns.cov().to_numpy(), rtol=1e-12)
+        metrics = state.metrics()
+        self.assertAlmostEqual(metrics['portfolio_stats']['skewness'],
+                               self._expected(returns)[2]['skewness'], places=10)
+
+if __name__ == '__main__':
+    unittest.main()
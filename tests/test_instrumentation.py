@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from instrumentation import Instrumentation, HOT_METHODS
+from var_calculator import VaRCalculator
+from monte_carlo import MonteCarloSimulator
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.returns = pd.DataFrame(np.random.normal(0.0005, 0.01, (300, 3)), columns=['A', 'B', 'C'])
+        self.weights = np.array([0.5, 0.3, 0.2])
+
+    def test_nested_stages_and_memory(self):
+        """Les étapes imbriquées sont mesurées séparément, pic mémoire compris"""
+        instrumentation = Instrumentation(track_memory=True)
+        with instrumentation.stage('outer'):
+            with instrumentation.stage('inner'):
+                block = np.ones(1_000_000)
+            del block
+        stages = {row['stage']: row for row in instrumentation.summary()}
+        self.assertEqual(stages['inner']['calls'], 1)
+        self.assertGreaterEqual(stages['inner']['peak_memory_bytes'], 8_000_000)
+        self.assertGreaterEqual(stages['outer']['peak_memory_bytes'], stages['inner']['peak_memory_bytes'])
+        self.assertGreaterEqual(stages['outer']['wall_time'], stages['inner']['wall_time'])
+
+    def test_instrumented_methods_and_export(self):
+        """Les méthodes instrumentées renvoient les mêmes résultats et alimentent les exports"""
+        instrumentation = Instrumentation()
+        calculator = instrumentation.instrument(VaRCalculator(0.95))
+        simulator = instrumentation.instrument(MonteCarloSimulator(n_simulations=500, time_horizon=5))
+        expected = VaRCalculator(0.95).historical_var(self.returns, self.weights)
+        self.assertEqual(calculator.historical_var(self.returns, self.weights)['var'], expected['var'])
+        simulator.simulate_gbm_streaming(self.returns, self.weights, 1000000)
+
+        stages = {row['stage']: row for row in instrumentation.summary()}
+        self.assertEqual(stages['MonteCarloSimulator.simulate_gbm_streaming']['counters']['paths'], 500)
+        self.assertGreater(stages['VaRCalculator.historical_var']['array_bytes'], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            instrumentation.export(os.path.join(directory, 'metrics.json'))
+            instrumentation.export(os.path.join(directory, 'metrics.prom'))
+            with open(os.path.join(directory, 'metrics.json'), encoding='utf-8') as f:
+                self.assertEqual(len(json.load(f)['stages']), 2)
+            with open(os.path.join(directory, 'metrics.prom'), encoding='utf-8') as f:
+                prometheus = f.read()
+        self.assertIn('var_pipeline_wall_seconds{stage="VaRCalculator.historical_var"}', prometheus)
+        self.assertIn('var_pipeline_paths{stage="MonteCarloSimulator.simulate_gbm_streaming"} 500', prometheus)
+
+    def test_hot_methods_cover_public_calculations(self):
+        """Toutes les méthodes de calcul publiques sont instrumentées et toutes les méthodes listées existent"""
+        for cls, excluded in ((VaRCalculator, set()), (MonteCarloSimulator, {'cleanup_storage'})):
+            public = {name for name, value in vars(cls).items()
+                      if callable(value) and not name.startswith('_')}
+            self.assertEqual(set(HOT_METHODS[cls.__name__]), public - excluded)
+
+    def test_profile_single_stage(self):
+        """Le profileur n'est activé que pour l'étape demandée"""
+        with tempfile.TemporaryDirectory() as directory:
+            instrumentation = Instrumentation(profile_stage='VaRCalculator.parametric_var',
+                                              profile_dir=directory)
+            calculator = instrumentation.instrument(VaRCalculator(0.95))
+            calculator.historical_var(self.returns, self.weights)
+            calculator.parametric_var(self.returns, self.weights)
+            self.assertEqual(os.listdir(directory), ['VaRCalculator_parametric_var.prof'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import numpy as np
+import pandas as pd
+from monte_carlo import MonteCarloSimulator
+
+class TestMonteCarloSimulator(unittest.TestCase):
+
+    def setUp(self):
+        """Configure les données de test"""
+        rng = np.random.RandomState(0)
+        self.returns = pd.DataFrame(
+            rng.multivariate_normal([0.0005, 0.0003, 0.0004],
+                                    [[4e-4, 1e-4, 5e-5],
+                                     [1e-4, 2.25e-4, 3e-5],
+                                     [5e-5, 3e-5, 1e-4]], 500),
+            columns=['A', 'B', 'C']
+        )
+        self.weights = {'A': 0.5, 'B': 0.3, 'C': 0.2}
+
+    def _reference_simulation(self, n_simulations, time_horizon, seed):
+        """Boucle trajectoire par trajectoire d'origine, servant de référence"""
+        np.random.seed(seed)
+        L = np.linalg.cholesky(self.returns.cov())
+        n_assets = len(self.weights)
+        simulations = np.zeros((time_horizon, n_simulations, n_assets))
+        portfolio_values = np.zeros((time_horizon, n_simulations))
+        for i in range(n_simulations):
+            Z = np.random.normal(0, 1, (time_horizon, n_assets))
+            correlated_Z = Z @ L.T
+            asset_paths = np.zeros((time_horizon, n_assets))
+            asset_paths[0] = 1000000 * np.array(list(self.weights.values()))
+            for t in range(1, time_horizon):
+                returns_t = self.returns.mean().values * 1 + correlated_Z[t] * np.sqrt(1)
+                asset_paths[t] = asset_paths[t-1] * (1 + returns_t)
+            simulations[:, i, :] = asset_paths
+            portfolio_values[:, i] = asset_paths.sum(axis=1)
+        return portfolio_values, simulations
+
+    def test_correlated_simulation_matches_reference(self):
+        """Teste l'identité bit à bit avec la boucle d'origine, quelle que soit la taille des blocs"""
+        expected_values, expected_paths = self._reference_simulation(37, 20, seed=7)
+        for chunk_size in (1, 8, 37, 1000):
+            simulator = MonteCarloSimulator(n_simulations=37, time_horizon=20,
+                                            random_seed=7, chunk_size=chunk_size)
+            values, paths = simulator.correlated_mc_simulation(
+                self.returns, self.weights, 1000000
+            )
+            np.testing.assert_array_equal(values, expected_values)
+            np.testing.assert_array_equal(paths, expected_paths)
+
+    def test_streaming_gbm_matches_full_simulation(self):
+        """Teste que le mode flux reproduit les valeurs finales et la VaR de simulate_gbm"""
+        weights = np.array(list(self.weights.values()))
+        full = MonteCarloSimulator(n_simulations=500, time_horizon=30, random_seed=3)
+        simulations = full.simulate_gbm(self.returns, weights, 1000000)
+        streaming = MonteCarloSimulator(n_simulations=500, time_horizon=30, random_seed=3)
+        result = streaming.simulate_gbm_streaming(self.returns, weights, 1000000,
+                                                  n_paths_to_keep=10, path_stride=7)
+
+        np.testing.assert_array_equal(result['final_values'], simulations[-1])
+        np.testing.assert_array_equal(result['sample_paths'],
+                                      simulations[result['path_times'], :10])
+        self.assertEqual(list(result['path_times']), [0, 7, 14, 21, 28, 29])
+
+        full_var = full.monte_carlo_var(simulations, 0.95)
+        streaming_var = streaming.monte_carlo_var(result, 0.95)
+        self.assertEqual(full_var['var_value'], streaming_var['var_value'])
+        self.assertEqual(streaming_var['simulations'].shape, (6, 10))
+
+    def test_correlated_streaming_keeps_terminal_state_only(self):
+        """Teste la simulation corrélée en flux"""
+        simulator = MonteCarloSimulator(n_simulations=2000, time_horizon=10, random_seed=1)
+        result = simulator.correlated_mc_streaming(self.returns, self.weights, 1000000,
+                                                   n_paths_to_keep=5)
+
+        self.assertEqual(result['final_asset_values'].shape, (2000, 3))
+        self.assertEqual(result['sample_paths'].shape, (10, 5))
+        np.testing.assert_allclose(result['final_values'],
+                                   result['final_asset_values'].sum(axis=1))
+        mc_var = simulator.monte_carlo_var(result, 0.95)
+        self.assertGreater(mc_var['var_value'], 0)
+
+    def test_streaming_quantiles_on_thinned_grid(self):
+        """Teste que les quantiles par date sont calculés sur une grille éclaircie incluant l'échéance"""
+        simulator = MonteCarloSimulator(n_simulations=500, time_horizon=252, random_seed=1)
+        result = simulator.correlated_mc_streaming(self.returns, self.weights, 1000000)
+        quantiles = result['quantile_paths']
+        self.assertLessEqual(len(quantiles), 65)
+        self.assertEqual(quantiles.index[-1], 251)
+        np.testing.assert_allclose(quantiles.loc[251].to_numpy(),
+                                   np.percentile(result['final_values'], [5, 25, 50, 75, 95]))
+
+    def test_parallel_simulation_independent_of_worker_count(self):
+        """Teste le déterminisme de la simulation parallèle quel que soit le nombre de workers"""
+        results = []
+        for n_workers, backend in ((1, 'thread'), (3, 'thread'), (2, 'process')):
+            simulator = MonteCarloSimulator(n_simulations=1000, time_horizon=10,
+                                            random_seed=11, chunk_size=128,
+                                            n_workers=n_workers, backend=backend)
+            results.append(simulator.parallel_mc_simulation(self.returns, self.weights, 1000000))
+
+        for result in results[1:]:
+            np.testing.assert_array_equal(result['final_values'], results[0]['final_values'])
+        self.assertEqual(results[0]['final_asset_values'].shape, (1000, 3))
+
+        mc_var = MonteCarloSimulator().monte_carlo_var(results[0], 0.95)
+        self.assertGreater(mc_var['var_value'], 0)
+        self.assertEqual(len(mc_var['pnl_distribution']), 1000)
+
+    def test_variance_reduction_methods_agree(self):
+        """Teste que les méthodes de réduction de variance convergent vers la même VaR"""
+        simulator = MonteCarloSimulator(n_simulations=20000, time_horizon=11,
+                                        random_seed=5, chunk_size=2000)
+        reference = simulator.variance_reduced_var(self.returns, self.weights, 1000000,
+                                                   method='plain', n_replications=10)
+        self.assertEqual(reference['n_paths'], 20000)
+        low, high = reference['confidence_interval']
+        self.assertLess(low, reference['var_value'])
+        self.assertGreater(high, reference['var_value'])
+
+        for method in ('antithetic', 'sobol', 'importance', 'control_variate'):
+            result = simulator.variance_reduced_var(self.returns, self.weights, 1000000,
+                                                    method=method, n_replications=10)
+            tolerance = 4 * np.hypot(result['standard_error'], reference['standard_error'])
+            self.assertAlmostEqual(result['var_value'], reference['var_value'], delta=tolerance)
+            self.assertGreater(result['standard_error'], 0)
+
+        with self.assertRaises(ValueError):
+            simulator.variance_reduced_var(self.returns, self.weights, method='unknown')
+        
+        # Au-delà de la limite de dimensions de Sobol : seules les premières étapes du pont
+        # brownien sont quasi-aléatoires, avec un avertissement explicite
+        import variance_reduction
+        from unittest import mock
+        with mock.patch.object(variance_reduction, 'SOBOL_MAX_DIMENSION', 12):
+            with self.assertWarns(RuntimeWarning):
+                hybrid = simulator.variance_reduced_var(self.returns, self.weights, 1000000,
+                                                        method='sobol', n_replications=10)
+        tolerance = 4 * np.hypot(hybrid['standard_error'], reference['standard_error'])
+        self.assertAlmostEqual(hybrid['var_value'], reference['var_value'], delta=tolerance)
+
+    def test_adaptive_simulation_stops_at_tolerance(self):
+        """Teste l'arrêt de la simulation adaptative à la précision demandée ou au budget"""
+        simulator = MonteCarloSimulator(n_simulations=1000, time_horizon=10,
+                                        random_seed=4, chunk_size=500)
+        loose = simulator.adaptive_mc_var(self.returns, self.weights, 1000000,
+                                          rel_tolerance=0.05, max_paths=50000)
+        self.assertTrue(loose['converged'])
+        self.assertLess(loose['n_paths'], 50000)
+        self.assertLessEqual(loose['convergence_trace']['relative_half_width'].iloc[-1], 0.05)
+        low, high = loose['confidence_interval']
+        self.assertLessEqual(low, loose['var_value'])
+        self.assertGreaterEqual(high, loose['var_value'])
+
+        strict = simulator.adaptive_mc_var(self.returns, self.weights, 1000000,
+                                           rel_tolerance=1e-4, max_paths=3000)
+        self.assertFalse(strict['converged'])
+        self.assertEqual(strict['n_paths'], 3000)
+        self.assertEqual(len(strict['convergence_trace']), 6)
+
+    def test_multi_horizon_var_single_pass(self):
+        """Teste la VaR Monte-Carlo multi-horizons : le dernier horizon coïncide avec la simulation terminale"""
+        simulator = MonteCarloSimulator(n_simulations=3000, time_horizon=11, random_seed=6,
+                                        chunk_size=1000)
+        result = simulator.multi_horizon_var(self.returns, self.weights, 1000000, horizons=(10, 1, 5))
+        table = result['horizons']
+        self.assertEqual(list(table.index), [1, 5, 10])
+        self.assertEqual(result['pnl_distribution'].shape, (3000, 3))
+
+        terminal = simulator.monte_carlo_var(
+            simulator.parallel_mc_simulation(self.returns, self.weights, 1000000, n_workers=1))
+        self.assertAlmostEqual(table.loc[10, 'var_value'], terminal['var_value'], places=6)
+        self.assertTrue(table['var_value'].is_monotonic_increasing)
+        self.assertTrue((table['es_value'] >= table['var_value']).all())
+
+        for horizons in ((0, 5), (-1,), (12,), ()):
+            with self.assertRaises(ValueError):
+                simulator.multi_horizon_var(self.returns, self.weights, 1000000, horizons=horizons)
+
+    def test_float32_and_memmap_storage(self):
+        """Teste le stockage float32 projeté en mémoire : mêmes tirages, VaR en float64, vues sans copie"""
+        reference = MonteCarloSimulator(n_simulations=2000, time_horizon=30, random_seed=5)
+        expected_paths = reference.simulate_gbm(self.returns, self.weights, 1000000)
+        expected = reference.monte_carlo_var(expected_paths)
+
+        with tempfile.TemporaryDirectory() as directory:
+            simulator = MonteCarloSimulator(n_simulations=2000, time_horizon=30, random_seed=5,
+                                            dtype=np.float32, storage_dir=directory)
+            simulations = simulator.simulate_gbm(self.returns, self.weights, 1000000)
+            self.assertIsInstance(simulations, np.memmap)
+            self.assertEqual(simulations.dtype, np.float32)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            result = simulator.monte_carlo_var(simulations)
+            self.assertIs(result['simulations'], simulations)
+            self.assertTrue(np.shares_memory(result['final_values'], simulations))
+            self.assertEqual(result['pnl_distribution'].dtype, np.float64)
+            self.assertAlmostEqual(result['var_value'], expected['var_value'],
+                                   delta=1e-5 * expected['var_value'])
+
+            portfolio_values, asset_paths = simulator.correlated_mc_simulation(
+                self.returns, self.weights, 1000000)
+            self.assertEqual(asset_paths.dtype, np.float32)
+            self.assertEqual(len(os.listdir(directory)), 3)
+
+            del simulations, result, portfolio_values, asset_paths
+            simulator.cleanup_storage()
+            self.assertEqual(os.listdir(directory), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import json
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from var_calculator import VaRCalculator
+from risk_service import RiskService, ResultCache, make_server
+
+class TestRiskService(unittest.TestCase):
+
+    def setUp(self):
+        """Service résident sur des rendements simulés, servi sur un port libre de localhost"""
+        rng = np.random.default_rng(0)
+        self.returns = pd.DataFrame(rng.normal(0.0005, 0.01, (750, 3)), columns=['A', 'B', 'C'])
+        self.service = RiskService(self.returns, n_simulations=2000, max_wait=0.02).warm([1])
+        self.server = make_server(self.service, '127.0.0.1', 0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+
+    def _post(self, path, payload):
+        request = urllib.request.Request(self.url + path, data=json.dumps(payload).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    def test_http_queries_match_calculator(self):
+        """Les réponses HTTP reproduisent les calculs directs et sont mises en cache"""
+        weights = {'A': 0.5, 'B': 0.3, 'C': 0.2}
+        calculator = VaRCalculator(0.99)
+        historical = self._post('/var', {'weights': weights, 'confidence': 0.99})
+        expected = calculator.historical_var(self.returns, np.array([0.5, 0.3, 0.2]))
+        self.assertAlmostEqual(historical['var'], expected['var'], places=12)
+
+        parametric = self._post('/var', {'weights': [0.5, 0.3, 0.2], 'method': 'parametric',
+                                         'confidence': 0.99, 'horizon': 10})
+        one_day = calculator.delta_normal_var(self.returns, np.array([0.5, 0.3, 0.2]))
+        self.assertAlmostEqual(parametric['var'], 2.3263478740408408 * one_day['std'][0] * np.sqrt(10)
+                               - 10 * one_day['mean'][0], places=12)
+        self.assertGreater(parametric['es'], parametric['var'])
+
+        self._post('/var', {'weights': weights, 'confidence': 0.99})
+        with urllib.request.urlopen(self.url + '/stats', timeout=10) as response:
+            stats = json.loads(response.read())
+        self.assertEqual(stats['cache']['hits'], 1)
+        self.assertEqual(stats['cache']['entries'], 2)
+
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self._post('/var', {'weights': {'Z': 1.0}})
+        self.assertEqual(error.exception.code, 400)
+        # Horizon Monte-Carlo au-delà de la limite : rejeté sans lancer de simulation
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self._post('/var', {'weights': weights, 'method': 'monte_carlo', 'horizon': 100000})
+        self.assertEqual(error.exception.code, 400)
+        self.assertEqual(self.service.stats()['scenario_sets']['monte_carlo'], [1])
+
+    def test_concurrent_requests_are_batched(self):
+        """Les requêtes concurrentes sont évaluées par lots, avec les mêmes résultats qu'isolément"""
+        weights = np.random.default_rng(1).dirichlet(np.ones(3), size=40)
+        payloads = [{'weights': list(w), 'method': 'monte_carlo', 'horizon': 1} for w in weights]
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda payload: self._post('/var', payload), payloads))
+        self.assertLess(self.service.stats()['batches'], len(payloads))
+
+        scenarios = self.service.scenarios('monte_carlo', 1)
+        for w, result in zip(weights, results):
+            self.assertAlmostEqual(result['var'], -np.percentile(scenarios @ w, 5), places=12)
+
+        what_if = self._post('/whatif', {'weights': {'A': 0.5, 'B': 0.5}, 'trades': {'A': -0.5, 'C': 0.5},
+                                         'method': 'parametric'})
+        self.assertAlmostEqual(what_if['after']['var'],
+                               self.service.query({'weights': [0, 0.5, 0.5], 'method': 'parametric'})['var'])
+
+    def test_parametric_uses_configured_covariance(self):
+        """La VaR paramétrique du service suit l'estimateur de covariance configuré"""
+        service = RiskService(self.returns, covariance='ledoit_wolf')
+        try:
+            weights = np.array([0.5, 0.3, 0.2])
+            result = service.query({'weights': weights.tolist(), 'method': 'parametric', 'confidence': 0.99})
+            expected = VaRCalculator(0.99).delta_normal_var(self.returns, weights, covariance='ledoit_wolf')
+            sample = VaRCalculator(0.99).delta_normal_var(self.returns, weights)
+            self.assertAlmostEqual(result['var'], expected['var'][0, 0], places=12)
+            self.assertNotAlmostEqual(result['var'], sample['var'][0, 0], places=12)
+        finally:
+            service.close()
+
+    def test_result_cache_evicts_by_size(self):
+        """Le cache évince les entrées les moins récemment utilisées au-delà de son budget en octets"""
+        cache = ResultCache(max_bytes=45)
+        cache.put('a', {'var': 0.01})
+        cache.put('b', {'var': 0.02})
+        cache.get('a')
+        cache.put('c', {'var': 0.03, 'es': 0.04})
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertLessEqual(cache.stats()['bytes'], 45)
+
+if __name__ == '__main__':
+    unittest.main()
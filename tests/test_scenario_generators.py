@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from monte_carlo import MonteCarloSimulator
+from risk_context import RiskContext
+from scenario_generators import (EmpiricalMarginals, StudentTGenerator, BootstrapGenerator,
+                                 student_t_dof)
+
+class TestScenarioGenerators(unittest.TestCase):
+
+    def setUp(self):
+        """Rendements de Student corrélés (queues épaisses)"""
+        rng = np.random.default_rng(0)
+        L = np.linalg.cholesky([[1.0, 0.6, 0.3], [0.6, 1.0, 0.4], [0.3, 0.4, 1.0]])
+        shocks = rng.standard_normal((2000, 3)) @ L.T / np.sqrt(rng.chisquare(4, (2000, 1)) / 4)
+        self.returns = pd.DataFrame(0.0004 + 0.01 * shocks, columns=['A', 'B', 'C'])
+        self.weights = {'A': 0.5, 'B': 0.3, 'C': 0.2}
+        self.simulator = MonteCarloSimulator(n_simulations=4000, time_horizon=11,
+                                             chunk_size=1000, n_workers=1)
+
+    def test_gaussian_generator_matches_parallel_simulation(self):
+        """Le générateur gaussien reproduit exactement la simulation corrélée parallèle"""
+        reference = self.simulator.parallel_mc_simulation(self.returns, self.weights)
+        result = self.simulator.scenario_mc_simulation(self.returns, self.weights, generator='gaussian')
+        np.testing.assert_array_equal(result['final_values'], reference['final_values'])
+
+        threaded = self.simulator.scenario_mc_simulation(self.returns, self.weights, generator='t_copula',
+                                                         n_workers=3, backend='thread')
+        serial = self.simulator.scenario_mc_simulation(self.returns, self.weights, generator='t_copula')
+        np.testing.assert_array_equal(threaded['final_values'], serial['final_values'])
+
+    def test_student_t_preserves_covariance_with_fat_tails(self):
+        """Les chocs de Student gardent la covariance et présentent l'aplatissement attendu"""
+        context = RiskContext.from_data(self.returns, self.weights)
+        self.assertAlmostEqual(student_t_dof(6 / (5 - 4)), 5.0)
+        generator = StudentTGenerator(context.mean_vector, context.cholesky, 6.0)
+        shocks = next(generator.steps(np.random.default_rng(1), 400000, 1))
+        np.testing.assert_allclose(np.cov(shocks, rowvar=False), context.covariance, rtol=0.05, atol=1e-6)
+        self.assertAlmostEqual(stats.kurtosis(shocks[:, 0]), 3.0, delta=0.6)
+
+    def test_copula_preserves_empirical_marginals(self):
+        """Les copules restituent les marginales empiriques via la table de quantiles"""
+        marginals = EmpiricalMarginals(self.returns.values)
+        np.testing.assert_allclose(marginals.ppf(np.array([[0.0, 0.5, 1.0]])),
+                                   [[self.returns['A'].min(), self.returns['B'].median(),
+                                     self.returns['C'].max()]])
+
+        context = RiskContext.from_data(self.returns, self.weights)
+        generator = context.copula_generator(5.0)
+        self.assertIs(generator, context.copula_generator(5.0))
+        shocks = next(generator.steps(np.random.default_rng(2), 200000, 1))
+        np.testing.assert_allclose(np.percentile(shocks, [1, 50, 99], axis=0),
+                                   np.percentile(self.returns, [1, 50, 99], axis=0), rtol=0.1, atol=5e-4)
+
+    def test_block_bootstrap_resamples_consecutive_dates(self):
+        """Le rééchantillonnage par blocs tire des dates historiques consécutives"""
+        returns = np.arange(100, dtype=float)[:, None] * np.ones((1, 2))
+        steps = np.array(list(BootstrapGenerator(returns, block_length=5).steps(
+            np.random.default_rng(3), 50, 10)))
+        self.assertTrue(np.isin(steps, returns).all())
+        np.testing.assert_array_equal(np.diff(steps[:5, :, 0], axis=0), 1)
+        np.testing.assert_array_equal(np.diff(steps[5:, :, 0], axis=0), 1)
+
+        result = self.simulator.scenario_mc_simulation(self.returns, self.weights,
+                                                       generator='block_bootstrap', block_length=5)
+        self.assertEqual(result['final_values'].shape, (4000,))
+        self.assertEqual(result['generator'], 'BootstrapGenerator')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from stress_testing import StressTester
+from report_generator import ReportGenerator
+
+class TestStressTesting(unittest.TestCase):
+
+    def setUp(self):
+        """Prix simulés couvrant la crise de 2008 mais pas le krach COVID"""
+        rng = np.random.default_rng(0)
+        market = rng.normal(0.0003, 0.01, 1000)
+        betas = np.array([1.0, 1.5, 0.5])
+        returns = market[:, None] * betas + rng.normal(0, 0.002, (1000, 3))
+        index = pd.bdate_range('2007-01-01', periods=1000)
+        self.prices = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0),
+                                   columns=['SPY', 'B', 'C'], index=index)
+        self.returns = self.prices.pct_change().dropna()
+        self.weights = {'SPY': 0.5, 'B': 0.3, 'C': 0.2}
+        self.tester = StressTester(market_proxy='SPY')
+
+    def test_replay_and_factor_fallback(self):
+        """Rejeu historique si la fenêtre est couverte, choc de facteur sinon"""
+        shocks = self.tester.compile(self.returns, self.prices)
+        window = self.prices.loc['2008-09-12':'2008-11-20']
+        np.testing.assert_allclose(shocks.loc['Crise financière 2008'],
+                                   window.iloc[-1] / window.iloc[0] - 1)
+
+        betas = self.tester.factor_betas(self.returns).loc['market']
+        self.assertAlmostEqual(betas['SPY'], 1.0, places=10)
+        np.testing.assert_allclose(betas, [1.0, 1.5, 0.5], rtol=0.1)
+        np.testing.assert_allclose(shocks.loc['Krach COVID-19 2020'], -0.34 * betas)
+
+    def test_weight_matrix_matches_single_portfolios(self):
+        """Un produit matriciel sur plusieurs portefeuilles égale le calcul portefeuille par portefeuille"""
+        weights = np.random.default_rng(1).dirichlet(np.ones(3), size=5)
+        pnl = self.tester.run(self.returns, weights, 1e6, prices=self.prices)
+        self.assertEqual(pnl.shape, (len(self.tester.scenarios), 5))
+        for i, row in enumerate(weights):
+            single = self.tester.run(self.returns, dict(zip(self.prices.columns, row)),
+                                     1e6, prices=self.prices)
+            np.testing.assert_allclose(pnl.iloc[:, i], single['pnl'])
+
+    def test_stress_table_and_cache(self):
+        """Tableau trié en multiples de la VaR ; la matrice de chocs est réutilisée"""
+        table = self.tester.stress_table(self.returns, self.weights, 1e6,
+                                         prices=self.prices, var_value=10000)
+        self.assertTrue(table['pnl'].is_monotonic_increasing)
+        np.testing.assert_allclose(table['var_multiple'], -table['pnl'] / 10000)
+        self.assertIs(self.tester.compile(self.returns, self.prices),
+                      self.tester.compile(self.returns, self.prices))
+
+        self.tester.add_scenario('Choc B', assets={'B': -0.5})
+        self.assertEqual(self.tester.compile(self.returns, self.prices).loc['Choc B', 'B'], -0.5)
+
+        windows = self.tester.historical_windows(self.prices, horizon=10, step=5)
+        pnl = self.tester.run(self.returns, self.weights, 1e6, shocks=windows)
+        self.assertEqual(len(pnl), len(windows))
+
+    def test_latex_stress_table_is_escaped(self):
+        """Les cellules du tableau de stress LaTeX échappent $, %, & et _"""
+        report_data = {
+            'timestamp': '2024-01-01 00:00:00',
+            'portfolio_summary': {"Nombre d'actifs": 1, 'Valeur du portefeuille': '$1,000,000.00',
+                                  'Volatilité annualisée': '20.00%', 'Ratio de Sharpe': '0.50'},
+            'risk_metrics': {'VaR historique (95%)': '$25,000.00'},
+            'portfolio_composition': {'SPY': 1.0},
+            'stress_tests': {'Choc R&D_tech -8 %': {'P&L': '$-80,000.00', 'Rendement': '-8.00%',
+                                                    'Multiple de la VaR': '3.20x'}},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'rapport.tex')
+            ReportGenerator().generate_latex_report(report_data, filename)
+            with open(filename, encoding='utf-8') as f:
+                latex = f.read()
+        self.assertIn('Choc R\\&D\\_tech -8 \\% & \\$-80,000.00 & -8.00\\% & 3.20x \\\\', latex)
+        self.assertIn('VaR historique (95\\%) & \\$25,000.00', latex)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 import numpy as np
 import pandas as pd
 from var_calculator import VaRCalculator
+from risk_context import RiskContext
 
 class TestVaRCalculator(unittest.TestCase):
     
@@ -58,5 +59,108 @@ class TestVaRCalculator(unittest.TestCase):
         # ES devrait être supérieur ou égal à la VaR
         self.assertGreaterEqual(es_result['es_value'], historical_result['var_value'])
 
+    def test_batch_var_matches_single_portfolio_methods(self):
+        """Teste l'API par lots contre les calculs portefeuille par portefeuille"""
+        weights_matrix = np.array([[0.6, 0.4], [1.0, 0.0], [0.2, 0.8], [-0.5, 1.5]])
+        calculator = VaRCalculator(confidence_level=0.95, batch_size=3)
+        batch = calculator.batch_var(self.returns, weights_matrix, self.portfolio_value)
+        
+        for i, weights in enumerate(weights_matrix):
+            historical = calculator.historical_var(self.returns, weights, self.portfolio_value)
+            parametric = calculator.parametric_var(self.returns, weights, self.portfolio_value)
+            es = calculator.calculate_expected_shortfall(historical['portfolio_returns'],
+                                                         self.portfolio_value)
+            stats = calculator.calculate_portfolio_stats(self.returns, weights, self.portfolio_value)
+            
+            self.assertAlmostEqual(batch['var_value'][i], historical['var_value'], places=6)
+            self.assertAlmostEqual(batch['parametric_var_value'][i], parametric['var_value'], places=6)
+            self.assertAlmostEqual(batch['es_value'][i], es['es_value'], places=6)
+            for key in ('volatility', 'sharpe_ratio', 'skewness', 'kurtosis'):
+                self.assertAlmostEqual(batch[key][i], stats[key], places=8)
+
+    def test_multi_horizon_var(self):
+        """Teste la VaR multi-horizons : horizon 1 identique aux méthodes journalières, fenêtres composées exactes"""
+        table = self.var_calculator.multi_horizon_var(
+            self.returns, self.weights, horizons=(1, 5, 10), portfolio_value=self.portfolio_value
+        )
+        self.assertEqual(list(table.index), [1, 5, 10])
+        historical = self.var_calculator.historical_var(self.returns, self.weights)
+        parametric = self.var_calculator.parametric_var(self.returns, self.weights)
+        self.assertAlmostEqual(table.loc[1, 'historical_var'], historical['var'], places=12)
+        self.assertAlmostEqual(table.loc[1, 'parametric_var'], parametric['var'], places=12)
+
+        # Rendements composés sur 5 jours, fenêtres chevauchantes
+        portfolio_returns = self.returns.values @ self.weights
+        windows = np.array([np.prod(1 + portfolio_returns[t:t + 5]) - 1
+                            for t in range(len(portfolio_returns) - 4)])
+        self.assertEqual(table.loc[5, 'n_windows'], len(windows))
+        self.assertAlmostEqual(table.loc[5, 'historical_var'], -np.percentile(windows, 5), places=10)
+        self.assertGreater(table.loc[10, 'parametric_var'], table.loc[5, 'parametric_var'])
+        self.assertTrue((table['historical_es'] >= table['historical_var']).all())
+
+        for horizons in ((0,), (-5,), (2.5,), (len(self.returns),), ()):
+            with self.assertRaises(ValueError):
+                self.var_calculator.multi_horizon_var(self.returns, self.weights, horizons=horizons)
+
+    def test_risk_context_is_shared_and_matches_direct_computation(self):
+        """Teste le cache du contexte de risque et la cohérence des résultats"""
+        context = RiskContext.from_data(self.returns, self.weights)
+        self.assertIs(RiskContext.from_data(self.returns.copy(), self.weights.copy()), context)
+        self.assertIsNot(RiskContext.from_data(self.returns, self.weights[::-1]), context)
+        
+        result = self.var_calculator.historical_var(None, None, self.portfolio_value, context=context)
+        portfolio_returns = (self.returns * self.weights).sum(axis=1)
+        expected_var = -np.percentile(portfolio_returns, 5)
+        self.assertAlmostEqual(result['var'], expected_var, places=12)
+        
+        es_with_context = self.var_calculator.calculate_expected_shortfall(
+            None, self.portfolio_value, context=context)
+        es_direct = self.var_calculator.calculate_expected_shortfall(
+            portfolio_returns, self.portfolio_value)
+        self.assertAlmostEqual(es_with_context['es'], es_direct['es'], places=12)
+        self.assertEqual(len(es_with_context['tail_losses']), len(es_direct['tail_losses']))
+
+    def test_delta_normal_and_cornish_fisher_var(self):
+        """VaR matricielle pour plusieurs portefeuilles et niveaux ; Cornish-Fisher via les co-moments"""
+        from scipy import stats
+        weights = np.array([[0.6, 0.4], [0.2, 0.8], [1.0, 0.0]])
+        levels = [0.95, 0.99]
+        result = self.var_calculator.delta_normal_var(self.returns, weights, self.portfolio_value,
+                                                      confidence_levels=levels)
+        self.assertEqual(result['var'].shape, (3, 2))
+        for i, w in enumerate(weights):
+            portfolio_returns = self.returns.values @ w
+            for j, level in enumerate(levels):
+                expected = stats.norm.ppf(level) * portfolio_returns.std(ddof=1) - portfolio_returns.mean()
+                self.assertAlmostEqual(result['var'][i, j], expected, places=12)
+        
+        dict_weights = {'Asset2': 0.4, 'Asset1': 0.6}
+        single = self.var_calculator.delta_normal_var(self.returns, dict_weights)
+        self.assertAlmostEqual(single['var'][0, 0], result['var'][0, 0], places=14)
+        
+        skewed = self.returns.copy()
+        skewed['Asset1'] = np.exp(skewed['Asset1'] * 20) / 20 - 0.05
+        cornish_fisher = self.var_calculator.cornish_fisher_var(skewed, weights, confidence_levels=levels)
+        for i, w in enumerate(weights):
+            portfolio_returns = skewed.values @ w
+            self.assertAlmostEqual(cornish_fisher['skewness'][i], stats.skew(portfolio_returns), places=10)
+            self.assertAlmostEqual(cornish_fisher['excess_kurtosis'][i],
+                                   stats.kurtosis(portfolio_returns), places=10)
+        
+        # Univers plus large : moments lus sur les rendements des portefeuilles, sans tenseur n⁴
+        rng = np.random.default_rng(3)
+        wide = pd.DataFrame(rng.standard_t(5, (300, 12)) * 0.01)
+        wide_weights = rng.dirichlet(np.ones(12), size=5)
+        context = RiskContext.from_data(wide)
+        wide_result = self.var_calculator.cornish_fisher_var(wide, wide_weights, context=context)
+        for i, w in enumerate(wide_weights):
+            portfolio_returns = wide.values @ w
+            self.assertAlmostEqual(wide_result['skewness'][i], stats.skew(portfolio_returns), places=10)
+            self.assertAlmostEqual(wide_result['excess_kurtosis'][i],
+                                   stats.kurtosis(portfolio_returns), places=10)
+        # Sans asymétrie ni excès d'aplatissement, Cornish-Fisher se réduit à la VaR normale
+        self.assertLess(np.abs(self.var_calculator.cornish_fisher_var(self.returns, weights)['var'][:, 0]
+                               - result['var'][:, 0]).max() / result['var'][:, 0].min(), 0.05)
+
 if __name__ == '__main__':
     unittest.main()
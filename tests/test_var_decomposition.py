@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from var_decomposition import VaRDecomposer
+from var_calculator import VaRCalculator
+from monte_carlo import MonteCarloSimulator
+
+class TestVaRDecomposer(unittest.TestCase):
+
+    def setUp(self):
+        """Configure les données de test"""
+        rng = np.random.RandomState(5)
+        cov = np.array([[4e-4, 1e-4, 5e-5, 0],
+                        [1e-4, 2.25e-4, 3e-5, 2e-5],
+                        [5e-5, 3e-5, 1e-4, 1e-5],
+                        [0, 2e-5, 1e-5, 9e-5]])
+        self.returns = pd.DataFrame(rng.multivariate_normal(np.full(4, 4e-4), cov, 1500),
+                                    columns=['A', 'B', 'C', 'D'])
+        self.weights = np.array([0.4, 0.3, 0.2, 0.1])
+        self.decomposer = VaRDecomposer(confidence_level=0.95)
+
+    def test_parametric_components_sum_to_var(self):
+        """Teste l'additivité d'Euler et la VaR incrémentale analytique"""
+        result = self.decomposer.parametric(self.returns, self.weights, 1)
+        table = result['decomposition']
+        self.assertAlmostEqual(table['component_var'].sum(), result['var'], places=12)
+        self.assertAlmostEqual(table['component_es'].sum(), result['es'], places=12)
+
+        z = stats.norm.ppf(0.95)
+        without_b = self.weights.copy()
+        without_b[1] = 0
+        portfolio = self.returns @ without_b
+        expected = result['var'] - (z * portfolio.std() - portfolio.mean())
+        self.assertAlmostEqual(table.loc['B', 'incremental_var'], expected, places=10)
+
+        # Estimateur de covariance configuré : les composantes somment à la VaR paramétrique
+        for covariance in ('ledoit_wolf', 'factor'):
+            result = self.decomposer.parametric(self.returns, self.weights, 1, covariance=covariance,
+                                                n_factors=2)
+            expected = VaRCalculator(0.95).parametric_var(self.returns, self.weights, 1,
+                                                          covariance=covariance, n_factors=2)
+            self.assertAlmostEqual(result['var'], expected['var'], places=12)
+            self.assertAlmostEqual(result['decomposition']['component_var'].sum(), expected['var'], places=12)
+
+    def test_historical_incremental_matches_recomputation(self):
+        """Teste la VaR/ES incrémentale historique contre un recalcul actif par actif"""
+        result = self.decomposer.historical(self.returns, self.weights, 1)
+        table = result['decomposition']
+        self.assertAlmostEqual(table['component_es'].sum(), result['es'], places=12)
+        self.assertAlmostEqual(table['component_var'].sum(), result['var'], delta=0.1 * result['var'])
+
+        for i, asset in enumerate(self.returns.columns):
+            weights = self.weights.copy()
+            weights[i] = 0
+            portfolio = self.returns.values @ weights
+            var_without = -np.percentile(portfolio, 5)
+            es_without = -portfolio[portfolio <= -var_without].mean()
+            self.assertAlmostEqual(table.loc[asset, 'incremental_var'],
+                                   result['var'] - var_without, places=12)
+            self.assertAlmostEqual(table.loc[asset, 'incremental_es'],
+                                   result['es'] - es_without, places=12)
+
+    def test_monte_carlo_decomposition(self):
+        """Teste la décomposition sur des scénarios Monte-Carlo par actif"""
+        simulator = MonteCarloSimulator(n_simulations=4000, time_horizon=5, random_seed=2,
+                                        n_workers=1)
+        mc_results = simulator.parallel_mc_simulation(
+            self.returns, dict(zip(self.returns.columns, self.weights)), 1000000)
+        result = self.decomposer.monte_carlo(mc_results, assets=self.returns.columns)
+        pnl_var = -np.percentile(mc_results['final_values'] - 1000000, 5)
+        self.assertAlmostEqual(result['var_value'], pnl_var, places=4)
+        self.assertAlmostEqual(result['decomposition']['component_es'].sum(), result['es_value'],
+                               places=4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from visualizer import RiskVisualizer
+from monte_carlo import MonteCarloSimulator
+
+class TestRiskVisualizer(unittest.TestCase):
+
+    def setUp(self):
+        """Configure les données de test"""
+        np.random.seed(3)
+        returns = pd.DataFrame(np.random.normal(0.0005, 0.01, (300, 2)), columns=['A', 'B'])
+        simulator = MonteCarloSimulator(n_simulations=500, time_horizon=20, random_seed=3)
+        simulations = simulator.simulate_gbm_streaming(returns, np.array([0.5, 0.5]), 1000000,
+                                                       n_paths_to_keep=20)
+        self.mc_results = simulator.monte_carlo_var(simulations, 0.95)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_headless_render_skips_unchanged_charts(self):
+        """Teste le rendu sans affichage et le saut des graphiques inchangés"""
+        save_path = os.path.join(self.tmp_dir.name, 'monte_carlo.png')
+        visualizer = RiskVisualizer(headless=True, dpi=50, n_workers=2,
+                                    cache_dir=self.tmp_dir.name)
+        jobs = [('plot_monte_carlo_simulations', (self.mc_results,), {'save_path': save_path})]
+
+        first = visualizer.render_all(jobs)
+        self.assertEqual(first['rendered'], [save_path])
+        self.assertTrue(os.path.exists(save_path))
+
+        second = visualizer.render_all(jobs)
+        self.assertEqual(second['skipped'], [save_path])
+
+        changed = dict(self.mc_results, var=self.mc_results['var'] * 2)
+        third = visualizer.render_all(
+            [('plot_monte_carlo_simulations', (changed,), {'save_path': save_path})])
+        self.assertEqual(third['rendered'], [save_path])
+
+if __name__ == '__main__':
+    unittest.main()
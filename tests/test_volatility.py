@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from volatility import VolatilityEngine, garch_filter, garch_log_likelihood, fit_garch
+from var_calculator import VaRCalculator
+from monte_carlo import MonteCarloSimulator
+
+class TestVolatility(unittest.TestCase):
+
+    def setUp(self):
+        """Simule des rendements GARCH(1,1) à corrélation constante"""
+        rng = np.random.default_rng(0)
+        self.omega = np.array([2e-6, 1e-6, 3e-6])
+        self.alpha = np.array([0.08, 0.05, 0.12])
+        self.beta = np.array([0.90, 0.93, 0.85])
+        L = np.linalg.cholesky([[1.0, 0.5, 0.3], [0.5, 1.0, 0.4], [0.3, 0.4, 1.0]])
+        variance = self.omega / (1 - self.alpha - self.beta)
+        returns = np.empty((3000, 3))
+        for t in range(len(returns)):
+            shocks = np.sqrt(variance) * (L @ rng.standard_normal(3))
+            returns[t] = 0.0003 + shocks
+            variance = self.omega + self.alpha * shocks ** 2 + self.beta * variance
+        self.returns = pd.DataFrame(returns, columns=['A', 'B', 'C'])
+        self.weights = {'A': 0.5, 'B': 0.3, 'C': 0.2}
+
+    def test_garch_fit_recovers_persistence(self):
+        """L'estimation vectorisée retrouve la persistance α + β de chaque actif"""
+        residuals = self.returns.values - self.returns.values.mean(axis=0)
+        params = fit_garch(residuals)
+        np.testing.assert_allclose(params['alpha'] + params['beta'], self.alpha + self.beta, atol=0.03)
+        self.assertTrue((params['omega'] > 0).all())
+
+        # Vraisemblance cumulée dans la récursion = vraisemblance des variances filtrées
+        omega = residuals.var(axis=0) * (1 - params['alpha'] - params['beta'])
+        variances, _ = garch_filter(residuals, omega, params['alpha'], params['beta'], residuals.var(axis=0))
+        expected = -0.5 * (np.log(variances) + residuals ** 2 / variances).sum(axis=0)
+        np.testing.assert_allclose(garch_log_likelihood(residuals, omega, params['alpha'], params['beta'],
+                                                        residuals.var(axis=0)), expected, rtol=1e-12)
+        np.testing.assert_allclose(params['log_likelihood'], expected, rtol=1e-12)
+
+    def test_ewma_filter_matches_loop(self):
+        """Le filtre EWMA vectorisé coïncide avec la récursion RiskMetrics actif par actif"""
+        engine = VolatilityEngine('ewma', lam=0.94).fit(self.returns)
+        residuals = self.returns.values - self.returns.values.mean(axis=0)
+        for j in range(3):
+            variance = residuals[:, j].var()
+            for value in residuals[:, j]:
+                variance = 0.94 * variance + 0.06 * value ** 2
+            self.assertAlmostEqual(engine.forecast_variance[j], variance, places=15)
+
+    def test_incremental_update_matches_full_filter(self):
+        """Une mise à jour d'une date équivaut au filtrage de tout l'historique, sans réestimation"""
+        engine = VolatilityEngine('garch').fit(self.returns.values[:-1])
+        engine.update(self.returns.values[-1])
+        residuals = self.returns.values - engine.mean
+        _, forecast = garch_filter(residuals, engine.omega, engine.alpha, engine.beta,
+                                   residuals[:-1].var(axis=0))
+        np.testing.assert_allclose(engine.forecast_variance, forecast, rtol=1e-12)
+        self.assertEqual(len(engine.standardized_residuals), len(self.returns))
+        correlation = engine.dcc.correlation
+        np.testing.assert_allclose(np.diag(correlation), 1.0)
+        self.assertTrue(np.all(np.linalg.eigvalsh(correlation) > 0))
+
+    def test_filtered_var_and_volatility_scaled_mc(self):
+        """La VaR filtrée et la simulation à volatilité conditionnelle suivent la volatilité prévue"""
+        filtered = VaRCalculator(0.99).filtered_historical_var(self.returns, self.weights, method='ewma')
+        self.assertAlmostEqual(filtered['scenarios'].std(), filtered['forecast_volatility'], delta=0.15 *
+                               filtered['forecast_volatility'])
+        self.assertGreaterEqual(filtered['es'], filtered['var'])
+
+        simulator = MonteCarloSimulator(n_simulations=20000, time_horizon=2, random_seed=1)
+        simulated = simulator.volatility_scaled_mc(self.returns, self.weights, 1.0, method='ewma')
+        one_day = simulated['final_values'] - 1.0
+        self.assertAlmostEqual(one_day.std(), filtered['forecast_volatility'],
+                               delta=0.03 * filtered['forecast_volatility'])
+
+if __name__ == '__main__':
+    unittest.main()